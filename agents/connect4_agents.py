@@ -1,202 +1,537 @@
 import sys
 import os
+import math
 import random
 import time
-from copy import deepcopy
+from array import array
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from games.connect4 import Connect4
+from games.connect4 import Connect4, WINDOW_SCORES
 from agents.default_agent import DefaultAgent
+from agents.transposition import TranspositionTable
+from agents.move_ordering import MoveOrderer, center_out_order
+from agents.search import NegamaxSearch, SearchTimeout
+from agents.parallel_search import ParallelSearch
+from agents.connect4_eval import NumpyConnect4Evaluator
+from agents.connect4_book import OpeningBook
+from agents.connect4_threats import ThreatAnalyzer, ThreatEvaluator
+from agents.position_cache import PositionCache
+from agents.connect4_solver import EndgameSolver, WIN, LOSS
+from agents.metrics import SearchStats, PrintSink
 
 class Connect4DefaultAgent(DefaultAgent):
     pass  # Uses the default implementation
 
-class Connect4MinimaxAgent:
-    def __init__(self, player_symbol, use_alpha_beta=True, max_depth=None):
-        self.player_symbol = player_symbol
-        self.opponent_symbol = 'O' if player_symbol == 'X' else 'X'
-        self.use_alpha_beta = use_alpha_beta
-        self.max_depth = max_depth  # None for full search, or a number for depth-limited search
-        self.nodes_evaluated = 0
+class Connect4MinimaxAgent(NegamaxSearch):
+    """Minimax agent for Connect 4: a configuration of the shared NegamaxSearch.
+    
+    Adds what is specific to Connect 4 on top of the engine: the opening
+    book, the pluggable leaf evaluators, threat analysis, parallel search
+    and the endgame solver, which takes over from the search once at most
+    `endgame_cells` cells are empty (off by default). A timed solve gets
+    SOLVER_TIME_SHARE of the move time and falls back to the search for the
+    rest when it does not finish.
+    """
+    SOLVER_TIME_SHARE = 0.5
+    
+    def __init__(self, player_symbol, use_alpha_beta=True, max_depth=None, tt_size_mb=None, tt_replacement='depth',
+                 move_time_ms=None, move_ordering=False, workers=1, parallel_mode='root_split', verbose=True,
+                 evaluator='scalar', book_path=None, threat_analysis=False, pvs=None, aspiration_window=None,
+                 cache_path=None, symmetry=True, sink=None, endgame_cells=0):
+        # Optional transposition table shared by every search this agent runs
+        tt = TranspositionTable(tt_size_mb, tt_replacement) if tt_size_mb else None
+        # True for center-out/killer/history ordering, or a MoveOrderer to plug in
+        self._default_ordering = move_ordering is True
+        if move_ordering is True:
+            move_ordering = MoveOrderer(static_order=center_out_order(7))
+        # Settle immediate wins and forced losses without searching, and skip moves that lose at once
+        self.threats = ThreatAnalyzer() if threat_analysis else None
+        # Null-window re-searches only pay off when the table makes them cheap
+        if pvs is None:
+            pvs = tt is not None
+        # A parallel root search always uses the full window, so aspiration only applies to one worker
+        if workers > 1:
+            aspiration_window = None
+        super().__init__(player_symbol, win_score=100, use_alpha_beta=use_alpha_beta, max_depth=max_depth, tt=tt,
+                         move_orderer=move_ordering or None, move_time_ms=move_time_ms, pvs=pvs,
+                         aspiration_window=aspiration_window,
+                         prefilter=self.threats.analyze if self.threats is not None else None, verbose=verbose,
+                         cache=PositionCache(cache_path) if cache_path else None, symmetry=symmetry, sink=sink)
+        # Positions found in the opening book are answered without searching
+        self.book = OpeningBook(book_path) if book_path else None
+        # 'numpy' swaps in the vectorized leaf evaluator from agents/connect4_eval.py,
+        # 'threats' the threat-aware one from agents/connect4_threats.py, and 'table'
+        # the game's own window tables, which exist for every Connect-N size
+        self.evaluator = evaluator
+        if evaluator == 'table':
+            self.evaluate_board = super().evaluate_board
+        elif evaluator == 'numpy':
+            self.evaluate_board = NumpyConnect4Evaluator(player_symbol).evaluate_board
+        elif evaluator == 'threats':
+            self.evaluate_board = ThreatEvaluator(player_symbol).evaluate_board
+        elif evaluator != 'scalar':
+            raise ValueError(f"Unknown evaluator: {evaluator}")
+        # More than one worker searches in a process pool (see agents/parallel_search.py)
+        self.workers = workers
+        self.parallel_mode = parallel_mode
+        self._parallel = None
+        self._tt_size_mb = tt_size_mb
+        self._tt_replacement = tt_replacement
+        self._board_size = (6, 7, 4)
+        self.cache_namespace = f"connect4:6x7:{evaluator}:{bool(threat_analysis)}"
+        # Exact win/draw/loss play near the end; its table of solved positions is kept between moves
+        self.endgame_cells = endgame_cells
+        self.solver = None
         
     def get_move(self, game):
-        self.nodes_evaluated = 0
-        start_time = time.time()
+        self._adapt_to_board(game)
+        book_move = self._book_move(game)
+        if book_move is not None:
+            self.nodes_evaluated = 0
+            self._report(book_move, 'book')
+            return book_move
         
-        if self.use_alpha_beta:
-            best_score = float('-inf')
-            best_move = None
-            
-            for move in game.get_valid_moves():
-                # Create a deep copy to avoid modifying the original game
-                game_copy = deepcopy(game)
-                game_copy.drop_piece(move)
-                
-                score = self.minimax(game_copy, 0, False, float('-inf'), float('inf'))
-                
-                if score > best_score:
-                    best_score = score
-                    best_move = move
-        else:
-            best_score = float('-inf')
-            best_move = None
-            
-            for move in game.get_valid_moves():
-                # Create a deep copy to avoid modifying the original game
-                game_copy = deepcopy(game)
-                game_copy.drop_piece(move)
-                
-                score = self.minimax_no_pruning(game_copy, 0, False)
-                
-                if score > best_score:
-                    best_score = score
-                    best_move = move
+        move_time_ms = self.move_time_ms
+        if self.endgame_cells and game.n == 4 and game.max_moves - game.move_count <= self.endgame_cells:
+            start_time = time.time()
+            move = self._solve_endgame(game)
+            if move is not None:
+                return move
+            # The solver ran out of its share of the move time; search with what is left
+            if move_time_ms is not None:
+                self.move_time_ms = max(1, move_time_ms - (time.time() - start_time) * 1000)
         
-        end_time = time.time()
-        print(f"Minimax agent evaluated {self.nodes_evaluated} nodes in {end_time - start_time:.2f} seconds")
-        
-        # If no best move was found (possible in depth-limited search), choose random
-        if best_move is None and game.get_valid_moves():
-            best_move = random.choice(game.get_valid_moves())
-            
-        return best_move
+        try:
+            if self.workers > 1 and self._parallel is None:
+                self._parallel = ParallelSearch(self.workers, self.parallel_mode, self._tt_size_mb)
+                if self._parallel.shared_tt is not None:
+                    self.tt = self._parallel.shared_tt
+            return super().get_move(game)
+        finally:
+            self.move_time_ms = move_time_ms
     
-    def minimax(self, game, depth, is_maximizing, alpha, beta):
-        self.nodes_evaluated += 1
-        
-        # Terminal states
-        if game.winner == self.player_symbol:
-            return 100 - depth  # Prefer winning sooner
-        elif game.winner == self.opponent_symbol:
-            return depth - 100  # Prefer losing later
-        elif game.game_over:  # Draw
-            return 0
-            
-        # Depth limit check
-        if self.max_depth is not None and depth >= self.max_depth:
-            return self.evaluate_board(game)
-            
-        if is_maximizing:
-            max_eval = float('-inf')
-            for move in game.get_valid_moves():
-                game_copy = deepcopy(game)
-                game_copy.drop_piece(move)
-                
-                eval = self.minimax(game_copy, depth + 1, False, alpha, beta)
-                max_eval = max(max_eval, eval)
-                
-                alpha = max(alpha, eval)
-                if beta <= alpha:
-                    break
-                    
-            return max_eval
-        else:
-            min_eval = float('inf')
-            for move in game.get_valid_moves():
-                game_copy = deepcopy(game)
-                game_copy.drop_piece(move)
-                
-                eval = self.minimax(game_copy, depth + 1, True, alpha, beta)
-                min_eval = min(min_eval, eval)
-                
-                beta = min(beta, eval)
-                if beta <= alpha:
-                    break
-                    
-            return min_eval
+    def _adapt_to_board(self, game):
+        """Check the options against a ConnectN board and center the move order on it."""
+        size = (game.rows, game.cols, game.n)
+        if size == self._board_size:
+            return
+        if size != (6, 7, 4) and (self.evaluator in ('numpy', 'threats') or self.threats is not None
+                                  or self.workers > 1):
+            raise ValueError("The numpy and threats evaluators, threat analysis and parallel search "
+                             "only support the 6x7 Connect 4 board")
+        if game.n != 4 and self.evaluator == 'scalar':
+            raise ValueError("The scalar evaluator scores four-cell windows; use evaluator='table'")
+        if self._default_ordering:
+            self.move_orderer.set_static_order(center_out_order(game.cols))
+        # Scores depend on the board, the leaf evaluator and threat analysis, so cached results do too
+        self.cache_namespace = f"connect{game.n}:{game.rows}x{game.cols}:{self.evaluator}:{self.threats is not None}"
+        self._board_size = size
+    
+    def _book_move(self, game):
+        if self.book is None:
+            return None
+        entry = self.book.probe(game)
+        if entry is None or entry[0] not in game.get_valid_moves():
+            return None
+        move, self.best_score = entry
+        self.principal_variation = [move]
+        self.completed_depth = None
+        return move
     
-    def minimax_no_pruning(self, game, depth, is_maximizing):
-        self.nodes_evaluated += 1
+    def _solve_endgame(self, game):
+        """The solver's move, or None if it ran out of time.
+
+        A proven result goes to the position cache as a search to the end.
+        """
+        start_time = time.time()
+        cached_move = self._cached_move(game)
+        if cached_move is not None:
+            self.nodes_evaluated = 0
+            self._report(cached_move, 'cache', start_time)
+            return cached_move
         
-        # Terminal states
-        if game.winner == self.player_symbol:
-            return 100 - depth
-        elif game.winner == self.opponent_symbol:
-            return depth - 100
-        elif game.game_over:  # Draw
-            return 0
-            
-        # Depth limit check
-        if self.max_depth is not None and depth >= self.max_depth:
-            return self.evaluate_board(game)
-            
-        if is_maximizing:
-            max_eval = float('-inf')
-            for move in game.get_valid_moves():
-                game_copy = deepcopy(game)
-                game_copy.drop_piece(move)
-                
-                eval = self.minimax_no_pruning(game_copy, depth + 1, False)
-                max_eval = max(max_eval, eval)
-                    
-            return max_eval
-        else:
-            min_eval = float('inf')
-            for move in game.get_valid_moves():
-                game_copy = deepcopy(game)
-                game_copy.drop_piece(move)
-                
-                eval = self.minimax_no_pruning(game_copy, depth + 1, True)
-                min_eval = min(min_eval, eval)
-                    
-            return min_eval
+        if self.solver is None or (self.solver.rows, self.solver.cols) != (game.rows, game.cols):
+            self.solver = EndgameSolver(game.rows, game.cols)
+        deadline = None
+        if self.move_time_ms is not None:
+            deadline = start_time + self.move_time_ms * self.SOLVER_TIME_SHARE / 1000
+        try:
+            move, result = self.solver.solve(
+                game, lambda: self.cancelled or (deadline is not None and time.time() >= deadline))
+        except SearchTimeout:
+            # Bounds proven so far stay in the solver's table for the next move
+            return None
+        self.nodes_evaluated = self.solver.nodes
+        # Wins and losses are proven but not timed, so they score just outside any searched win or loss
+        self.best_score = {WIN: self.win_score, LOSS: -self.win_score}.get(result, 0)
+        self.principal_variation = [move]
+        self.completed_depth = None
+        self.effective_branching_factor = 0.0
+        self._store_result(game, move)
+        result_name = {WIN: 'win', LOSS: 'loss'}.get(result, 'draw')
+        self._report(move, 'solver', start_time, details=[result_name, self.solver.describe()])
+        return move
+    
+    def _search_root(self, game, depth_limit, alpha=float('-inf'), beta=float('inf')):
+        if self._parallel is not None:
+            return self._parallel.search_root(self, game, depth_limit)
+        return self._search_root_serial(game, depth_limit, alpha, beta)
+    
+    def _worker_config(self, depth_limit):
+        """What a pool worker needs to rebuild this agent's search."""
+        return {
+            'agent_class': type(self),
+            'player_symbol': self.player_symbol,
+            'use_alpha_beta': self.use_alpha_beta,
+            'move_ordering': self.move_orderer is not None,
+            'tt_size_mb': self._tt_size_mb,
+            'tt_replacement': self._tt_replacement,
+            'evaluator': self.evaluator,
+            'threat_analysis': self.threats is not None,
+            'symmetry': self.symmetry,
+            'depth_limit': depth_limit,
+            'principal_variation': self.principal_variation
+        }
+    
+    def close(self):
+        """Shut down the worker pool of a parallel search and close the book and cache."""
+        if self._parallel is not None:
+            self._parallel.close()
+            self._parallel = None
+        if self.book is not None:
+            self.book.close()
+            self.book = None
+        if self.cache is not None:
+            self.cache.close()
+            self.cache = None
             
     def evaluate_board(self, game):
-        """Heuristic evaluation function for Connect4."""
+        """Heuristic evaluation function for Connect4: the window score the game keeps up to date on every move."""
+        return game.evaluate(self.player_symbol)
+        
+    def rescan_board(self, game):
+        """The same score computed by scanning every window of the board, as evaluate_board used to."""
         score = 0
+        # The bitboards are unpacked once per leaf rather than per cell
+        board = game.board
         
         # Check horizontal windows
         for row in range(game.rows):
             for col in range(game.cols - 3):
-                window = [game.board[row][col+i] for i in range(4)]
+                window = [board[row][col+i] for i in range(4)]
                 score += self.evaluate_window(window)
                 
         # Check vertical windows
         for row in range(game.rows - 3):
             for col in range(game.cols):
-                window = [game.board[row+i][col] for i in range(4)]
+                window = [board[row+i][col] for i in range(4)]
                 score += self.evaluate_window(window)
                 
         # Check diagonal windows (positive slope)
         for row in range(game.rows - 3):
             for col in range(game.cols - 3):
-                window = [game.board[row+i][col+i] for i in range(4)]
+                window = [board[row+i][col+i] for i in range(4)]
                 score += self.evaluate_window(window)
                 
         # Check diagonal windows (negative slope)
         for row in range(3, game.rows):
             for col in range(game.cols - 3):
-                window = [game.board[row-i][col+i] for i in range(4)]
+                window = [board[row-i][col+i] for i in range(4)]
                 score += self.evaluate_window(window)
                 
         # Center column preference (control of center is good in Connect4)
         center_col = game.cols // 2
-        center_count = sum(1 for row in range(game.rows) if game.board[row][center_col] == self.player_symbol)
+        center_count = sum(1 for row in range(game.rows) if board[row][center_col] == self.player_symbol)
         score += center_count * 3
         
         return score
         
     def evaluate_window(self, window):
-        """Evaluate a window of 4 positions."""
-        player_count = window.count(self.player_symbol)
-        opponent_count = window.count(self.opponent_symbol)
-        empty_count = window.count(' ')
+        """Evaluate a window of 4 positions with the game's window score table."""
+        return WINDOW_SCORES[window.count(self.player_symbol)][window.count(self.opponent_symbol)]
+
+
+def _has_four(bitboard, stride):
+    """Four in a row on a bitboard with `stride` bits per column."""
+    for shift in (1, stride, stride - 1, stride + 1):
+        pairs = bitboard & (bitboard >> shift)
+        if pairs & (pairs >> (2 * shift)):
+            return True
+    return False
+
+class Connect4MCTSAgent:
+    """Monte Carlo Tree Search with UCT selection and random rollouts.
+    
+    The tree is stored column-wise in flat arrays indexed by node number
+    instead of one Python object per node, and the children of a node sit
+    in one contiguous block. Rollouts run on a pair of plain integers
+    (stones of the side to move and the occupancy mask) rather than on a
+    Connect4 object. Search stops after `playouts` playouts or
+    `move_time_ms` milliseconds, whichever comes first, and the subtree
+    under the moves actually played is kept for the next call.
+    """
+    # How many playouts to run between clock checks
+    TIME_CHECK_INTERVAL = 64
+    
+    def __init__(self, player_symbol, playouts=None, move_time_ms=None, exploration=1.41, max_nodes=1000000,
+                 reuse_tree=True, verbose=True, seed=None, sink=None):
+        self.player_symbol = player_symbol
+        if playouts is None and move_time_ms is None:
+            playouts = 2000
+        self.playouts = playouts
+        self.move_time_ms = move_time_ms
+        self.exploration = exploration
+        self.max_nodes = max_nodes  # Leaves are only rolled out, not expanded, past this size
+        self.reuse_tree = reuse_tree
+        self.verbose = verbose
+        # Where each move's SearchStats go, as for the minimax agents; verbose prints the summary line
+        self.sink = sink if sink is not None else (PrintSink() if verbose else None)
+        self.last_stats = None
+        self.rng = random.Random(seed)
+        self.nodes_evaluated = 0  # Playouts run for the last move
+        self.reused_nodes = 0
+        self._geometry = None
+        self._reset_tree()
         
-        # Scoring for different combinations
-        if player_count == 4:
-            return 100  # Winning window
-        elif player_count == 3 and empty_count == 1:
-            return 5  # Potential win
-        elif player_count == 2 and empty_count == 2:
-            return 2  # Building up
-        elif opponent_count == 3 and empty_count == 1:
-            return -4  # Block opponent's potential win
-            
-        return 0
+    def _reset_tree(self):
+        self.parent = array('i')
+        self.move = array('b')
+        self.first_child = array('i')
+        self.num_children = array('b')  # -1 until the node is expanded
+        self.terminal = array('b')  # 0 open, 1 won by the move into the node, 2 draw
+        self.visits = array('i')
+        self.wins = array('d')  # Reward for the player who moved into the node
+        self._add_node(-1, -1, 0)
+        self._last_root = None
+        
+    def _add_node(self, parent, move, terminal):
+        self.parent.append(parent)
+        self.move.append(move)
+        self.first_child.append(-1)
+        self.num_children.append(-1)
+        self.terminal.append(terminal)
+        self.visits.append(0)
+        self.wins.append(0.0)
+        
+    def _set_geometry(self, game):
+        if game.n != 4:
+            raise ValueError("MCTS rollouts only detect four in a row")
+        stride = game.rows + 1
+        self._geometry = {
+            'stride': stride,
+            'cells': game.rows * game.cols,
+            'bottom': [1 << (col * stride) for col in range(game.cols)],
+            'top': [1 << (col * stride + game.rows - 1) for col in range(game.cols)],
+            'order': center_out_order(game.cols)
+        }
+        
+    def get_move(self, game):
+        start_time = time.time()
+        if self._geometry is None:
+            self._set_geometry(game)
+        position = game.bitboards[game.current_player]
+        mask = game.mask
+        self.reused_nodes = self._advance_root(position, mask) if self.reuse_tree else 0
+        if not self.reuse_tree:
+            self._reset_tree()
+        
+        deadline = start_time + self.move_time_ms / 1000 if self.move_time_ms is not None else None
+        playouts = 0
+        while self.playouts is None or playouts < self.playouts:
+            self._playout(position, mask)
+            playouts += 1
+            if deadline is not None and playouts % self.TIME_CHECK_INTERVAL == 0 and time.time() >= deadline:
+                break
+        self.nodes_evaluated = playouts
+        
+        # The most visited child is the most robust choice
+        first = self.first_child[0]
+        best = max(range(first, first + self.num_children[0]), key=lambda child: self.visits[child])
+        best_move = self.move[best]
+        self._last_root = (position, mask, best_move)
+        
+        self._report(best_move, self.wins[best] / max(self.visits[best], 1), start_time)
+        return best_move
+    
+    def _report(self, move, win_rate, start_time):
+        """Send the move's SearchStats to the sink; the score is the chosen child's win rate."""
+        if self.sink is None:
+            return
+        stats = SearchStats(type(self).__name__, self.player_symbol, 'mcts')
+        stats.move = move
+        stats.score = win_rate
+        stats.nodes = self.nodes_evaluated
+        stats.seconds = time.time() - start_time
+        stats.details.extend([f"tree {len(self.visits)} nodes", f"{self.reused_nodes} reused",
+                              f"win rate {win_rate:.1%}"])
+        self.last_stats = stats
+        self.sink.emit(stats)
+    
+    def _advance_root(self, position, mask):
+        """Re-root the tree at the current position; returns the nodes kept.
+        
+        The new position must be the old root plus our move plus one
+        opponent move, otherwise the tree is rebuilt from scratch.
+        """
+        if self._last_root is None:
+            self._reset_tree()
+            return 0
+        
+        old_position, old_mask, our_move = self._last_root
+        stride = self._geometry['stride']
+        bottom = self._geometry['bottom']
+        # Replay our move and find the opponent's from the new mask
+        our_bit = (old_mask + bottom[our_move]) & ~old_mask
+        after_mask = old_mask | our_bit
+        opponent_bit = mask ^ after_mask
+        if mask & after_mask != after_mask or opponent_bit & (opponent_bit - 1) or not opponent_bit:
+            self._reset_tree()
+            return 0
+        if position != (old_position | our_bit):
+            self._reset_tree()
+            return 0
+        
+        node = 0
+        for move in (our_move, (opponent_bit.bit_length() - 1) // stride):
+            child = self._find_child(node, move)
+            if child is None:
+                self._reset_tree()
+                return 0
+            node = child
+        self._compact(node)
+        return len(self.visits)
+    
+    def _find_child(self, node, move):
+        first = self.first_child[node]
+        for child in range(first, first + max(self.num_children[node], 0)):
+            if self.move[child] == move:
+                return child
+        return None
+    
+    def _compact(self, new_root):
+        """Copy the subtree under new_root into fresh arrays, root first."""
+        old = (self.move, self.first_child, self.num_children, self.terminal, self.visits, self.wins)
+        self._reset_tree()
+        self.move[0] = old[0][new_root]
+        self.terminal[0] = old[3][new_root]
+        self.visits[0] = old[4][new_root]
+        self.wins[0] = old[5][new_root]
+        
+        # Breadth-first, so each node's children stay contiguous
+        queue = [new_root]
+        index = 0
+        while index < len(queue):
+            node = queue[index]
+            count = old[2][node]
+            self.num_children[index] = count
+            if count > 0:
+                self.first_child[index] = len(queue)
+                for child in range(old[1][node], old[1][node] + count):
+                    queue.append(child)
+                    self._add_node(index, old[0][child], old[3][child])
+                    self.visits[-1] = old[4][child]
+                    self.wins[-1] = old[5][child]
+            index += 1
+    
+    def _expand(self, node, position, mask):
+        geometry = self._geometry
+        stride = geometry['stride']
+        filled = bin(mask).count('1') + 1
+        self.first_child[node] = len(self.visits)
+        count = 0
+        for col in geometry['order']:
+            if mask & geometry['top'][col]:
+                continue
+            bit = (mask + geometry['bottom'][col]) & ~mask
+            if _has_four(position | bit, stride):
+                terminal = 1
+            elif filled == geometry['cells']:
+                terminal = 2
+            else:
+                terminal = 0
+            self._add_node(node, col, terminal)
+            count += 1
+        self.num_children[node] = count
+    
+    def _select_child(self, node):
+        first = self.first_child[node]
+        log_visits = math.log(max(self.visits[node], 1))
+        best = None
+        best_value = -1.0
+        for child in range(first, first + self.num_children[node]):
+            visits = self.visits[child]
+            if visits == 0:
+                return child
+            value = self.wins[child] / visits + self.exploration * math.sqrt(log_visits / visits)
+            if value > best_value:
+                best_value = value
+                best = child
+        return best
+    
+    def _playout(self, position, mask):
+        geometry = self._geometry
+        bottom = geometry['bottom']
+        node = 0
+        path = [0]
+        
+        # Selection and expansion
+        while not self.terminal[node]:
+            if self.num_children[node] < 0:
+                if len(self.visits) + len(bottom) > self.max_nodes:
+                    break
+                self._expand(node, position, mask)
+                node = self._select_child(node)
+                path.append(node)
+                bit = (mask + bottom[self.move[node]]) & ~mask
+                position, mask = position ^ mask, mask | bit
+                break
+            node = self._select_child(node)
+            path.append(node)
+            bit = (mask + bottom[self.move[node]]) & ~mask
+            position, mask = position ^ mask, mask | bit
+        
+        if self.terminal[node] == 1:
+            reward = 1.0
+        elif self.terminal[node] == 2:
+            reward = 0.5
+        else:
+            reward = self._rollout(position, mask)
+        
+        # Rewards alternate perspective on the way up
+        for node in reversed(path):
+            self.visits[node] += 1
+            self.wins[node] += reward
+            reward = 1.0 - reward
+    
+    def _rollout(self, position, mask):
+        """Play random moves to the end; reward for the player who moved last before it."""
+        geometry = self._geometry
+        bottom = geometry['bottom']
+        top = geometry['top']
+        stride = geometry['stride']
+        columns = range(len(bottom))
+        choice = self.rng.choice
+        mover_is_leaf_side = True
+        while True:
+            moves = [col for col in columns if not mask & top[col]]
+            if not moves:
+                return 0.5
+            bit = (mask + bottom[choice(moves)]) & ~mask
+            if _has_four(position | bit, stride):
+                # The side to move at the leaf won
+                return 0.0 if mover_is_leaf_side else 1.0
+            position, mask = position ^ mask, mask | bit
+            mover_is_leaf_side = not mover_is_leaf_side
 
 
-def run_connect4_experiment(time_limit_seconds=1800):  # 30 minutes
-    """Run experiment to compare full minimax vs depth-limited minimax for Connect4."""
+def run_connect4_experiment(time_limit_seconds=1800, seed=0, sink=None, verbose=False):  # 30 minutes
+    """Run experiment to compare full minimax vs depth-limited minimax for Connect4.
+    
+    The random opponent is seeded the same way for every configuration, so
+    the move-ordering runs can be compared with the plain ones. Per-move
+    stats go to `sink` (see agents/metrics.py); verbose also prints a line
+    per move.
+    """
     print("Connect4 Minimax Performance Experiment")
     print("=======================================")
     
@@ -204,22 +539,26 @@ def run_connect4_experiment(time_limit_seconds=1800):  # 30 minutes
     results = {}
     
     # Test with alpha-beta pruning
-    for test_name, use_pruning, max_depth in [
-        ("Full Minimax with Alpha-Beta Pruning", True, None),
-        ("Full Minimax without Pruning", False, None),
-        ("Depth-Limited (5) with Alpha-Beta Pruning", True, 5),
-        ("Depth-Limited (5) without Pruning", False, 5)
+    for test_name, use_pruning, max_depth, move_ordering in [
+        ("Full Minimax with Alpha-Beta Pruning", True, None, False),
+        ("Full Minimax without Pruning", False, None, False),
+        ("Depth-Limited (5) with Alpha-Beta Pruning", True, 5, False),
+        ("Depth-Limited (5) without Pruning", False, 5, False),
+        ("Depth-Limited (5) with Alpha-Beta Pruning and Move Ordering", True, 5, True)
     ]:
         print(f"\nRunning {test_name}...")
         print(f"{'=' * len(test_name)}")
         
         game = Connect4()
-        agent = Connect4MinimaxAgent('X', use_alpha_beta=use_pruning, max_depth=max_depth)
+        agent = Connect4MinimaxAgent('X', use_alpha_beta=use_pruning, max_depth=max_depth, move_ordering=move_ordering,
+                                     verbose=False, sink=sink)
+        opponent_rng = random.Random(seed)
         
         start_time = time.time()
         elapsed_time = 0
         moves_made = 0
         total_nodes = 0
+        branching_factors = []
         
         try:
             while not game.game_over and elapsed_time < time_limit_seconds:
@@ -228,16 +567,19 @@ def run_connect4_experiment(time_limit_seconds=1800):  # 30 minutes
                 
                 if not game.game_over:
                     # Other player makes a random move
-                    opponent_move = random.choice(game.get_valid_moves())
+                    opponent_move = opponent_rng.choice(game.get_valid_moves())
                     game.drop_piece(opponent_move)
                 
                 moves_made += 1
                 total_nodes += agent.nodes_evaluated
+                branching_factors.append(agent.effective_branching_factor)
                 elapsed_time = time.time() - start_time
                 
-                print(f"Move {moves_made}: Evaluated {agent.nodes_evaluated} nodes")
-                print(f"Total time: {elapsed_time:.2f} seconds, Total nodes: {total_nodes}")
-                print()
+                if verbose:
+                    print(f"Move {moves_made}: Evaluated {agent.nodes_evaluated} nodes "
+                          f"(effective branching factor {agent.effective_branching_factor:.2f})")
+                    print(f"Total time: {elapsed_time:.2f} seconds, Total nodes: {total_nodes}")
+                    print()
         
         except KeyboardInterrupt:
             print("Experiment stopped by user")
@@ -249,12 +591,15 @@ def run_connect4_experiment(time_limit_seconds=1800):  # 30 minutes
         print(f"Moves made: {moves_made} (max possible: 42)")
         print(f"Total nodes evaluated: {total_nodes}")
         print(f"Nodes per second: {total_nodes / total_time:.2f}")
+        average_branching = sum(branching_factors) / len(branching_factors) if branching_factors else 0.0
+        print(f"Average effective branching factor: {average_branching:.2f}")
         
         results[test_name] = {
             "moves_made": moves_made,
             "total_nodes": total_nodes,
             "total_time": total_time,
-            "nodes_per_second": total_nodes / total_time
+            "nodes_per_second": total_nodes / total_time,
+            "effective_branching_factor": average_branching
         }
     
     # Print comparative results
@@ -266,6 +611,7 @@ def run_connect4_experiment(time_limit_seconds=1800):  # 30 minutes
         print(f"  Total nodes: {data['total_nodes']}")
         print(f"  Total time: {data['total_time']:.2f} seconds")
         print(f"  Nodes per second: {data['nodes_per_second']:.2f}")
+        print(f"  Effective branching factor: {data['effective_branching_factor']:.2f}")
     
     # Print conclusions
     print("\nConclusions:")
@@ -278,6 +624,16 @@ def run_connect4_experiment(time_limit_seconds=1800):  # 30 minutes
         depth_limited_moves = results["Depth-Limited (5) with Alpha-Beta Pruning"]["moves_made"]
         full_minimax_moves = results["Full Minimax with Alpha-Beta Pruning"]["moves_made"]
         print(f"Full minimax completed {full_minimax_moves} moves vs {depth_limited_moves} for depth-limited")
+    
+    ordered_name = "Depth-Limited (5) with Alpha-Beta Pruning and Move Ordering"
+    if "Depth-Limited (5) with Alpha-Beta Pruning" in results and ordered_name in results:
+        plain = results["Depth-Limited (5) with Alpha-Beta Pruning"]
+        ordered = results[ordered_name]
+        plain_per_move = plain["total_nodes"] / max(plain["moves_made"], 1)
+        ordered_per_move = ordered["total_nodes"] / max(ordered["moves_made"], 1)
+        print(f"Move ordering: {plain_per_move:.0f} -> {ordered_per_move:.0f} nodes per move, "
+              f"effective branching factor {plain['effective_branching_factor']:.2f} -> "
+              f"{ordered['effective_branching_factor']:.2f}")
         
     print("\nRecommendation: Use depth-limited minimax with alpha-beta pruning for Connect4")
 
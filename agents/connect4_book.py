@@ -0,0 +1,136 @@
+import sys
+import os
+import mmap
+import struct
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from games.connect4 import Connect4
+
+# File layout: header (magic, record count), then records sorted by key
+BOOK_MAGIC = b'C4BK'
+HEADER = struct.Struct('<4sI')
+# Canonical position key, best move in the canonical position, score for the side to move
+RECORD = struct.Struct('<Qbxh')
+
+class OpeningBook:
+    """Read-only opening book, memory-mapped and binary searched.
+
+    Every process that opens the same file shares its pages through the
+    OS page cache, so a book costs no per-worker memory.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.size = HEADER.unpack_from(self._map, 0)
+        if magic != BOOK_MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a Connect 4 opening book")
+
+    def _key_at(self, index):
+        return struct.unpack_from('<Q', self._map, HEADER.size + index * RECORD.size)[0]
+
+    def lookup(self, key):
+        """Return (move, score) stored for a position hash, or None."""
+        low, high = 0, self.size
+        while low < high:
+            middle = (low + high) // 2
+            if self._key_at(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.size:
+            stored_key, move, score = RECORD.unpack_from(self._map, HEADER.size + low * RECORD.size)
+            if stored_key == key:
+                return move, score
+        return None
+
+    def probe(self, game):
+        """Return (move, score) for `game`, looked up under its canonical key."""
+        key, symmetry = game.canonical()
+        entry = self.lookup(key)
+        if entry is None:
+            return None
+        move, score = entry
+        return game.from_canonical_move(move, symmetry), score
+
+    def __len__(self):
+        return self.size
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+
+def write_book(path, entries):
+    """Write {key: (move, score)} as a sorted book file."""
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(BOOK_MAGIC, len(entries)))
+        for key in sorted(entries):
+            move, score = entries[key]
+            score = max(-32768, min(32767, int(score)))
+            f.write(RECORD.pack(key, move, score))
+
+def enumerate_positions(max_ply):
+    """Move sequences reaching every unfinished position up to max_ply plies, one per mirror pair."""
+    positions = {}
+    frontier = [[]]
+    game = Connect4()
+    for ply in range(max_ply + 1):
+        next_frontier = []
+        for moves in frontier:
+            for move in moves:
+                game.drop_piece(move)
+            key = game.canonical()[0]
+            if not game.game_over and key not in positions:
+                positions[key] = moves
+                if ply < max_ply:
+                    next_frontier.extend(moves + [col] for col in game.get_valid_moves())
+            for move in reversed(moves):
+                game.undo_move(move)
+        frontier = next_frontier
+    return positions
+
+def _analyze_position(moves, depth, tt_size_mb):
+    from agents.connect4_agents import Connect4MinimaxAgent
+
+    game = Connect4()
+    for move in moves:
+        game.drop_piece(move)
+    agent = Connect4MinimaxAgent(game.current_player, use_alpha_beta=True, max_depth=depth,
+                                 tt_size_mb=tt_size_mb, move_ordering=True, verbose=False)
+    move = agent.get_move(game)
+    key, symmetry = game.canonical()
+    return key, game.to_canonical_move(move, symmetry), agent.best_score
+
+def build_book(path, max_ply=4, depth=7, workers=None, tt_size_mb=16):
+    """Deep-search every position up to max_ply plies and write the book to path."""
+    positions = enumerate_positions(max_ply)
+    print(f"Searching {len(positions)} positions up to ply {max_ply} at depth {depth}...")
+    start = time.time()
+    entries = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_analyze_position, moves, depth, tt_size_mb) for moves in positions.values()]
+        for done, future in enumerate(futures, 1):
+            key, move, score = future.result()
+            entries[key] = (move, score)
+            if done % 100 == 0:
+                print(f"  {done}/{len(futures)} positions ({time.time() - start:.1f}s)")
+
+    write_book(path, entries)
+    print(f"Wrote {len(entries)} positions to {path} in {time.time() - start:.1f}s")
+    return len(entries)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Build a Connect 4 opening book')
+    parser.add_argument('path', help='Output book file')
+    parser.add_argument('--ply', type=int, default=4, help='Include positions up to this many plies')
+    parser.add_argument('--depth', type=int, default=7, help='Search depth used for every position')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes')
+    args = parser.parse_args()
+    build_book(args.path, max_ply=args.ply, depth=args.depth, workers=args.workers)
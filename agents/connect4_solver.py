@@ -0,0 +1,243 @@
+import sys
+import os
+import random
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from games.connect4 import Connect4
+from agents.connect4_threats import ThreatAnalyzer
+from agents.move_ordering import center_out_order
+from agents.search import SearchTimeout
+
+WIN = 1
+DRAW = 0
+LOSS = -1
+
+class EndgameSolver:
+    """Exact win/draw/loss solver for four in a row, meant for the last few empty cells.
+
+    Positions are a pair of integers, the stones of the side to move and
+    the occupancy mask, so making a move is two integer operations and
+    nothing has to be taken back. Every node only plays non-losing moves
+    (see ThreatAnalyzer.non_losing_moves), ordered by how many threats
+    they create and then center first, and is searched with a null window
+    since the only scores are WIN, DRAW and LOSS. Bounds are kept in a
+    table keyed by ``position + mask`` (unique per position), which
+    survives between calls because solved values do not depend on the root.
+    """
+    # How many nodes to search between checks of `stop`
+    STOP_CHECK_INTERVAL = 4096
+
+    def __init__(self, rows=6, cols=7, max_entries=1000000):
+        self.analyzer = ThreatAnalyzer(rows, cols)
+        self.rows = rows
+        self.cols = cols
+        self.cells = rows * cols
+        self.stride = rows + 1
+        self.bottom = self.analyzer.bottom
+        self.board_mask = self.analyzer.board_mask
+        self.column_masks = [((1 << rows) - 1) << (col * self.stride) for col in center_out_order(cols)]
+        self.max_entries = max_entries
+        # position + mask -> (lower bound, upper bound)
+        self.table = {}
+        self.nodes = 0
+        self.stop = None
+
+    def solve(self, game, stop=None):
+        """(move, result) for the side to move: a move keeping the best result WIN, DRAW or LOSS.
+
+        `stop` is called every STOP_CHECK_INTERVAL nodes and a true result
+        raises SearchTimeout. In a lost position the move avoids losing on
+        the next ply when it can.
+        """
+        if game.n != 4 or (game.rows, game.cols) != (self.rows, self.cols):
+            raise ValueError(f"The solver is built for four in a row on a {self.rows}x{self.cols} board")
+        self.nodes = 0
+        self.stop = stop
+        if len(self.table) > self.max_entries:
+            self.table.clear()
+
+        position = game.bitboards[game.current_player]
+        mask = game.mask
+        threat_cells = self.analyzer.threat_cells
+        possible = (mask + self.bottom) & self.board_mask
+        wins = threat_cells(position, mask) & possible
+        if wins:
+            return self._column(wins), WIN
+
+        opponent_threats = threat_cells(position ^ mask, mask)
+        moves = self._non_losing(possible, opponent_threats)
+        if not moves:
+            # Block one threat if there is one; the opponent wins with the other
+            forced = possible & opponent_threats
+            return self._column(forced or self._ordered(position, mask, possible)[0]), LOSS
+
+        best_move = None
+        result = LOSS
+        for move in self._ordered(position, mask, moves):
+            if best_move is None:
+                best_move = move
+            # Null windows: does this move do better than the best result so far?
+            while result < WIN:
+                score = -self._search(position ^ mask, mask | move, -result - 1, -result)
+                if score <= result:
+                    break
+                result = score
+                best_move = move
+            if result == WIN:
+                break
+        return self._column(best_move), result
+
+    def _search(self, position, mask, alpha, beta):
+        """Fail-soft score for the side to move, who cannot win on this move."""
+        self.nodes += 1
+        if self.stop is not None and self.nodes % self.STOP_CHECK_INTERVAL == 0 and self.stop():
+            raise SearchTimeout()
+
+        # The move into this node filled the board without winning
+        if mask == self.board_mask:
+            return DRAW
+        possible = (mask + self.bottom) & self.board_mask
+        opponent_threats = self.analyzer.threat_cells(position ^ mask, mask)
+        moves = self._non_losing(possible, opponent_threats)
+        if not moves:
+            return LOSS
+        # Neither side can win on the last two cells once the mover has a safe move
+        if mask.bit_count() >= self.cells - 2:
+            return DRAW
+
+        key = position + mask
+        lower, upper = self.table.get(key, (LOSS, WIN))
+        if lower >= beta:
+            return lower
+        if upper <= alpha:
+            return upper
+        alpha = max(alpha, lower)
+        beta = min(beta, upper)
+        if alpha >= beta:
+            return alpha
+        alpha_orig = alpha
+
+        best = LOSS
+        for move in self._ordered(position, mask, moves):
+            score = -self._search(position ^ mask, mask | move, -beta, -alpha)
+            if score > best:
+                best = score
+                if score >= beta:
+                    break
+                alpha = max(alpha, score)
+
+        if best >= beta:
+            lower = max(lower, best)
+        elif best <= alpha_orig:
+            upper = min(upper, best)
+        else:
+            lower = upper = best
+        self.table[key] = (lower, upper)
+        return best
+
+    def _non_losing(self, possible, opponent_threats):
+        """Moves (as bits) that do not let the opponent win on the next ply."""
+        forced = possible & opponent_threats
+        if forced:
+            if forced & (forced - 1):
+                return 0
+            possible = forced
+        return possible & ~(opponent_threats >> 1)
+
+    def _ordered(self, position, mask, moves):
+        """The bits of `moves`, most threats created first and center first among equals."""
+        threat_cells = self.analyzer.threat_cells
+        scored = []
+        for order, column in enumerate(self.column_masks):
+            move = moves & column
+            if move:
+                scored.append((-threat_cells(position | move, mask | move).bit_count(), order, move))
+        scored.sort()
+        return [move for _, _, move in scored]
+
+    def _column(self, move):
+        return (move.bit_length() - 1) // self.stride
+
+    def describe(self):
+        return f"solver table {len(self.table)} positions"
+
+
+def _exhaustive_result(game):
+    """WIN, DRAW or LOSS for the side to move, by plain negamax over every line."""
+    best = LOSS
+    for move in game.get_valid_moves():
+        game.make(move)
+        if game.winner is not None:
+            result = WIN
+        elif game.game_over:
+            result = DRAW
+        else:
+            result = -_exhaustive_result(game)
+        game.unmake(move)
+        best = max(best, result)
+        if best == WIN:
+            break
+    return best
+
+def check_endgame_solver(num_positions=200, max_empty_cells=3, seed=0):
+    """Compare solve() with exhaustive negamax on random positions with 1 to `max_empty_cells` empty cells.
+
+    Both the reported result and the result of the returned move must
+    match. Raises AssertionError on the first mismatch.
+    """
+    rng = random.Random(seed)
+    solver = EndgameSolver()
+    checked = 0
+    while checked < num_positions:
+        empty_cells = 1 + checked % max_empty_cells
+        game = Connect4()
+        while not game.game_over and game.max_moves - game.move_count > empty_cells:
+            game.drop_piece(rng.choice(game.get_valid_moves()))
+        if game.game_over:
+            continue
+        expected = _exhaustive_result(game)
+        move, result = solver.solve(game)
+        game.make(move)
+        played = WIN if game.winner is not None else DRAW if game.game_over else -_exhaustive_result(game)
+        game.unmake(move)
+        if result != expected or played != expected:
+            raise AssertionError(f"Solver gave {result} with move {move} (worth {played}), expected {expected}, "
+                                 f"in {game.get_state()}")
+        checked += 1
+    print(f"Endgame solver matched exhaustive search on {checked} positions with 1-{max_empty_cells} empty cells")
+    return checked
+
+def compare_endgame_solver(empty_cells=14, num_positions=8, seed=0):
+    """Nodes and time for the solver and for a full minimax search on random positions with few empty cells."""
+    from agents.connect4_agents import Connect4MinimaxAgent
+
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < num_positions:
+        game = Connect4()
+        while not game.game_over and game.max_moves - game.move_count > empty_cells:
+            game.drop_piece(rng.choice(game.get_valid_moves()))
+        if not game.game_over:
+            positions.append(game.get_state())
+
+    results = {}
+    for name, endgame_cells in (('full minimax', 0), ('endgame solver', empty_cells)):
+        nodes = 0
+        start = time.perf_counter()
+        for state in positions:
+            game = Connect4()
+            game.set_state(state)
+            agent = Connect4MinimaxAgent(game.current_player, tt_size_mb=16, move_ordering=True, verbose=False,
+                                         endgame_cells=endgame_cells)
+            agent.get_move(game)
+            nodes += agent.nodes_evaluated
+        elapsed = time.perf_counter() - start
+        results[name] = (nodes, elapsed)
+        print(f"{name}: {nodes} nodes, {elapsed:.2f}s over {num_positions} positions with {empty_cells} empty cells")
+    return results
+
+
+if __name__ == "__main__":
+    check_endgame_solver()
+    compare_endgame_solver()
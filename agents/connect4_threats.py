@@ -0,0 +1,190 @@
+import sys
+import os
+import random
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from games.connect4 import Connect4, board_tables
+
+class ThreatAnalyzer:
+    """Threat-space analysis on Connect4 bitboards.
+
+    A threat is an empty cell that would complete four in a row for one
+    side. Threat sets are bitboards in the Connect4 layout (bit
+    ``col * (rows + 1) + height``), so "the cell above" is one bit up and
+    "playable" means the next free cell of its column.
+
+    Parity follows the usual Connect 4 rule: when the board fills up, the
+    first player gets the odd rows (heights 0, 2, 4) and the second player
+    the even ones, so a threat on its owner's parity is worth more.
+    """
+
+    def __init__(self, rows=6, cols=7):
+        self.rows = rows
+        self.cols = cols
+        stride = rows + 1
+        self.stride = stride
+        self.bottom = sum(1 << (col * stride) for col in range(cols))
+        self.board_mask = self.bottom * ((1 << rows) - 1)
+        # Heights 0, 2, 4... counted from the bottom row
+        self.odd_rows = sum(1 << (col * stride + height) for col in range(cols) for height in range(0, rows, 2))
+        # The game's own window tables, so these scores stay in step with Connect4.evaluate
+        _, self.window_masks, _, self.window_scores, self.center_mask = board_tables(rows, cols, 4)
+
+    def threat_cells(self, bitboard, mask):
+        """Bitboard of the empty cells that would give `bitboard` four in a row."""
+        # Vertical: three stacked stones and the cell on top
+        threats = (bitboard << 1) & (bitboard << 2) & (bitboard << 3)
+        for shift in (self.stride, self.stride - 1, self.stride + 1):
+            pair = (bitboard << shift) & (bitboard << 2 * shift)
+            threats |= pair & (bitboard << 3 * shift)  # xxx.
+            threats |= pair & (bitboard >> shift)  # xx.x
+            pair = (bitboard >> shift) & (bitboard >> 2 * shift)
+            threats |= pair & (bitboard >> 3 * shift)  # .xxx
+            threats |= pair & (bitboard << shift)  # x.xx
+        return threats & (self.board_mask ^ mask)
+
+    def playable(self, mask):
+        """Bitboard of the next free cell of every column that is not full."""
+        return (mask + self.bottom) & self.board_mask
+
+    def cells(self, threats):
+        """(col, row) of every cell in a threat bitboard, row 0 at the top like Connect4.board."""
+        found = []
+        while threats:
+            bit = threats & -threats
+            index = bit.bit_length() - 1
+            col, height = divmod(index, self.stride)
+            found.append((col, self.rows - 1 - height))
+            threats ^= bit
+        return found
+
+    def threats(self, game, symbol):
+        """Every open threat of `symbol` as (col, row) cells."""
+        return self.cells(self.threat_cells(game.bitboards[symbol], game.mask))
+
+    def _columns(self, moves):
+        return [col for col in range(self.cols) if moves >> (col * self.stride) & ((1 << self.rows) - 1)]
+
+    def winning_moves(self, game, symbol):
+        """Columns where `symbol` wins on the spot."""
+        return self._columns(self.threat_cells(game.bitboards[symbol], game.mask) & self.playable(game.mask))
+
+    def non_losing_moves(self, game):
+        """Columns the side to move can play without losing on the opponent's reply.
+
+        An opponent threat that is playable must be blocked (two of them
+        cannot both be), and a column whose next cell sits right under an
+        opponent threat hands them that cell. Returns [] when every move
+        loses that way.
+        """
+        opponent = 'O' if game.current_player == 'X' else 'X'
+        opponent_threats = self.threat_cells(game.bitboards[opponent], game.mask)
+        possible = self.playable(game.mask)
+        forced = possible & opponent_threats
+        if forced:
+            if forced & (forced - 1):
+                return []
+            possible = forced
+        return self._columns(possible & ~(opponent_threats >> 1))
+
+    def analyze(self, game):
+        """Classify the position for the side to move.
+
+        Returns (status, moves): ('win', [winning column]) when it can win
+        at once, ('loss', []) when every move lets the opponent win next,
+        and otherwise ('open', non-losing columns).
+        """
+        wins = self.winning_moves(game, game.current_player)
+        if wins:
+            return 'win', wins[:1]
+        moves = self.non_losing_moves(game)
+        if not moves:
+            return 'loss', []
+        return 'open', moves
+
+    def evaluate(self, game, player_symbol):
+        """Window scores as in evaluate_window, plus threat terms.
+
+        Each open threat is worth 4 to its owner, doubled on the owner's
+        parity. A threat stacked directly on top of another threat of the
+        same side cannot be stopped and is worth 20. If the side to move
+        already has a playable threat it will win next turn, worth 50.
+        """
+        opponent_symbol = 'O' if player_symbol == 'X' else 'X'
+        player = game.bitboards[player_symbol]
+        opponent = game.bitboards[opponent_symbol]
+        mask = game.mask
+
+        scores = self.window_scores
+        score = 0
+        for window in self.window_masks:
+            score += scores[(player & window).bit_count()][(opponent & window).bit_count()]
+        score += (player & self.center_mask).bit_count() * 3
+
+        player_threats = self.threat_cells(player, mask)
+        opponent_threats = self.threat_cells(opponent, mask)
+        playable = self.playable(mask)
+        mover_threats = player_threats if game.current_player == player_symbol else opponent_threats
+        if mover_threats & playable:
+            return score + 50 if game.current_player == player_symbol else score - 50
+
+        player_parity = self.odd_rows if player_symbol == 'X' else self.board_mask ^ self.odd_rows
+        score += 4 * player_threats.bit_count() + 4 * (player_threats & player_parity).bit_count()
+        score -= 4 * opponent_threats.bit_count() + 4 * (opponent_threats & ~player_parity).bit_count()
+        score += 20 * (player_threats & (player_threats >> 1)).bit_count()
+        score -= 20 * (opponent_threats & (opponent_threats >> 1)).bit_count()
+        return score
+
+
+class ThreatEvaluator:
+    """evaluate_board replacement for Connect4MinimaxAgent built on ThreatAnalyzer."""
+
+    def __init__(self, player_symbol, rows=6, cols=7):
+        self.player_symbol = player_symbol
+        self.analyzer = ThreatAnalyzer(rows, cols)
+
+    def evaluate_board(self, game):
+        return self.analyzer.evaluate(game, self.player_symbol)
+
+
+def compare_threat_search(depth=5, num_positions=10, seed=0):
+    """Nodes and time to pick a move with and without threat analysis."""
+    from agents.connect4_agents import Connect4MinimaxAgent
+
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < num_positions:
+        game = Connect4()
+        for _ in range(rng.randint(4, 16)):
+            moves = game.get_valid_moves()
+            if not moves:
+                break
+            game.drop_piece(rng.choice(moves))
+        if not game.game_over:
+            positions.append(game.get_state())
+
+    configs = [
+        ('plain', {}),
+        ('threat pruning', {'threat_analysis': True}),
+        ('threat pruning + threat eval', {'threat_analysis': True, 'evaluator': 'threats'})
+    ]
+    results = {}
+    for name, options in configs:
+        nodes = 0
+        start = time.perf_counter()
+        for state in positions:
+            game = Connect4()
+            game.set_state(state)
+            agent = Connect4MinimaxAgent(game.current_player, max_depth=depth, move_ordering=True, verbose=False,
+                                         **options)
+            agent.get_move(game)
+            nodes += agent.nodes_evaluated
+        elapsed = time.perf_counter() - start
+        results[name] = (nodes, elapsed)
+        print(f"{name}: {nodes} nodes, {elapsed:.2f}s over {num_positions} positions at depth {depth}")
+    return results
+
+
+if __name__ == "__main__":
+    compare_threat_search()
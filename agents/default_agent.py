@@ -28,30 +28,9 @@ class DefaultAgent:
         
     def _find_critical_move(self, game, player_symbol):
         """Find a move that would result in a win for the given player symbol."""
-        valid_moves = game.get_valid_moves()
-        original_state = game.get_state()
-        
-        for move in valid_moves:
-            # Save current game state
-            current_player = game.current_player
-            
-            # Temporarily set current player to the player we're checking for
-            game.current_player = player_symbol
-            
-            # Try the move
-            if hasattr(game, 'make_move'):  # For TicTacToe
-                row, col = move
-                game.make_move(row, col)
-            else:  # For Connect4
-                game.drop_piece(move)
-            
-            # Check if this move would result in a win
-            if game.winner == player_symbol:
-                # Restore game state
-                game.set_state(original_state)
+        for move in game.get_valid_moves():
+            # would_win only looks at the lines through the move and leaves the game untouched
+            if game.would_win(move, player_symbol):
                 return move
-            
-            # Restore game state for next iteration
-            game.set_state(original_state)
-        
-        return None 
\ No newline at end of file
+
+        return None
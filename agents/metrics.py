@@ -0,0 +1,179 @@
+import sys
+import os
+import json
+import logging
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+class SearchStats:
+    """What one get_move call did: the move, where it came from and what the search cost.
+
+    ``source`` is ``'search'``, ``'solver'`` for the endgame solver, ``'mcts'``
+    for Monte Carlo tree search (nodes are playouts, the score a win rate), or
+    ``'book'``, ``'cache'`` or ``'ponder'`` for moves answered without
+    searching. ``cutoffs_by_ply[d]`` counts
+    beta cutoffs at ply d below the root's children, and ``depth_times``
+    holds (depth limit, seconds, nodes) for every finished iteration.
+    ``details`` are the one-line descriptions of the TT and position cache
+    used by the printed summary.
+    """
+
+    def __init__(self, agent, player, source='search'):
+        self.agent = agent
+        self.player = player
+        self.source = source
+        self.move = None
+        self.score = None
+        self.nodes = 0
+        self.seconds = 0.0
+        self.completed_depth = None
+        self.timed = False
+        self.branching_factor = 0.0
+        self.cutoffs_by_ply = []
+        self.depth_times = []
+        self.tt = None
+        self.cache = None
+        self.details = []
+
+    def to_dict(self):
+        return {
+            'agent': self.agent,
+            'player': self.player,
+            'source': self.source,
+            'move': self.move,
+            'score': self.score,
+            'nodes': self.nodes,
+            'seconds': self.seconds,
+            'completed_depth': self.completed_depth,
+            'branching_factor': self.branching_factor,
+            'cutoffs_by_ply': self.cutoffs_by_ply,
+            'depth_times': self.depth_times,
+            'tt': self.tt,
+            'cache': self.cache
+        }
+
+    def summary(self):
+        """The line agents used to print after every move."""
+        if self.source == 'book':
+            return f"Minimax agent played {self.move} from the opening book"
+        if self.source == 'solver':
+            return (f"Minimax agent solved the endgame in {self.nodes} nodes and {self.seconds:.2f} seconds "
+                    f"({', '.join(self.details)})")
+        if self.source == 'mcts':
+            return f"MCTS agent ran {self.nodes} playouts in {self.seconds:.2f} seconds ({', '.join(self.details)})"
+        if self.source in ('cache', 'ponder'):
+            origin = 'the position cache' if self.source == 'cache' else 'pondering'
+            return f"Minimax agent played {self.move} from {origin} ({', '.join(self.details)})"
+        summary = f"Minimax agent evaluated {self.nodes} nodes in {self.seconds:.2f} seconds"
+        if self.timed:
+            summary += f" (completed depth {self.completed_depth})"
+        for detail in self.details:
+            summary += f" ({detail})"
+        return summary
+
+
+class PrintSink:
+    """Prints each move's summary line, like the agents always did."""
+
+    def emit(self, stats):
+        print(stats.summary())
+
+
+class LoggingSink:
+    """Logs each move's summary line, with the full stats in the record's ``search_stats``."""
+
+    def __init__(self, logger=None, level=logging.INFO):
+        self.logger = logger or logging.getLogger('search')
+        self.level = level
+
+    def emit(self, stats):
+        if self.logger.isEnabledFor(self.level):
+            self.logger.log(self.level, stats.summary(), extra={'search_stats': stats.to_dict()})
+
+
+class JsonLinesSink:
+    """Appends every move's stats to a file as one JSON object per line."""
+
+    def __init__(self, path_or_file):
+        if isinstance(path_or_file, str):
+            self.file = open(path_or_file, 'a')
+            self._owns_file = True
+        else:
+            self.file = path_or_file
+            self._owns_file = False
+
+    def emit(self, stats):
+        self.file.write(json.dumps(stats.to_dict()) + '\n')
+        self.file.flush()
+
+    def close(self):
+        if self._owns_file:
+            self.file.close()
+
+
+class PrometheusSink:
+    """Aggregates stats into counters and renders them in the Prometheus text format.
+
+    Nothing is written per move; call render() or dump(path) to export.
+    """
+
+    def __init__(self):
+        self.moves = {}
+        self.nodes = 0
+        self.seconds = 0.0
+        self.cutoffs = {}
+        self.tt_probes = 0
+        self.tt_hits = 0
+
+    def emit(self, stats):
+        self.moves[stats.source] = self.moves.get(stats.source, 0) + 1
+        self.nodes += stats.nodes
+        self.seconds += stats.seconds
+        for ply, count in enumerate(stats.cutoffs_by_ply):
+            if count:
+                self.cutoffs[ply] = self.cutoffs.get(ply, 0) + count
+        if stats.tt is not None:
+            self.tt_probes += stats.tt['probes']
+            self.tt_hits += round(stats.tt['probes'] * stats.tt['hit_rate'])
+
+    def render(self):
+        lines = ['# TYPE search_moves_total counter']
+        lines += [f'search_moves_total{{source="{source}"}} {count}' for source, count in sorted(self.moves.items())]
+        lines += [
+            '# TYPE search_nodes_total counter',
+            f'search_nodes_total {self.nodes}',
+            '# TYPE search_seconds_total counter',
+            f'search_seconds_total {self.seconds:.6f}',
+            '# TYPE search_cutoffs_total counter'
+        ]
+        lines += [f'search_cutoffs_total{{ply="{ply}"}} {count}' for ply, count in sorted(self.cutoffs.items())]
+        lines += [
+            '# TYPE search_tt_probes_total counter',
+            f'search_tt_probes_total {self.tt_probes}',
+            '# TYPE search_tt_hits_total counter',
+            f'search_tt_hits_total {self.tt_hits}'
+        ]
+        return '\n'.join(lines) + '\n'
+
+    def dump(self, path):
+        with open(path, 'w') as f:
+            f.write(self.render())
+
+
+SINKS = ['none', 'print', 'log', 'jsonl', 'prometheus']
+
+def make_sink(kind, path=None):
+    """Build a sink by name; 'jsonl' appends to `path`, 'none' returns None (no stats are collected)."""
+    if kind == 'none':
+        return None
+    if kind == 'print':
+        return PrintSink()
+    if kind == 'log':
+        return LoggingSink()
+    if kind == 'jsonl':
+        if path is None:
+            raise ValueError("the jsonl sink needs a path")
+        return JsonLinesSink(path)
+    if kind == 'prometheus':
+        return PrometheusSink()
+    raise ValueError(f"Unknown metrics sink: {kind}")
@@ -0,0 +1,349 @@
+import sys
+import os
+import random
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from games.connect4 import Connect4
+from agents.search import SearchTimeout
+
+class SharedTranspositionTable:
+    """Depth-preferred transposition table living in shared memory.
+
+    Every entry is two unsigned 64-bit words, ``key ^ data`` and ``data``,
+    where ``data`` packs the score, generation, move, bound type and depth.
+    Writers never lock: an entry torn by two processes writing at once no
+    longer XORs back to its key and is simply treated as a miss. The
+    interface matches TranspositionTable so the search can use either.
+    """
+
+    ENTRY_BYTES = 16
+
+    def __init__(self, size_mb=16, words=None):
+        if words is None:
+            num_buckets = max(1, int(size_mb * 1024 * 1024) // self.ENTRY_BYTES)
+            words = multiprocessing.RawArray('Q', num_buckets * 2)
+        self.words = words
+        self.num_buckets = len(words) // 2
+        self.generation = 0
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0
+
+    def new_search(self):
+        self.generation += 1
+        self.reset_stats()
+
+    @staticmethod
+    def _pack(depth, score, flag, move, generation):
+        move = 0 if move is None else move + 1
+        return (((int(score) + (1 << 31)) << 32) | ((generation & 0xFFFF) << 16)
+                | ((move & 0xFF) << 8) | ((flag & 0x3) << 6) | (depth & 0x3F))
+
+    def probe(self, key):
+        index = (key % self.num_buckets) * 2
+        data = self.words[index + 1]
+        if data and self.words[index] ^ data == key:
+            self.hits += 1
+            move = (data >> 8) & 0xFF
+            return (key, data & 0x3F, (data >> 32) - (1 << 31), (data >> 6) & 0x3,
+                    move - 1 if move else None, (data >> 16) & 0xFFFF)
+
+        self.misses += 1
+        if data:
+            self.collisions += 1
+        return None
+
+    def store(self, key, depth, score, flag, move):
+        index = (key % self.num_buckets) * 2
+        current = self.words[index + 1]
+        if (current and self.words[index] ^ current != key
+                and (current >> 16) & 0xFFFF == self.generation & 0xFFFF and depth < current & 0x3F):
+            return
+
+        data = self._pack(depth, score, flag, move, self.generation)
+        self.words[index] = key ^ data
+        self.words[index + 1] = data
+
+    def is_current(self, entry):
+        return entry[5] == self.generation & 0xFFFF
+
+    def stats(self):
+        probes = self.hits + self.misses
+        if probes == 0:
+            return {'probes': 0, 'hit_rate': 0.0, 'miss_rate': 0.0, 'collision_rate': 0.0}
+        return {
+            'probes': probes,
+            'hit_rate': self.hits / probes,
+            'miss_rate': self.misses / probes,
+            'collision_rate': self.collisions / probes
+        }
+
+    def describe(self):
+        stats = self.stats()
+        return (f"shared TT hits {stats['hit_rate']:.1%}, misses {stats['miss_rate']:.1%}, "
+                f"collisions {stats['collision_rate']:.1%}")
+
+
+# Per-process state of pool workers, set up by _init_worker
+_shared_alpha = None
+_stop_flag = None
+_shared_tt = None
+_worker_agents = {}
+
+def _init_worker(shared_alpha, stop_flag, tt_words):
+    global _shared_alpha, _stop_flag, _shared_tt
+    _shared_alpha = shared_alpha
+    _stop_flag = stop_flag
+    _shared_tt = SharedTranspositionTable(words=tt_words) if tt_words is not None else None
+
+def _worker_agent(config, generation):
+    """Build (once per process) the agent a task searches with."""
+    key = (config['agent_class'], config['player_symbol'], config['use_alpha_beta'],
+           config['move_ordering'], config['tt_size_mb'], config['tt_replacement'], config['evaluator'],
+           config['threat_analysis'], config['symmetry'])
+    agent = _worker_agents.get(key)
+    if agent is None:
+        agent = config['agent_class'](config['player_symbol'], use_alpha_beta=config['use_alpha_beta'],
+                                      tt_size_mb=config['tt_size_mb'], tt_replacement=config['tt_replacement'],
+                                      move_ordering=config['move_ordering'], evaluator=config['evaluator'],
+                                      threat_analysis=config['threat_analysis'], symmetry=config['symmetry'])
+        if _shared_tt is not None:
+            agent.tt = _shared_tt
+        _worker_agents[key] = agent
+
+    if agent.tt is not None:
+        agent.tt.generation = generation
+    agent.nodes_evaluated = 0
+    agent.principal_variation = list(config['principal_variation'])
+    return agent
+
+def _search_root_move_task(snapshot, move, config, alpha, deadline, generation):
+    agent = _worker_agent(config, generation)
+    game = Connect4()
+    game.restore(snapshot)
+    agent._prepare_search(game, config['depth_limit'])
+    agent._deadline = deadline
+    # Set when the calling agent is cancelled (see ParallelSearch._wait)
+    agent._stop_flag = _stop_flag
+    pv = agent.principal_variation
+    agent._follow_pv = bool(pv) and pv[0] == move
+
+    # Another worker may have raised alpha since this task was queued
+    alpha = max(alpha, _shared_alpha.value)
+    try:
+        score = agent._search_root_move(game, move, alpha)
+    except SearchTimeout:
+        return move, None, agent.nodes_evaluated, []
+    finally:
+        agent._deadline = None
+        agent._stop_flag = None
+
+    with _shared_alpha.get_lock():
+        if score > _shared_alpha.value:
+            _shared_alpha.value = score
+    return move, score, agent.nodes_evaluated, [move] + agent._pv_table[1]
+
+def _helper_search_task(snapshot, config, seed, generation):
+    """Lazy SMP helper: search the same root in a shuffled order until stopped.
+
+    Its results only matter through what it leaves in the shared table.
+    """
+    agent = _worker_agent(config, generation)
+    agent._stop_flag = _stop_flag
+    game = Connect4()
+    game.restore(snapshot)
+    rng = random.Random(seed)
+    deepest = game.rows * game.cols - game.move_count - 1
+
+    # Odd helpers start one ply deeper than the main search
+    depth_limit = config['depth_limit']
+    if depth_limit is not None:
+        depth_limit = min(depth_limit + seed % 2, deepest)
+    try:
+        while True:
+            agent._prepare_search(game, depth_limit)
+            moves = agent._root_moves(game)
+            rng.shuffle(moves)
+            best_score = float('-inf')
+            for move in moves:
+                best_score = max(best_score, agent._search_root_move(game, move, best_score))
+            if depth_limit is None or depth_limit >= deepest:
+                break
+            depth_limit += 1
+    except SearchTimeout:
+        pass
+    finally:
+        agent._stop_flag = None
+    return agent.nodes_evaluated
+
+
+class ParallelSearch:
+    """Runs Connect4MinimaxAgent root searches on a pool of processes.
+
+    Modes:
+    - ``'root_split'``: the first (most promising) root move is searched
+      alone to get a bound, then the remaining root moves are searched in
+      parallel. Workers share the best root score found so far as alpha.
+    - ``'lazy_smp'``: the calling process searches as usual while helper
+      workers search the same position in other orders, all of them
+      sharing one transposition table in shared memory.
+
+    A cancel() of the calling agent reaches root-split workers through the
+    shared stop flag, which is polled while their results are awaited.
+    """
+    # Seconds between checks of the calling agent's cancel() while waiting on workers
+    CANCEL_POLL_SECONDS = 0.02
+
+    def __init__(self, workers, mode='root_split', tt_size_mb=None):
+        if mode not in ('root_split', 'lazy_smp'):
+            raise ValueError(f"Unknown parallel mode: {mode}")
+        if mode == 'lazy_smp' and not tt_size_mb:
+            # Helpers are useless without a table to share
+            tt_size_mb = 16
+
+        self.workers = workers
+        self.mode = mode
+        self.shared_tt = SharedTranspositionTable(tt_size_mb) if tt_size_mb else None
+        self._alpha = multiprocessing.Value('d', float('-inf'))
+        self._stop = multiprocessing.Value('b', 0)
+        # In Lazy SMP the calling process is one of the searchers
+        pool_size = max(1, workers - 1) if mode == 'lazy_smp' else workers
+        tt_words = self.shared_tt.words if self.shared_tt is not None else None
+        self.executor = ProcessPoolExecutor(max_workers=pool_size, initializer=_init_worker,
+                                            initargs=(self._alpha, self._stop, tt_words))
+
+    def search_root(self, agent, game, depth_limit):
+        """Search every root move of `game` for `agent`; returns (best_move, best_score)."""
+        if self.mode == 'lazy_smp':
+            return self._lazy_smp(agent, game, depth_limit)
+        return self._root_split(agent, game, depth_limit)
+
+    def _root_split(self, agent, game, depth_limit):
+        agent._prepare_search(game, depth_limit)
+        moves = agent._root_moves(game)
+        snapshot = game.snapshot()
+        config = agent._worker_config(depth_limit)
+        generation = agent.tt.generation if agent.tt is not None else 0
+        deadline = agent._deadline
+
+        self._alpha.value = float('-inf')
+        self._stop.value = 0
+        first = self.executor.submit(_search_root_move_task, snapshot, moves[0], config,
+                                     float('-inf'), deadline, generation)
+        results = self._wait(agent, [first])
+        if results[0][1] is not None:
+            futures = [self.executor.submit(_search_root_move_task, snapshot, move, config,
+                                            self._alpha.value, deadline, generation)
+                       for move in moves[1:]]
+            results.extend(self._wait(agent, futures))
+
+        agent.nodes_evaluated += sum(result[2] for result in results)
+        if any(result[1] is None for result in results):
+            raise SearchTimeout()
+
+        best_score = float('-inf')
+        best_move = None
+        for move, score, _, pv in results:
+            if score > best_score:
+                best_score = score
+                best_move = move
+                agent.principal_variation = pv
+        return best_move, best_score
+
+    def _wait(self, agent, futures):
+        """The results of root-split tasks, raising the workers' stop flag if the agent is cancelled meanwhile."""
+        pending = set(futures)
+        while pending:
+            _, pending = wait(pending, timeout=self.CANCEL_POLL_SECONDS)
+            if agent.cancelled:
+                self._stop.value = 1
+        return [future.result() for future in futures]
+
+    def _lazy_smp(self, agent, game, depth_limit):
+        snapshot = game.snapshot()
+        config = agent._worker_config(depth_limit)
+        generation = agent.tt.generation if agent.tt is not None else 0
+
+        self._stop.value = 0
+        helpers = [self.executor.submit(_helper_search_task, snapshot, config, seed, generation)
+                   for seed in range(1, self.workers)]
+        try:
+            return agent._search_root_serial(game, depth_limit)
+        finally:
+            self._stop.value = 1
+            agent.nodes_evaluated += sum(helper.result() for helper in helpers)
+
+    def close(self):
+        self.executor.shutdown()
+
+
+def compare_parallel_speedup(workers=4, depth=6, mode='root_split', num_positions=5, seed=0, tt_size_mb=None):
+    """Time serial and parallel search at the same depth on the same positions."""
+    from agents.connect4_agents import Connect4MinimaxAgent
+
+    print(f"Parallel search speedup ({mode}, {workers} workers, depth {depth})")
+    print("=" * 60)
+
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < num_positions:
+        game = Connect4()
+        for _ in range(rng.randint(2, 10)):
+            game.drop_piece(rng.choice(game.get_valid_moves()))
+        if not game.game_over:
+            positions.append(game.get_state())
+
+    serial_time = parallel_time = 0.0
+    serial_nodes = parallel_nodes = 0
+    parallel_agents = {}
+    try:
+        for index, state in enumerate(positions):
+            game = Connect4()
+            game.set_state(state)
+            symbol = game.current_player
+
+            serial = Connect4MinimaxAgent(symbol, use_alpha_beta=True, max_depth=depth,
+                                          tt_size_mb=tt_size_mb, move_ordering=True)
+            start = time.time()
+            serial_move = serial.get_move(game)
+            elapsed_serial = time.time() - start
+
+            if symbol not in parallel_agents:
+                parallel_agents[symbol] = Connect4MinimaxAgent(symbol, use_alpha_beta=True, max_depth=depth,
+                                                               tt_size_mb=tt_size_mb, move_ordering=True,
+                                                               workers=workers, parallel_mode=mode)
+                # Start the pool outside the timed region
+                parallel_agents[symbol].get_move(game)
+            parallel = parallel_agents[symbol]
+            start = time.time()
+            parallel_move = parallel.get_move(game)
+            elapsed_parallel = time.time() - start
+
+            serial_time += elapsed_serial
+            parallel_time += elapsed_parallel
+            serial_nodes += serial.nodes_evaluated
+            parallel_nodes += parallel.nodes_evaluated
+            print(f"Position {index + 1}: serial {elapsed_serial:.2f}s (move {serial_move}), "
+                  f"parallel {elapsed_parallel:.2f}s (move {parallel_move}), "
+                  f"speedup {elapsed_serial / max(elapsed_parallel, 1e-9):.2f}x")
+    finally:
+        for agent in parallel_agents.values():
+            agent.close()
+
+    speedup = serial_time / max(parallel_time, 1e-9)
+    print(f"\nSerial: {serial_nodes} nodes in {serial_time:.2f}s")
+    print(f"Parallel: {parallel_nodes} nodes in {parallel_time:.2f}s")
+    print(f"Overall speedup: {speedup:.2f}x")
+    return {
+        'serial_time': serial_time,
+        'parallel_time': parallel_time,
+        'serial_nodes': serial_nodes,
+        'parallel_nodes': parallel_nodes,
+        'speedup': speedup
+    }
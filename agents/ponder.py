@@ -0,0 +1,118 @@
+import sys
+import os
+import threading
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from agents.search import SearchTimeout
+
+class PonderingAgent:
+    """Wraps a NegamaxSearch agent so it searches on the opponent's time.
+
+    After the agent moves, ponder() searches the positions the opponent
+    can leave in a background thread: the reply the principal variation
+    predicts (``'predicted'``, falling back to every reply when there is
+    no prediction) or every reply, predicted first (``'all'``). When the
+    opponent's move arrives, get_move stops the thread. A finished search
+    of the actual position is played at once; otherwise the agent searches
+    as usual, with the transposition table and position cache warmed up.
+
+    The wrapped agent must not be used by anything else while pondering.
+    Any other attribute is read from the wrapped agent.
+    """
+
+    def __init__(self, agent, mode='predicted'):
+        if mode not in ('predicted', 'all'):
+            raise ValueError(f"Unknown ponder mode: {mode}")
+        self.agent = agent
+        self.mode = mode
+        self.ponder_hits = 0
+        self.ponder_misses = 0
+        self._thread = None
+        self._sink = agent.sink
+        # Position hash -> (move, score, principal variation, completed depth) of finished searches
+        self._results = {}
+
+    def __getattr__(self, name):
+        return getattr(self.agent, name)
+
+    def ponder(self, game):
+        """Start searching the opponent's replies to `game` in the background."""
+        self.stop()
+        if game.game_over:
+            return
+
+        replies = game.get_valid_moves()
+        # The agent's own move is the first move of its principal variation
+        pv = self.agent.principal_variation
+        predicted = pv[1] if len(pv) > 1 and pv[1] in replies else None
+        if predicted is not None:
+            if self.mode == 'predicted':
+                replies = [predicted]
+            else:
+                replies.remove(predicted)
+                replies.insert(0, predicted)
+
+        # Background searches report nothing, and are cancelled on a copy of the game
+        self.agent.sink = None
+        self.agent.resume()
+        self._results = {}
+        self._thread = threading.Thread(target=self._search_replies, args=(game.clone(), replies),
+                                        daemon=True)
+        self._thread.start()
+
+    def _search_replies(self, game, replies):
+        agent = self.agent
+        for reply in replies:
+            game.make(reply)
+            if not game.game_over:
+                try:
+                    move = agent.get_move(game)
+                except SearchTimeout:
+                    return
+                # A cancelled timed search returns early, so its result is not the one a full search gives
+                if agent.cancelled:
+                    return
+                self._results[game.hash] = (move, agent.best_score, list(agent.principal_variation),
+                                            agent.completed_depth)
+            game.unmake(reply)
+
+    def stop(self):
+        """Cancel pondering and wait for the background search to finish."""
+        if self._thread is None:
+            return
+        self.agent.cancel()
+        self._thread.join()
+        self._thread = None
+        self.agent.resume()
+        self.agent.sink = self._sink
+
+    def get_move(self, game):
+        pondered = self._thread is not None
+        self.stop()
+        result = self._results.get(game.hash)
+        self._results = {}
+        if result is None:
+            if pondered:
+                self.ponder_misses += 1
+            return self.agent.get_move(game)
+
+        self.ponder_hits += 1
+        move, self.agent.best_score, self.agent.principal_variation, self.agent.completed_depth = result
+        # The search ran on the opponent's time
+        self.agent.nodes_evaluated = 0
+        self.agent._report(move, 'ponder', details=[f"ponder hits {self.ponder_hits}, misses {self.ponder_misses}"])
+        return move
+
+    def get_move_with_stats(self, game):
+        collect_stats = self.agent.collect_stats
+        self.agent.collect_stats = True
+        try:
+            move = self.get_move(game)
+        finally:
+            self.agent.collect_stats = collect_stats
+        return move, self.agent.last_stats
+
+    def close(self):
+        self.stop()
+        if hasattr(self.agent, 'close'):
+            self.agent.close()
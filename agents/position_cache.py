@@ -0,0 +1,109 @@
+import sys
+import os
+import sqlite3
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS positions (
+    key INTEGER NOT NULL,
+    namespace TEXT NOT NULL,
+    plies INTEGER NOT NULL,
+    score INTEGER NOT NULL,
+    move INTEGER NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (key, namespace)
+);
+CREATE INDEX IF NOT EXISTS positions_last_used ON positions (last_used);
+"""
+
+def _signed(key):
+    """SQLite integers are signed 64-bit, so hashes are stored two's complement."""
+    return key - (1 << 64) if key >= (1 << 63) else key
+
+class PositionCache:
+    """Persistent search results shared by every process on a host.
+
+    Backed by an SQLite file in WAL mode, so any number of processes can
+    read while one writes. Each row stores the exact root result of a
+    search: the best move, its score for the side to move and how many
+    plies were searched, under a canonical position key. ``namespace``
+    keeps results from different evaluators or agents apart. The table
+    holds at most ``max_entries`` rows; when it grows past that, the least
+    recently used tenth is evicted.
+    """
+
+    # How many writes to make between size checks
+    EVICT_CHECK_INTERVAL = 256
+
+    def __init__(self, path, max_entries=1000000, timeout=5.0):
+        self.path = path
+        self.max_entries = max_entries
+        # A pondering agent may use the cache from its background thread, one thread at a time
+        self.connection = sqlite3.connect(path, timeout=timeout, isolation_level=None, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.executescript(SCHEMA)
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+
+    def get(self, key, namespace, min_plies):
+        """Return (move, score, plies) stored for `key` searched at least `min_plies` deep, or None."""
+        row = self.connection.execute(
+            'SELECT plies, score, move FROM positions WHERE key = ? AND namespace = ?',
+            (_signed(key), namespace)).fetchone()
+        if row is None or row[0] < min_plies:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.connection.execute('UPDATE positions SET last_used = ? WHERE key = ? AND namespace = ?',
+                                (time.time(), _signed(key), namespace))
+        plies, score, move = row
+        return move, score, plies
+
+    def put(self, key, namespace, plies, score, move):
+        """Store a result unless a deeper one for the same position is already there."""
+        self.connection.execute(
+            'INSERT INTO positions (key, namespace, plies, score, move, last_used) VALUES (?, ?, ?, ?, ?, ?) '
+            'ON CONFLICT (key, namespace) DO UPDATE SET plies = excluded.plies, score = excluded.score, '
+            'move = excluded.move, last_used = excluded.last_used WHERE excluded.plies >= positions.plies',
+            (_signed(key), namespace, plies, int(score), move, time.time()))
+        self.writes += 1
+        if self.writes % self.EVICT_CHECK_INTERVAL == 0:
+            self.evict()
+
+    def evict(self):
+        """Drop least recently used rows once the table is over max_entries."""
+        count = self.connection.execute('SELECT COUNT(*) FROM positions').fetchone()[0]
+        if count <= self.max_entries:
+            return 0
+        excess = count - self.max_entries + self.max_entries // 10
+        self.connection.execute(
+            'DELETE FROM positions WHERE rowid IN '
+            '(SELECT rowid FROM positions ORDER BY last_used LIMIT ?)', (excess,))
+        self.evictions += excess
+        return excess
+
+    def __len__(self):
+        return self.connection.execute('SELECT COUNT(*) FROM positions').fetchone()[0]
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'lookups': lookups,
+            'hits': self.hits,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'writes': self.writes,
+            'evictions': self.evictions
+        }
+
+    def describe(self):
+        stats = self.stats()
+        return f"cache hits {stats['hits']}/{stats['lookups']} ({stats['hit_rate']:.1%}), writes {stats['writes']}"
+
+    def close(self):
+        self.connection.close()
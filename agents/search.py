@@ -0,0 +1,563 @@
+import sys
+import os
+import random
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from agents.transposition import EXACT, LOWER_BOUND, UPPER_BOUND
+from agents.move_ordering import effective_branching_factor
+from agents.metrics import SearchStats, PrintSink
+
+class SearchTimeout(Exception):
+    """Raised inside the search when the per-move time budget runs out."""
+    pass
+
+class NegamaxSearch:
+    """Game-agnostic negamax search that the minimax agents are configured from.
+
+    Scores are from the point of view of the side to move at each node, so
+    one recursive function covers both players. On top of alpha-beta it
+    adds principal variation search (every move after the first is tried
+    with a null window and only re-searched if it beats alpha) and, when
+    deepening iteratively, optional aspiration windows around earlier scores.
+    Transposition table, move ordering, principal variation, time budget
+    and move pre-filter are all optional.
+
+    The game must implement this protocol:
+    - ``get_valid_moves()``, ``make(move)`` and ``unmake(move)``, where
+      moves are undone in reverse order;
+    - ``game_over``, ``winner`` and ``current_player``;
+    - ``hash``, a position key kept up to date by make/unmake;
+    - ``move_count`` and ``max_moves``, for plies left to the end;
+    - ``snapshot()`` and ``restore(snapshot)``, to put the game back when a
+      timed iteration is cut off;
+    - ``evaluate(symbol)``, a static score for `symbol` at the depth limit;
+    - with a position cache or symmetry, ``canonical()`` returning (key,
+      symmetry) and ``to_canonical_move`` / ``from_canonical_move`` to map
+      moves; with symmetry also ``unique_moves(moves)``, which drops moves
+      mirroring others in a position that is its own symmetric image.
+
+    ``depth`` below is the ply of a node counted from the root's children
+    (0), and ``win_score - depth`` is the score of a win at that ply.
+    """
+    # How many nodes to search between clock checks in timed searches
+    TIME_CHECK_INTERVAL = 256
+
+    def __init__(self, player_symbol, win_score, use_alpha_beta=True, max_depth=None, tt=None, move_orderer=None,
+                 move_time_ms=None, pvs=True, aspiration_window=None, prefilter=None, verbose=True,
+                 cache=None, cache_namespace='', symmetry=False, sink=None, stats=None):
+        self.player_symbol = player_symbol
+        self.opponent_symbol = 'O' if player_symbol == 'X' else 'X'
+        self.win_score = win_score
+        self.use_alpha_beta = use_alpha_beta
+        self.max_depth = max_depth  # None for full search, or a number for depth-limited search
+        # With a time budget the search deepens iteratively, capped by max_depth if set
+        self.move_time_ms = move_time_ms
+        self.tt = tt
+        self.move_orderer = move_orderer
+        # Null-window search of non-first moves; only with alpha-beta
+        self.pvs = pvs and use_alpha_beta
+        # Half-width of the root window in iterative deepening; None searches every root with a full window
+        self.aspiration_window = aspiration_window if use_alpha_beta else None
+        # Optional game -> (status, moves) check: 'win' and 'loss' settle a node, 'open' limits its moves
+        self.prefilter = prefilter
+        self.verbose = verbose
+        # Where each move's SearchStats go (see agents/metrics.py); verbose prints the summary line
+        self.sink = sink if sink is not None else (PrintSink() if verbose else None)
+        # Counting cutoffs and timing iterations is skipped when nothing reads the stats
+        self.collect_stats = stats if stats is not None else self.sink is not None
+        self.last_stats = None
+        # Optional PositionCache consulted before searching and given every finished root result
+        self.cache = cache
+        self.cache_namespace = cache_namespace
+        # Key the TT by canonical position and search one of each set of symmetric root moves
+        self.symmetry = symmetry
+        self.nodes_evaluated = 0
+        self.completed_depth = None
+        self.best_score = None
+        self.effective_branching_factor = 0.0
+        self.principal_variation = []
+        self._depth_limit = max_depth
+        self._deadline = None
+        self._stop_flag = None
+        self._cancelled = False
+        self._follow_pv = False
+        self._pv_table = []
+        self._iteration_scores = []
+        self._cutoffs = None
+        self._depth_times = None
+
+    def get_move(self, game):
+        self.nodes_evaluated = 0
+        start_time = time.time()
+
+        cached_move = self._cached_move(game)
+        if cached_move is not None:
+            self._report(cached_move, 'cache', start_time)
+            return cached_move
+
+        if self.tt is not None:
+            self.tt.new_search()
+        if self.move_orderer is not None:
+            self.move_orderer.new_search()
+        self.principal_variation = []
+        if self.collect_stats:
+            self._cutoffs = [0] * (game.max_moves + 1)
+            self._depth_times = []
+
+        if self.move_time_ms is None:
+            best_move, self.best_score = self._search_root(game, self.max_depth)
+            self.completed_depth = self.max_depth
+            if self._depth_times is not None:
+                self._depth_times.append((self.max_depth, time.time() - start_time, self.nodes_evaluated))
+        else:
+            best_move = self._iterative_deepening(game, start_time + self.move_time_ms / 1000)
+
+        self.effective_branching_factor = effective_branching_factor(
+            self.nodes_evaluated, self._plies_searched(game, self.completed_depth))
+        self._store_result(game, best_move)
+
+        # If no best move was found (possible in depth-limited search), choose random
+        if best_move is None and game.get_valid_moves():
+            best_move = random.choice(game.get_valid_moves())
+
+        self._report(best_move, 'search', start_time)
+        return best_move
+
+    def get_move_with_stats(self, game):
+        """get_move, returning (move, SearchStats) and collecting stats even without a sink."""
+        collect_stats = self.collect_stats
+        self.collect_stats = True
+        try:
+            move = self.get_move(game)
+        finally:
+            self.collect_stats = collect_stats
+        return move, self.last_stats
+
+    def _report(self, move, source, start_time=None, details=()):
+        """Build the SearchStats of a finished get_move and send them to the sink."""
+        if not self.collect_stats:
+            self._cutoffs = self._depth_times = None
+            return
+        stats = SearchStats(type(self).__name__, self.player_symbol, source)
+        stats.move = move
+        stats.score = self.best_score
+        stats.nodes = self.nodes_evaluated
+        stats.seconds = time.time() - start_time if start_time is not None else 0.0
+        stats.completed_depth = self.completed_depth
+        stats.details.extend(details)
+        if source == 'search':
+            stats.timed = self.move_time_ms is not None
+            stats.branching_factor = self.effective_branching_factor
+            cutoffs = self._cutoffs or []
+            while cutoffs and not cutoffs[-1]:
+                cutoffs.pop()
+            stats.cutoffs_by_ply = cutoffs
+            stats.depth_times = self._depth_times or []
+            if self.tt is not None:
+                stats.tt = self.tt.stats()
+                stats.details.append(self.tt.describe())
+        if self.cache is not None and source in ('search', 'solver', 'cache'):
+            stats.cache = self.cache.stats()
+            stats.details.append(self.cache.describe())
+        self._cutoffs = self._depth_times = None
+        self.last_stats = stats
+        if self.sink is not None:
+            self.sink.emit(stats)
+
+    def cancel(self):
+        """Stop a search running in another thread at its next clock check.
+
+        The search raises SearchTimeout (a timed one returns its last
+        finished iteration instead), leaving the game it was given with
+        moves still played, so cancel searches of a copy. Searches stay
+        cancelled until resume() is called.
+        """
+        self._cancelled = True
+
+    def resume(self):
+        self._cancelled = False
+
+    @property
+    def cancelled(self):
+        return self._cancelled
+
+    def _cached_move(self, game):
+        """The cached move for this position if it was searched at least as deep as this search would be.
+
+        A timed search without a depth cap only takes results that were
+        searched to the end of the game.
+        """
+        if self.cache is None:
+            return None
+        key, symmetry = game.canonical()
+        entry = self.cache.get(key, self.cache_namespace, self._plies_searched(game, self.max_depth))
+        if entry is None:
+            return None
+        move = game.from_canonical_move(entry[0], symmetry)
+        if move not in game.get_valid_moves():
+            return None
+        self.best_score = entry[1]
+        self.principal_variation = [move]
+        self.completed_depth = None
+        return move
+
+    def _store_result(self, game, best_move):
+        if self.cache is None or best_move is None:
+            return
+        key, symmetry = game.canonical()
+        self.cache.put(key, self.cache_namespace, self._plies_searched(game, self.completed_depth),
+                       self.best_score, game.to_canonical_move(best_move, symmetry))
+
+    def _iterative_deepening(self, game, deadline):
+        """Search depth limits 0, 1, 2... until the deadline passes.
+
+        Returns the best move of the last iteration that finished. An
+        iteration cut off by the deadline is thrown away with its principal
+        variation, and the game is restored from its snapshot since its
+        moves were never taken back.
+        """
+        # A depth limit of moves_left - 1 already searches every line to the end
+        deepest = game.max_moves - game.move_count - 1
+        if self.max_depth is not None:
+            deepest = min(deepest, self.max_depth)
+
+        saved = game.snapshot()
+        best_move = None
+        self.completed_depth = None
+        self._iteration_scores = []
+        for depth_limit in range(deepest + 1):
+            iteration_start, iteration_nodes = time.time(), self.nodes_evaluated
+            # The first iteration always completes so there is a move to return
+            self._deadline = deadline if best_move is not None else None
+            principal_variation = self.principal_variation
+            try:
+                move, score = self._aspiration_search(game, depth_limit)
+            except SearchTimeout:
+                game.restore(saved)
+                # Keep the line of the iteration best_move came from, not the aborted one's
+                self.principal_variation = principal_variation
+                break
+            finally:
+                self._deadline = None
+
+            best_move = move
+            self.best_score = score
+            self.completed_depth = depth_limit
+            if self._depth_times is not None:
+                self._depth_times.append((depth_limit, time.time() - iteration_start,
+                                          self.nodes_evaluated - iteration_nodes))
+            if time.time() >= deadline:
+                break
+
+        return best_move
+
+    def _aspiration_search(self, game, depth_limit):
+        """Search the root in a window around an earlier score, widening the side the result falls outside.
+
+        The window is centered on the score from two iterations back, since
+        static evaluations tend to swing between odd and even depths.
+        """
+        scores = self._iteration_scores
+        if self.aspiration_window is None or len(scores) < 2:
+            move, score = self._search_root(game, depth_limit)
+        else:
+            alpha = scores[-2] - self.aspiration_window
+            beta = scores[-2] + self.aspiration_window
+            move, score = self._search_root(game, depth_limit, alpha, beta)
+            if score <= alpha:
+                move, score = self._search_root(game, depth_limit, float('-inf'), beta)
+            elif score >= beta:
+                move, score = self._search_root(game, depth_limit, alpha, float('inf'))
+        scores.append(score)
+        return move, score
+
+    def _search_root(self, game, depth_limit, alpha=float('-inf'), beta=float('inf')):
+        """Search every root move to depth_limit and return (best_move, best_score)."""
+        return self._search_root_serial(game, depth_limit, alpha, beta)
+
+    def _search_root_serial(self, game, depth_limit, alpha=float('-inf'), beta=float('inf')):
+        self._prepare_search(game, depth_limit)
+        best_score = float('-inf')
+        best_move = None
+        for index, move in enumerate(self._root_moves(game)):
+            if index == 0 or not self.pvs:
+                score = self._search_root_move(game, move, alpha, beta)
+            else:
+                # Later root moves only need to prove they can't beat the best so far
+                score = self._search_root_move(game, move, alpha, alpha + 1)
+                if alpha < score < beta:
+                    score = self._search_root_move(game, move, alpha, beta)
+
+            if score > best_score:
+                best_score = score
+                best_move = move
+                self.principal_variation = [move] + self._pv_table[1]
+
+            if self.use_alpha_beta:
+                alpha = max(alpha, score)
+                if alpha >= beta:
+                    break
+
+        return best_move, best_score
+
+    def _prepare_search(self, game, depth_limit):
+        self._depth_limit = depth_limit
+        self._pv_table = [[] for _ in range(game.max_moves + 2)]
+
+    def _root_moves(self, game):
+        moves = game.get_valid_moves()
+        if self.prefilter is not None:
+            status, filtered = self.prefilter(game)
+            # When every move loses, search them all to lose as late as possible
+            if status != 'loss':
+                moves = filtered
+        if self.symmetry:
+            moves = game.unique_moves(moves)
+        if self.move_orderer is not None:
+            moves = self.move_orderer.order(moves, -1)
+
+        # The previous iteration's principal variation is searched first
+        pv = self.principal_variation
+        if pv and pv[0] in moves:
+            moves.remove(pv[0])
+            moves.insert(0, pv[0])
+            self._follow_pv = True
+        else:
+            self._follow_pv = False
+        return moves
+
+    def _search_root_move(self, game, move, alpha, beta=float('inf')):
+        """Score of one root move for the side to move at the root, searched in (alpha, beta)."""
+        # Play the move in place and take it back after the search
+        game.make(move)
+        if self.use_alpha_beta:
+            score = -self.negamax(game, 0, -beta, -alpha)
+        else:
+            score = -self.negamax(game, 0, float('-inf'), float('inf'))
+        game.unmake(move)
+        self._follow_pv = False
+        return score
+
+    def _order_moves(self, game, depth, tt_move=None, moves=None):
+        if moves is None:
+            moves = game.get_valid_moves()
+        if self.move_orderer is not None:
+            moves = self.move_orderer.order(moves, depth, tt_move)
+
+        # Walk down the previous principal variation along the leftmost path
+        if self._follow_pv:
+            pv = self.principal_variation
+            if depth + 1 < len(pv) and pv[depth + 1] in moves:
+                moves.remove(pv[depth + 1])
+                moves.insert(0, pv[depth + 1])
+            else:
+                self._follow_pv = False
+
+        return moves
+
+    def _plies_searched(self, game, depth_limit):
+        if depth_limit is None:
+            return game.max_moves - game.move_count
+        # Root moves plus depth_limit plies below them
+        return depth_limit + 1
+
+    def _check_time(self):
+        if self.nodes_evaluated % self.TIME_CHECK_INTERVAL:
+            return
+        if self._deadline is not None and time.time() >= self._deadline:
+            raise SearchTimeout()
+        if self._cancelled:
+            raise SearchTimeout()
+        # Set by the parallel search to stop helper workers
+        if self._stop_flag is not None and self._stop_flag.value:
+            raise SearchTimeout()
+
+    def _remaining_depth(self, game, depth):
+        """Plies left to search below this node, as stored in the TT."""
+        if self._depth_limit is None:
+            return game.max_moves - game.move_count
+        return self._depth_limit - depth
+
+    def evaluate_board(self, game):
+        """Static score of a depth-limit leaf for this agent."""
+        return game.evaluate(self.player_symbol)
+
+    def negamax(self, game, depth, alpha, beta):
+        """Score of `game` for its side to move, searched in the window (alpha, beta).
+
+        Without alpha-beta the window stays infinite, so every move is
+        searched and every score is exact.
+        """
+        self.nodes_evaluated += 1
+        self._check_time()
+        self._pv_table[depth + 1] = []
+
+        # Terminal states: the previous mover won, so the side to move lost
+        if game.winner is not None:
+            return depth - self.win_score  # Prefer losing later (and so winning sooner)
+        elif game.game_over:  # Draw
+            return 0
+
+        filtered_moves = None
+        if self.prefilter is not None:
+            status, filtered_moves = self.prefilter(game)
+            if status == 'win':
+                return self.win_score - (depth + 1)
+            elif status == 'loss':
+                return (depth + 2) - self.win_score
+
+        # Depth limit check
+        if self._depth_limit is not None and depth >= self._depth_limit:
+            score = self.evaluate_board(game)
+            return score if game.current_player == self.player_symbol else -score
+
+        remaining = self._remaining_depth(game, depth)
+        tt_move = None
+        if self.tt is not None:
+            # Symmetric positions share an entry whose move is stored for the canonical one
+            key, symmetry = game.canonical() if self.symmetry else (game.hash, 0)
+            entry = self.tt.probe(key)
+            if entry is not None:
+                tt_move = entry[4]
+                if symmetry and tt_move is not None:
+                    tt_move = game.from_canonical_move(tt_move, symmetry)
+            if entry is not None and entry[1] >= remaining and self.tt.is_current(entry):
+                _, _, score, flag, _, _ = entry
+                if flag == EXACT:
+                    return score
+                elif flag == LOWER_BOUND:
+                    alpha = max(alpha, score)
+                else:
+                    beta = min(beta, score)
+                if alpha >= beta:
+                    return score
+            alpha_orig, beta_orig = alpha, beta
+
+        best_score = float('-inf')
+        best_move = None
+        for index, move in enumerate(self._order_moves(game, depth, tt_move, filtered_moves)):
+            game.make(move)
+            if index == 0 or not self.pvs:
+                score = -self.negamax(game, depth + 1, -beta, -alpha)
+            else:
+                score = -self.negamax(game, depth + 1, -alpha - 1, -alpha)
+                if alpha < score < beta:
+                    score = -self.negamax(game, depth + 1, -beta, -alpha)
+            game.unmake(move)
+
+            if score > best_score:
+                best_score = score
+                best_move = move
+                self._pv_table[depth + 1] = [move] + self._pv_table[depth + 2]
+
+            if self.use_alpha_beta:
+                alpha = max(alpha, score)
+                if alpha >= beta:
+                    if self.move_orderer is not None:
+                        self.move_orderer.record_cutoff(move, depth, remaining)
+                    if self._cutoffs is not None:
+                        self._cutoffs[depth] += 1
+                    break
+
+        if self.tt is not None:
+            # Scores are stored for the side to move, like the search returns them
+            if best_score <= alpha_orig:
+                flag = UPPER_BOUND
+            elif best_score >= beta_orig:
+                flag = LOWER_BOUND
+            else:
+                flag = EXACT
+            if symmetry and best_move is not None:
+                best_move = game.to_canonical_move(best_move, symmetry)
+            self.tt.store(key, remaining, best_score, flag, best_move)
+
+        return best_score
+
+
+def compare_pvs(depth=6, num_positions=12, tt_size_mb=4, seed=3):
+    """Nodes to search Connect 4 and Tic Tac Toe positions with plain alpha-beta and with PVS."""
+    from games.connect4 import Connect4
+    from games.tictactoe import TicTacToe
+    from agents.connect4_agents import Connect4MinimaxAgent
+    from agents.tictactoe_agents import TicTacToeMinimaxAgent
+
+    rng = random.Random(seed)
+    suites = []
+    for game_class, max_plies in ((Connect4, 20), (TicTacToe, 5)):
+        positions = []
+        while len(positions) < num_positions:
+            game = game_class()
+            for _ in range(rng.randint(0, max_plies)):
+                if game.game_over:
+                    break
+                game.make(rng.choice(game.get_valid_moves()))
+            if not game.game_over:
+                positions.append(game.get_state())
+        suites.append((game_class, positions))
+
+    configs = [
+        ('Connect 4', lambda symbol, pvs: Connect4MinimaxAgent(symbol, max_depth=depth, tt_size_mb=tt_size_mb,
+                                                               move_ordering=True, pvs=pvs, verbose=False)),
+        ('Tic Tac Toe', lambda symbol, pvs: TicTacToeMinimaxAgent(symbol, move_ordering=True, pvs=pvs,
+                                                                  verbose=False))
+    ]
+    results = {}
+    for (name, make_agent), (game_class, positions) in zip(configs, suites):
+        nodes = {}
+        for pvs in (False, True):
+            nodes[pvs] = 0
+            for state in positions:
+                game = game_class()
+                game.set_state(state)
+                agent = make_agent(game.current_player, pvs)
+                agent.get_move(game)
+                nodes[pvs] += agent.nodes_evaluated
+        print(f"{name}: {nodes[False]} nodes with alpha-beta, {nodes[True]} with PVS "
+              f"({1 - nodes[True] / nodes[False]:.1%} fewer)")
+        results[name] = (nodes[False], nodes[True])
+    return results
+
+
+def compare_symmetry(depth=7, tt_size_mb=16):
+    """Nodes and TT entries to search symmetric and ordinary positions with and without symmetry."""
+    from games.connect4 import Connect4
+    from games.tictactoe import TicTacToe
+    from agents.connect4_agents import Connect4MinimaxAgent
+    from agents.tictactoe_agents import TicTacToeMinimaxAgent
+
+    suites = [
+        ('Connect 4', Connect4, [[], [3], [3, 3], [2, 4], [3, 2, 4], [1, 3, 5, 0], [2, 2, 3]],
+         lambda symbol, symmetry: Connect4MinimaxAgent(symbol, max_depth=depth, tt_size_mb=tt_size_mb,
+                                                       move_ordering=True, symmetry=symmetry, verbose=False)),
+        ('Tic Tac Toe', TicTacToe, [[], [(1, 1)], [(0, 0)], [(0, 1), (2, 1)]],
+         lambda symbol, symmetry: TicTacToeMinimaxAgent(symbol, move_ordering=True, symmetry=symmetry,
+                                                        verbose=False))
+    ]
+    results = {}
+    for name, game_class, openings, make_agent in suites:
+        nodes = {}
+        entries = {}
+        for symmetry in (False, True):
+            nodes[symmetry] = entries[symmetry] = 0
+            for moves in openings:
+                game = game_class()
+                for move in moves:
+                    game.make(move)
+                agent = make_agent(game.current_player, symmetry)
+                agent.get_move(game)
+                nodes[symmetry] += agent.nodes_evaluated
+                if agent.tt is not None:
+                    entries[symmetry] += sum(entry is not None for entry in agent.tt.slots)
+        summary = (f"{name}: {nodes[False]} nodes without symmetry, {nodes[True]} with "
+                   f"({1 - nodes[True] / nodes[False]:.1%} fewer)")
+        if entries[False]:
+            summary += f"; TT entries {entries[False]} -> {entries[True]}"
+        print(summary)
+        results[name] = (nodes[False], nodes[True], entries[False], entries[True])
+    return results
+
+
+if __name__ == "__main__":
+    compare_pvs()
+    compare_symmetry()
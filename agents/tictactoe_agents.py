@@ -1,135 +1,86 @@
 import sys
 import os
 import random
-import time
-from copy import deepcopy
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from games.tictactoe import TicTacToe
 from agents.default_agent import DefaultAgent
+from agents.move_ordering import MoveOrderer, TICTACTOE_STATIC_ORDER, center_out_cells
+from agents.transposition import TranspositionTable
+from agents.search import NegamaxSearch
+from agents.tictactoe_table import get_table
 
 class TicTacToeDefaultAgent(DefaultAgent):
     pass  # Uses the default implementation
 
-class TicTacToeMinimaxAgent:
-    def __init__(self, player_symbol, use_alpha_beta=True):
-        self.player_symbol = player_symbol
-        self.opponent_symbol = 'O' if player_symbol == 'X' else 'X'
-        self.use_alpha_beta = use_alpha_beta
-        self.nodes_evaluated = 0
+class TicTacToeMinimaxAgent(NegamaxSearch):
+    """Full-depth minimax agent for Tic Tac Toe: a configuration of the shared NegamaxSearch."""
+    
+    def __init__(self, player_symbol, use_alpha_beta=True, move_ordering=False, verbose=True, pvs=None,
+                 symmetry=True, sink=None):
+        # True for center/corner/edge, killer and history ordering, or a MoveOrderer to plug in
+        if move_ordering is True:
+            move_ordering = MoveOrderer(static_order=TICTACTOE_STATIC_ORDER)
+        # Null-window search only pays off when the first move tried is usually the best
+        if pvs is None:
+            pvs = bool(move_ordering)
+        super().__init__(player_symbol, win_score=10, use_alpha_beta=use_alpha_beta,
+                         move_orderer=move_ordering or None, pvs=pvs, verbose=verbose, symmetry=symmetry, sink=sink)
+
+
+class MNKMinimaxAgent(NegamaxSearch):
+    """Depth-limited minimax for m,n,k games of any size (see games/tictactoe.py).
+    
+    Leaves are scored by the game's incrementally kept line evaluation.
+    Boards with more than `sparse_above` cells only search empty cells
+    within `candidate_radius` of a stone, which keeps a 15x15 board's
+    branching factor near the number of stones rather than 225.
+    """
+    
+    def __init__(self, player_symbol, max_depth=3, move_time_ms=None, tt_size_mb=16, move_ordering=True,
+                 candidate_radius=1, sparse_above=25, verbose=True, pvs=None, symmetry=True, sink=None):
+        tt = TranspositionTable(tt_size_mb) if tt_size_mb else None
+        if move_ordering is True:
+            # The center-out static order is filled in once the board size is known
+            move_ordering = MoveOrderer()
+        if pvs is None:
+            pvs = tt is not None
+        # Above every line score the evaluation can reach on a 19x19 board
+        super().__init__(player_symbol, win_score=10 ** 7, max_depth=max_depth, tt=tt,
+                         move_orderer=move_ordering or None, move_time_ms=move_time_ms, pvs=pvs, verbose=verbose,
+                         symmetry=symmetry, sink=sink)
+        self.candidate_radius = candidate_radius
+        self.sparse_above = sparse_above
+        self._board_size = None
         
     def get_move(self, game):
-        self.nodes_evaluated = 0
-        start_time = time.time()
-        
-        if self.use_alpha_beta:
-            best_score = float('-inf')
-            best_move = None
-            
-            for move in game.get_valid_moves():
-                # Create a deep copy to avoid modifying the original game
-                game_copy = deepcopy(game)
-                row, col = move
-                game_copy.make_move(row, col)
-                
-                score = self.minimax(game_copy, 0, False, float('-inf'), float('inf'))
-                
-                if score > best_score:
-                    best_score = score
-                    best_move = move
-        else:
-            best_score = float('-inf')
-            best_move = None
-            
-            for move in game.get_valid_moves():
-                # Create a deep copy to avoid modifying the original game
-                game_copy = deepcopy(game)
-                row, col = move
-                game_copy.make_move(row, col)
-                
-                score = self.minimax_no_pruning(game_copy, 0, False)
-                
-                if score > best_score:
-                    best_score = score
-                    best_move = move
-        
-        end_time = time.time()
-        print(f"Minimax agent evaluated {self.nodes_evaluated} nodes in {end_time - start_time:.2f} seconds")
-        return best_move
+        size = (game.rows, game.cols)
+        if size != self._board_size:
+            self._board_size = size
+            if self.move_orderer is not None:
+                self.move_orderer.set_static_order(center_out_cells(game.rows, game.cols))
+            sparse = game.rows * game.cols > self.sparse_above
+            self.prefilter = self._candidate_moves if sparse else None
+        return super().get_move(game)
     
-    def minimax(self, game, depth, is_maximizing, alpha, beta):
-        self.nodes_evaluated += 1
-        
-        if game.winner == self.player_symbol:
-            return 10 - depth
-        elif game.winner == self.opponent_symbol:
-            return depth - 10
-        elif game.game_over:  # Draw
-            return 0
-            
-        if is_maximizing:
-            max_eval = float('-inf')
-            for move in game.get_valid_moves():
-                game_copy = deepcopy(game)
-                row, col = move
-                game_copy.make_move(row, col)
-                
-                eval = self.minimax(game_copy, depth + 1, False, alpha, beta)
-                max_eval = max(max_eval, eval)
-                
-                alpha = max(alpha, eval)
-                if beta <= alpha:
-                    break
-                    
-            return max_eval
-        else:
-            min_eval = float('inf')
-            for move in game.get_valid_moves():
-                game_copy = deepcopy(game)
-                row, col = move
-                game_copy.make_move(row, col)
-                
-                eval = self.minimax(game_copy, depth + 1, True, alpha, beta)
-                min_eval = min(min_eval, eval)
-                
-                beta = min(beta, eval)
-                if beta <= alpha:
-                    break
-                    
-            return min_eval
+    def _candidate_moves(self, game):
+        return 'open', game.candidate_moves(self.candidate_radius)
+
+
+class TicTacToePerfectAgent:
+    """Plays perfectly by looking moves up in a precomputed table.
     
-    def minimax_no_pruning(self, game, depth, is_maximizing):
-        self.nodes_evaluated += 1
+    The table covers every reachable position, so a move is one base-3
+    encode and one array read. Pass table_path to load the table from (or
+    build and save it to) a file instead of building it in memory.
+    """
+    def __init__(self, player_symbol, table_path=None):
+        self.player_symbol = player_symbol
+        self.table = get_table(table_path)
+        self.nodes_evaluated = 0
         
-        if game.winner == self.player_symbol:
-            return 10 - depth
-        elif game.winner == self.opponent_symbol:
-            return depth - 10
-        elif game.game_over:  # Draw
-            return 0
-            
-        if is_maximizing:
-            max_eval = float('-inf')
-            for move in game.get_valid_moves():
-                game_copy = deepcopy(game)
-                row, col = move
-                game_copy.make_move(row, col)
-                
-                eval = self.minimax_no_pruning(game_copy, depth + 1, False)
-                max_eval = max(max_eval, eval)
-                    
-            return max_eval
-        else:
-            min_eval = float('inf')
-            for move in game.get_valid_moves():
-                game_copy = deepcopy(game)
-                row, col = move
-                game_copy.make_move(row, col)
-                
-                eval = self.minimax_no_pruning(game_copy, depth + 1, True)
-                min_eval = min(min_eval, eval)
-                    
-            return min_eval
+    def get_move(self, game):
+        return self.table.best_move(game.board)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,199 @@
+import sys
+import os
+from array import array
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# A board is a base-3 number: cell row * 3 + col contributes digit
+# 0 (empty), 1 (X) or 2 (O) times 3 ** (row * 3 + col)
+CELL_DIGITS = {' ': 0, 'X': 1, 'O': 2}
+NUM_CODES = 3 ** 9
+NO_MOVE = -1
+TABLE_MAGIC = b'TTT1'
+
+LINES = [(0, 1, 2), (3, 4, 5), (6, 7, 8), (0, 3, 6), (1, 4, 7), (2, 5, 8), (0, 4, 8), (2, 4, 6)]
+
+def _symmetries():
+    """The 8 board symmetries as permutations: cell i of the image is cell perm[i]."""
+    identity = list(range(9))
+    rotate = [6, 3, 0, 7, 4, 1, 8, 5, 2]
+    mirror = [2, 1, 0, 5, 4, 3, 8, 7, 6]
+    perms = []
+    perm = identity
+    for _ in range(4):
+        perms.append(perm)
+        perms.append([perm[i] for i in mirror])
+        perm = [perm[i] for i in rotate]
+    return perms
+
+SYMMETRIES = _symmetries()
+POWERS = [3 ** i for i in range(9)]
+
+def encode_board(board):
+    """Base-3 code of a 3x3 board given as a list of rows."""
+    code = 0
+    power = 1
+    for row in board:
+        for cell in row:
+            code += CELL_DIGITS[cell] * power
+            power *= 3
+    return code
+
+def decode_cells(code):
+    cells = []
+    for _ in range(9):
+        cells.append(code % 3)
+        code //= 3
+    return cells
+
+def canonicalize(cells):
+    """Return (canonical_code, perm) with the smallest code over the 8 symmetries.
+
+    Cell i of the canonical board is cell perm[i] of the original one.
+    """
+    best = None
+    for perm in SYMMETRIES:
+        code = sum(cells[perm[i]] * POWERS[i] for i in range(9))
+        if best is None or code < best[0]:
+            best = (code, perm)
+    return best
+
+def _winner(cells):
+    for a, b, c in LINES:
+        if cells[a] and cells[a] == cells[b] == cells[c]:
+            return cells[a]
+    return 0
+
+class PerfectPlayTable:
+    """Optimal move and value for every reachable tic-tac-toe position.
+
+    ``moves[code]`` is the best cell (row * 3 + col) for the side to move
+    and ``values[code]`` its negamax value for that side: positive wins
+    (larger is sooner), 0 draws, negative loses (closer to 0 is later).
+    Unreachable and finished positions hold NO_MOVE. Only the 765
+    symmetry classes are solved; every reachable board is then filled in
+    from its class so lookups need no transform.
+    """
+
+    def __init__(self, moves=None, values=None):
+        if moves is None:
+            moves, values = self._build()
+        self.moves = moves
+        self.values = values
+
+    @staticmethod
+    def _build():
+        solved = {}  # canonical code -> (value, best canonical cell)
+
+        def solve(cells, filled):
+            code, _ = canonicalize(cells)
+            if code in solved:
+                return solved[code][0]
+
+            # Solve the canonical board so stored moves are in its frame
+            canonical = decode_cells(code)
+            if _winner(canonical):
+                # The previous mover won; losing later is less bad
+                result = (filled - 10, NO_MOVE)
+            elif filled == 9:
+                result = (0, NO_MOVE)
+            else:
+                piece = 1 if filled % 2 == 0 else 2
+                result = None
+                for cell in range(9):
+                    if canonical[cell]:
+                        continue
+                    canonical[cell] = piece
+                    value = -solve(canonical, filled + 1)
+                    canonical[cell] = 0
+                    if result is None or value > result[0]:
+                        result = (value, cell)
+            solved[code] = result
+            return result[0]
+
+        solve([0] * 9, 0)
+
+        moves = array('b', [NO_MOVE]) * NUM_CODES
+        values = array('b', [0]) * NUM_CODES
+        seen = set()
+        stack = [[0] * 9]
+        while stack:
+            cells = stack.pop()
+            code = sum(cells[i] * POWERS[i] for i in range(9))
+            if code in seen:
+                continue
+            seen.add(code)
+
+            canonical_code, perm = canonicalize(cells)
+            value, canonical_move = solved[canonical_code]
+            values[code] = value
+            if canonical_move == NO_MOVE:
+                continue
+            moves[code] = perm[canonical_move]
+
+            filled = 9 - cells.count(0)
+            piece = 1 if filled % 2 == 0 else 2
+            for cell in range(9):
+                if not cells[cell]:
+                    child = cells[:]
+                    child[cell] = piece
+                    stack.append(child)
+        return moves, values
+
+    def best_move(self, board):
+        """Best (row, col) for the side to move, or None if the game is over."""
+        move = self.moves[encode_board(board)]
+        if move == NO_MOVE:
+            return None
+        return divmod(move, 3)
+
+    def value(self, board):
+        return self.values[encode_board(board)]
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            f.write(TABLE_MAGIC)
+            self.moves.tofile(f)
+            self.values.tofile(f)
+
+    @classmethod
+    def load(cls, path):
+        moves = array('b')
+        values = array('b')
+        with open(path, 'rb') as f:
+            if f.read(len(TABLE_MAGIC)) != TABLE_MAGIC:
+                raise ValueError(f"{path} is not a tic-tac-toe table")
+            moves.fromfile(f, NUM_CODES)
+            values.fromfile(f, NUM_CODES)
+        return cls(moves, values)
+
+
+_default_table = None
+
+def get_table(path=None):
+    """Load the table from `path` if it exists, otherwise build it (and save it there)."""
+    global _default_table
+    if path is None:
+        if _default_table is None:
+            _default_table = PerfectPlayTable()
+        return _default_table
+
+    if os.path.exists(path):
+        return PerfectPlayTable.load(path)
+    table = PerfectPlayTable()
+    table.save(path)
+    return table
+
+
+if __name__ == "__main__":
+    import time
+
+    start = time.perf_counter()
+    table = PerfectPlayTable()
+    print(f"Built table in {(time.perf_counter() - start) * 1000:.1f} ms, "
+          f"{sum(1 for move in table.moves if move != NO_MOVE)} positions with a move")
+    if len(sys.argv) > 1:
+        table.save(sys.argv[1])
+        start = time.perf_counter()
+        PerfectPlayTable.load(sys.argv[1])
+        print(f"Saved to {sys.argv[1]}, loads in {(time.perf_counter() - start) * 1000:.2f} ms")
@@ -0,0 +1,99 @@
+EXACT = 0
+LOWER_BOUND = 1
+UPPER_BOUND = 2
+
+class TranspositionTable:
+    """Fixed-size hash table of search results keyed by Zobrist hash.
+
+    Each entry is a tuple ``(key, depth, score, flag, move, generation)``
+    where ``depth`` is the remaining search depth below the position and
+    ``flag`` says whether ``score`` is exact or a lower/upper bound.
+
+    Replacement policies:
+    - ``'depth'``: one slot per index, kept unless the new entry was
+      searched at least as deep or the old one is from a previous search.
+    - ``'two_tier'``: two slots per index, a depth-preferred slot plus an
+      always-replace slot that catches whatever the first one rejects.
+    """
+
+    # Approximate CPython footprint of one stored entry tuple and its ints
+    ENTRY_BYTES = 144
+
+    def __init__(self, size_mb=16, replacement='depth'):
+        if replacement not in ('depth', 'two_tier'):
+            raise ValueError(f"Unknown replacement policy: {replacement}")
+
+        self.replacement = replacement
+        self.ways = 2 if replacement == 'two_tier' else 1
+        total_slots = max(self.ways, int(size_mb * 1024 * 1024) // self.ENTRY_BYTES)
+        self.num_buckets = total_slots // self.ways
+        self.slots = [None] * (self.num_buckets * self.ways)
+        self.generation = 0
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0
+
+    def new_search(self):
+        """Start a new search: bump the age and clear the per-search counters.
+
+        Entries from older searches stay around for their best move, but
+        their scores are not trusted since they were computed from a
+        different root.
+        """
+        self.generation += 1
+        self.reset_stats()
+
+    def clear(self):
+        self.slots = [None] * (self.num_buckets * self.ways)
+
+    def probe(self, key):
+        """Return the entry stored for ``key``, or None if there isn't one."""
+        base = (key % self.num_buckets) * self.ways
+        occupied = False
+        for slot in range(base, base + self.ways):
+            entry = self.slots[slot]
+            if entry is None:
+                continue
+            if entry[0] == key:
+                self.hits += 1
+                return entry
+            occupied = True
+
+        self.misses += 1
+        if occupied:
+            # The index was taken by a different position
+            self.collisions += 1
+        return None
+
+    def store(self, key, depth, score, flag, move):
+        base = (key % self.num_buckets) * self.ways
+        entry = (key, depth, score, flag, move, self.generation)
+        current = self.slots[base]
+
+        if (current is None or current[0] == key or current[5] != self.generation
+                or depth >= current[1]):
+            self.slots[base] = entry
+        elif self.ways == 2:
+            self.slots[base + 1] = entry
+
+    def is_current(self, entry):
+        return entry[5] == self.generation
+
+    def stats(self):
+        probes = self.hits + self.misses
+        if probes == 0:
+            return {'probes': 0, 'hit_rate': 0.0, 'miss_rate': 0.0, 'collision_rate': 0.0}
+        return {
+            'probes': probes,
+            'hit_rate': self.hits / probes,
+            'miss_rate': self.misses / probes,
+            'collision_rate': self.collisions / probes
+        }
+
+    def describe(self):
+        stats = self.stats()
+        return (f"TT hits {stats['hit_rate']:.1%}, misses {stats['miss_rate']:.1%}, "
+                f"collisions {stats['collision_rate']:.1%}")
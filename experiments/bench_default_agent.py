@@ -0,0 +1,77 @@
+import sys
+import os
+import random
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from games.tictactoe import TicTacToe
+from games.connect4 import Connect4
+from agents.default_agent import DefaultAgent
+
+class CopyingDefaultAgent(DefaultAgent):
+    """The previous DefaultAgent: play each candidate for real, then restore a saved state."""
+
+    def _find_critical_move(self, game, player_symbol):
+        valid_moves = game.get_valid_moves()
+        original_state = game.get_state()
+
+        for move in valid_moves:
+            game.current_player = player_symbol
+            if hasattr(game, 'make_move'):
+                row, col = move
+                game.make_move(row, col)
+            else:
+                game.drop_piece(move)
+
+            won = game.winner == player_symbol
+            game.set_state(original_state)
+            if won:
+                return move
+
+        return None
+
+def random_positions(game_class, count, seed=0):
+    """Unfinished positions reached by random play."""
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        game = game_class()
+        for _ in range(rng.randint(0, 30)):
+            moves = game.get_valid_moves()
+            if not moves:
+                break
+            move = rng.choice(moves)
+            if game_class is TicTacToe:
+                game.make_move(*move)
+            else:
+                game.drop_piece(move)
+        if not game.game_over:
+            positions.append(game)
+    return positions
+
+def time_agent(agent_class, positions, seed=0):
+    """Average get_move latency in microseconds, and the moves chosen."""
+    random.seed(seed)
+    moves = []
+    start = time.perf_counter()
+    for game in positions:
+        agent = agent_class(game.current_player)
+        moves.append(agent.get_move(game))
+    elapsed = time.perf_counter() - start
+    return elapsed / len(positions) * 1e6, moves
+
+def benchmark(num_positions=5000, seed=0):
+    results = {}
+    for name, game_class in (('tictactoe', TicTacToe), ('connect4', Connect4)):
+        positions = random_positions(game_class, num_positions, seed)
+        before, before_moves = time_agent(CopyingDefaultAgent, positions, seed)
+        after, after_moves = time_agent(DefaultAgent, positions, seed)
+        if before_moves != after_moves:
+            raise AssertionError(f"DefaultAgent chose different moves on {name}")
+        print(f"{name}: {before:.1f} us/move before, {after:.1f} us/move after ({before / after:.1f}x)")
+        results[name] = (before, after)
+    return results
+
+
+if __name__ == "__main__":
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
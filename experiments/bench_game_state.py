@@ -0,0 +1,54 @@
+import sys
+import os
+import time
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from games.tictactoe import TicTacToe
+from games.connect4 import Connect4
+from experiments.bench_default_agent import random_positions
+
+def bytes_per_game(game_class, count=20000, seed=0):
+    """Memory held by `count` live games from random play, per game."""
+    tracemalloc.start()
+    games = random_positions(game_class, count, seed)
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return allocated / len(games)
+
+def time_operation(operation, positions, repeat=5):
+    """Average microseconds of operation(game) over the positions."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for game in positions:
+            operation(game)
+    return (time.perf_counter() - start) / (repeat * len(positions)) * 1e6
+
+def benchmark(num_positions=2000, seed=0):
+    """Print and return memory and timings per game class.
+
+    Connect 4's get_state and set_state convert between rows of symbols and
+    the bitboards, so they stay a few times slower than copying the list
+    board the bitboards replaced; snapshot() and restore() are the cheap
+    way to save and load a position.
+    """
+    results = {}
+    for name, game_class in (('tictactoe', TicTacToe), ('connect4', Connect4)):
+        positions = random_positions(game_class, num_positions, seed)
+        fresh = game_class()
+        snapshots = [game.snapshot() for game in positions]
+        results[name] = {
+            'bytes_per_game': bytes_per_game(game_class, seed=seed),
+            'get_state + set_state': time_operation(lambda game: fresh.set_state(game.get_state()), positions),
+            'clone': time_operation(lambda game: game.clone(), positions),
+            'snapshot': time_operation(lambda game: game.snapshot(), positions),
+            'restore': time_operation(lambda snapshot: fresh.restore(snapshot), snapshots)
+        }
+        timings = ', '.join(f"{operation} {micros:.1f} us" for operation, micros in results[name].items()
+                            if operation != 'bytes_per_game')
+        print(f"{name}: {results[name]['bytes_per_game']:.0f} bytes per live game; {timings}")
+    return results
+
+
+if __name__ == "__main__":
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -0,0 +1,238 @@
+import sys
+import os
+import argparse
+import json
+import platform
+import random
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from games.tictactoe import TicTacToe
+from games.connect4 import Connect4
+from agents.connect4_agents import Connect4MinimaxAgent
+from agents.tictactoe_agents import TicTacToeMinimaxAgent
+
+# Position suites: (moves from the empty board, known-best moves or None when no move is known to be best).
+# Connect 4 best moves were found by exhaustive search (endgame), by a forced win or the only defence
+# within 8 plies (tactical), or are textbook (the center opening). Tic Tac Toe ones are exact.
+SUITES = {
+    'connect4': {
+        'opening': [
+            ([], [3]),
+            ([3], [3]),
+            ([3, 3], None),
+            ([2, 3, 3], None),
+            ([3, 2, 4], None)
+        ],
+        'midgame': [
+            ([3, 3, 2, 4, 4, 2, 5, 1, 3, 3], None),
+            ([3, 2, 3, 3, 4, 5, 2, 4, 1, 1, 0, 6], None),
+            ([5, 0, 0, 4, 4, 3, 0, 1, 5, 4, 2, 6], None),
+            ([2, 3, 3, 4, 4, 2, 2, 3, 5, 5, 4, 1, 1, 6], None)
+        ],
+        'tactical': [
+            ([1, 5, 1, 6, 3, 2, 0, 3, 6, 4, 5, 0, 1, 5, 5], [1]),
+            ([3, 0, 3, 6, 2, 4, 4, 1, 4, 3, 3, 6, 2], [1]),
+            ([1, 4, 4, 1, 6, 0, 6, 4, 6, 6, 6, 2, 0, 6, 5, 0, 0, 0, 3, 0], [2, 3]),
+            ([4, 6, 3, 0, 4, 4, 1, 4, 0, 2, 2, 2, 4, 4, 0, 3, 2, 0, 0], [3, 5]),
+            ([4, 3, 3, 5, 5, 2, 3, 2, 2, 3, 3, 1], [0]),
+            ([4, 4, 2, 0, 2, 4, 4, 2, 4, 2], [3])
+        ],
+        'endgame': [
+            ([6, 6, 1, 0, 2, 5, 5, 1, 4, 3, 2, 1, 6, 0, 0, 4, 1, 2, 6, 6, 6, 4, 1, 2, 2, 5, 0], [3, 5]),
+            ([0, 5, 3, 1, 6, 0, 2, 6, 6, 0, 0, 6, 0, 5, 3, 6, 5, 2, 4, 2, 6, 0, 1, 5, 5, 5, 2, 1], [3]),
+            ([1, 2, 6, 1, 1, 4, 4, 2, 1, 6, 5, 4, 6, 2, 5, 5, 6, 3, 4, 6, 4, 4, 2, 1, 2], [5]),
+            ([0, 6, 2, 5, 4, 4, 4, 0, 5, 3, 4, 2, 0, 5, 2, 5, 5, 4, 5, 1, 6, 6, 6, 6, 1, 1], [0]),
+            ([3, 2, 0, 6, 0, 3, 0, 6, 1, 5, 1, 3, 3, 3, 5, 0, 4, 6, 3, 1, 6, 4, 2, 0, 4], [2])
+        ]
+    },
+    'tictactoe': {
+        'opening': [
+            ([], None),
+            ([(1, 1)], [(0, 0), (0, 2), (2, 0), (2, 2)]),
+            ([(0, 0)], [(1, 1)]),
+            ([(0, 1)], [(0, 0), (0, 2), (1, 1), (2, 1)])
+        ],
+        'midgame': [
+            ([(0, 0), (1, 1), (2, 2)], [(0, 1), (1, 0), (1, 2), (2, 1)]),
+            ([(1, 1), (0, 0), (2, 2)], [(0, 2), (2, 0)]),
+            ([(0, 1), (1, 1), (2, 1)], [(0, 0), (0, 2), (1, 0), (1, 2), (2, 0), (2, 2)])
+        ],
+        'tactical': [
+            ([(0, 0), (1, 1), (0, 1)], [(0, 2)]),
+            ([(0, 0), (1, 0), (1, 1), (2, 0)], [(2, 2)]),
+            ([(0, 0), (1, 1), (2, 2), (0, 2)], [(2, 0)]),
+            ([(1, 1), (0, 1), (0, 0)], [(2, 2)]),
+            ([(1, 1), (0, 0), (2, 2), (0, 2), (0, 1)], [(2, 1)])
+        ],
+        'endgame': [
+            ([(0, 0), (1, 1), (0, 2), (0, 1), (2, 1), (1, 0)], [(1, 2)]),
+            ([(1, 1), (0, 0), (2, 2), (0, 2), (0, 1), (2, 1), (1, 0)], [(1, 2)]),
+            ([(0, 1), (1, 1), (2, 1), (0, 0), (2, 2), (2, 0)], [(0, 2), (1, 0), (1, 2)])
+        ]
+    }
+}
+
+GAMES = {
+    'connect4': Connect4,
+    'tictactoe': TicTacToe
+}
+
+# Connect 4 depth per suite; None searches to the end of the game
+CONNECT4_DEPTHS = {'opening': 7, 'midgame': 7, 'tactical': 8, 'endgame': None}
+
+def make_agent(game_name, suite, symbol):
+    """The engine configuration every build is measured with."""
+    if game_name == 'connect4':
+        # An effectively unlimited time budget deepens iteratively to the depth, timing every iteration
+        return Connect4MinimaxAgent(symbol, max_depth=CONNECT4_DEPTHS[suite], move_time_ms=10 ** 9,
+                                    tt_size_mb=16, move_ordering=True, verbose=False)
+    return TicTacToeMinimaxAgent(symbol, move_ordering=True, verbose=False)
+
+def _plain(move):
+    """A move as it reads back from JSON: Tic Tac Toe cells become lists."""
+    return list(move) if isinstance(move, tuple) else move
+
+def run_position(game_name, suite, index, moves, best_moves, repeat=3):
+    """Search one position `repeat` times and keep the fastest run (nodes are the same every run)."""
+    game = GAMES[game_name]()
+    for move in moves:
+        game.make(move)
+    if game.game_over:
+        raise ValueError(f"{game_name}/{suite}/{index} is a finished game")
+
+    best = None
+    for _ in range(repeat):
+        random.seed(0)
+        agent = make_agent(game_name, suite, game.current_player)
+        start = time.perf_counter()
+        move, stats = agent.get_move_with_stats(game)
+        seconds = time.perf_counter() - start
+        if best is None or seconds < best[2]:
+            best = (move, stats, seconds)
+
+    move, stats, seconds = best
+    # Cumulative time to finish each depth of the iterative deepening
+    time_to_depth = {}
+    elapsed = 0.0
+    for depth, depth_seconds, _ in stats.depth_times:
+        elapsed += depth_seconds
+        time_to_depth[str(depth)] = elapsed
+    return {
+        'key': f"{game_name}/{suite}/{index}",
+        'game': game_name,
+        'suite': suite,
+        'moves': [_plain(played) for played in moves],
+        'move': _plain(move),
+        'score': stats.score,
+        'best_moves': None if best_moves is None else [_plain(best_move) for best_move in best_moves],
+        'correct': None if best_moves is None else move in best_moves,
+        'nodes': stats.nodes,
+        'seconds': seconds,
+        'nps': stats.nodes / seconds if seconds else 0.0,
+        'time_to_depth': time_to_depth
+    }
+
+def run_benchmark(games=None, suites=None, repeat=3):
+    results = []
+    for game_name in games or SUITES:
+        for suite, positions in SUITES[game_name].items():
+            if suites and suite not in suites:
+                continue
+            for index, (moves, best_moves) in enumerate(positions):
+                results.append(run_position(game_name, suite, index, moves, best_moves, repeat))
+    return results
+
+def summarize(results):
+    """Totals per game/suite: nodes, seconds, NPS and how many known-best moves were found."""
+    totals = {}
+    for result in results:
+        total = totals.setdefault(f"{result['game']}/{result['suite']}",
+                                  {'positions': 0, 'nodes': 0, 'seconds': 0.0, 'correct': 0, 'known': 0})
+        total['positions'] += 1
+        total['nodes'] += result['nodes']
+        total['seconds'] += result['seconds']
+        if result['correct'] is not None:
+            total['known'] += 1
+            total['correct'] += result['correct']
+    for total in totals.values():
+        total['nps'] = total['nodes'] / total['seconds'] if total['seconds'] else 0.0
+    return totals
+
+def compare(results, baseline, threshold=0.05, time_threshold=0.25, min_seconds=0.005):
+    """Regressions against a baseline run: (key, what, baseline value, new value) tuples.
+
+    Node counts are deterministic, so they use the tight threshold; times
+    are noisy and only count above min_seconds. A known-best move that is
+    no longer found is always a regression.
+    """
+    previous = {result['key']: result for result in baseline['results']}
+    regressions = []
+    for result in results:
+        old = previous.get(result['key'])
+        if old is None:
+            continue
+        if old['moves'] != result['moves']:
+            raise ValueError(f"{result['key']} is a different position in the baseline")
+        if result['nodes'] > old['nodes'] * (1 + threshold):
+            regressions.append((result['key'], 'nodes', old['nodes'], result['nodes']))
+        if result['seconds'] > min_seconds and result['seconds'] > old['seconds'] * (1 + time_threshold):
+            regressions.append((result['key'], 'seconds', old['seconds'], result['seconds']))
+        if old['correct'] and result['correct'] is False:
+            regressions.append((result['key'], 'correct', old['move'], result['move']))
+    return regressions
+
+def print_report(results, baseline=None, regressions=()):
+    totals = summarize(results)
+    old_totals = summarize(baseline['results']) if baseline else {}
+    for name, total in totals.items():
+        line = (f"{name}: {total['positions']} positions, {total['nodes']} nodes, {total['seconds']:.3f}s, "
+                f"{total['nps']:.0f} nodes/s, {total['correct']}/{total['known']} known-best moves")
+        old = old_totals.get(name)
+        if old and old['nodes']:
+            line += f" (nodes {total['nodes'] / old['nodes'] - 1:+.1%}, time {total['seconds'] / old['seconds'] - 1:+.1%})"
+        print(line)
+    if baseline is not None:
+        if regressions:
+            print(f"\n{len(regressions)} regressions:")
+            for key, what, old, new in regressions:
+                print(f"  {key} {what}: {old} -> {new}")
+        else:
+            print("\nNo regressions")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the minimax agents on fixed position suites')
+    parser.add_argument('--output', default=None, help='Write the results as JSON, to use as a later baseline')
+    parser.add_argument('--baseline', default=None, help='Results JSON of an earlier build to compare against')
+    parser.add_argument('--game', choices=list(SUITES), action='append', help='Only this game (repeatable)')
+    parser.add_argument('--suite', choices=['opening', 'midgame', 'tactical', 'endgame'], action='append',
+                        help='Only this suite (repeatable)')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per position; the fastest is kept')
+    parser.add_argument('--threshold', type=float, default=0.05, help='Allowed node count increase')
+    parser.add_argument('--time-threshold', type=float, default=0.25, help='Allowed time increase')
+    args = parser.parse_args(argv)
+
+    results = run_benchmark(args.game, args.suite, args.repeat)
+    record = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'results': results,
+        'totals': summarize(results)
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(record, f, indent=1)
+
+    baseline = None
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold, args.time_threshold)
+    print_report(results, baseline, regressions)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
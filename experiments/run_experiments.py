@@ -0,0 +1,253 @@
+import sys
+import os
+import csv
+import json
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from games.tictactoe import TicTacToe
+from games.connect4 import Connect4
+from games.records import RecordWriter, record_from_result
+from agents.tictactoe_agents import TicTacToeDefaultAgent, TicTacToeMinimaxAgent, TicTacToePerfectAgent
+from agents.connect4_agents import Connect4DefaultAgent, Connect4MinimaxAgent, Connect4MCTSAgent
+
+GAMES = {
+    'tictactoe': TicTacToe,
+    'connect4': Connect4
+}
+
+AGENT_TYPES = {
+    'tictactoe': {
+        'default': TicTacToeDefaultAgent,
+        'minimax': TicTacToeMinimaxAgent,
+        'perfect': TicTacToePerfectAgent
+    },
+    'connect4': {
+        'default': Connect4DefaultAgent,
+        'minimax': Connect4MinimaxAgent,
+        'mcts': Connect4MCTSAgent
+    }
+}
+
+CSV_FIELDS = ['game_index', 'seed', 'game', 'player_x', 'player_o', 'winner', 'num_moves', 'moves',
+              'nodes_x', 'nodes_o', 'time_per_move_x', 'time_per_move_o']
+
+def make_agent(game_name, spec, symbol, seed=None):
+    """Build an agent from a spec such as ('minimax', {'max_depth': 4}).
+
+    An MCTS agent without a seed in its spec gets one derived from `seed`
+    and its symbol, so its playouts replay with the game.
+    """
+    kind, options = spec
+    agent_class = AGENT_TYPES[game_name][kind]
+    if kind == 'mcts' and seed is not None and 'seed' not in options:
+        options = dict(options, seed=seed * 2 + (symbol == 'O'))
+    if kind in ('minimax', 'mcts'):
+        # Search agents print a summary per move unless told otherwise
+        return agent_class(symbol, verbose=False, **options)
+    return agent_class(symbol, **options)
+
+def describe_agent(spec):
+    kind, options = spec
+    if not options:
+        return kind
+    return kind + '(' + ', '.join(f"{key}={value}" for key, value in sorted(options.items())) + ')'
+
+def play_single_game(game_name, spec_x, spec_o, seed, game_index=0):
+    """Play one silent game and return its result record.
+
+    The global RNG is reseeded first, so a game is reproducible from its
+    seed no matter which worker process runs it.
+    """
+    random.seed(seed)
+    game = GAMES[game_name]()
+    agents = {'X': make_agent(game_name, spec_x, 'X', seed), 'O': make_agent(game_name, spec_o, 'O', seed)}
+    moves = []
+    nodes = {'X': 0, 'O': 0}
+    think_time = {'X': 0.0, 'O': 0.0}
+    move_counts = {'X': 0, 'O': 0}
+
+    while not game.game_over:
+        symbol = game.current_player
+        agent = agents[symbol]
+        start = time.perf_counter()
+        move = agent.get_move(game)
+        think_time[symbol] += time.perf_counter() - start
+        nodes[symbol] += getattr(agent, 'nodes_evaluated', 0)
+        move_counts[symbol] += 1
+
+        if game_name == 'tictactoe':
+            row, col = move
+            legal = game.make_move(row, col)
+        else:
+            legal = game.drop_piece(move)
+        if not legal:
+            raise ValueError(f"Player {symbol} played illegal move {move}")
+        moves.append(move)
+
+    for agent in agents.values():
+        if hasattr(agent, 'close'):
+            agent.close()
+
+    return {
+        'game_index': game_index,
+        'seed': seed,
+        'game': game_name,
+        'player_x': describe_agent(spec_x),
+        'player_o': describe_agent(spec_o),
+        'winner': game.winner,
+        'num_moves': len(moves),
+        'moves': [list(move) if isinstance(move, tuple) else move for move in moves],
+        'nodes_x': nodes['X'],
+        'nodes_o': nodes['O'],
+        'time_per_move_x': think_time['X'] / max(move_counts['X'], 1),
+        'time_per_move_o': think_time['O'] / max(move_counts['O'], 1)
+    }
+
+def _play_game_task(args):
+    return play_single_game(*args)
+
+class ResultSink:
+    """Streams game records to a JSON lines, CSV or game record (.grec) file, picked by extension.
+
+    Game record files keep only each game's moves and result, compactly;
+    read them back with games.records.read_records.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.format = 'csv' if path.endswith('.csv') else 'grec' if path.endswith('.grec') else 'jsonl'
+        self.writer = None
+        if self.format == 'grec':
+            if os.path.exists(path):
+                os.remove(path)
+            self.writer = RecordWriter(path)
+            self.file = self.writer.file
+            return
+        self.file = open(path, 'w', newline='')
+        if self.format == 'csv':
+            self.writer = csv.DictWriter(self.file, fieldnames=CSV_FIELDS)
+            self.writer.writeheader()
+
+    def write(self, record):
+        if self.format == 'csv':
+            row = dict(record)
+            row['moves'] = ' '.join(
+                ','.join(str(part) for part in move) if isinstance(move, list) else str(move)
+                for move in record['moves'])
+            self.writer.writerow(row)
+        elif self.format == 'grec':
+            self.writer.write(record_from_result(record))
+        else:
+            self.file.write(json.dumps(record) + '\n')
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+class TournamentSummary:
+    """Running totals per agent description, across both colors."""
+
+    def __init__(self):
+        self.games = 0
+        self.draws = 0
+        self.stats = {}
+
+    def _agent(self, name):
+        if name not in self.stats:
+            self.stats[name] = {'games': 0, 'wins': 0, 'losses': 0, 'draws': 0, 'nodes': 0,
+                                'time_per_move': 0.0}
+        return self.stats[name]
+
+    def add(self, record):
+        self.games += 1
+        if record['winner'] is None:
+            self.draws += 1
+        for symbol, name in (('X', record['player_x']), ('O', record['player_o'])):
+            stats = self._agent(name)
+            stats['games'] += 1
+            stats['nodes'] += record['nodes_' + symbol.lower()]
+            stats['time_per_move'] += record['time_per_move_' + symbol.lower()]
+            if record['winner'] is None:
+                stats['draws'] += 1
+            elif record['winner'] == symbol:
+                stats['wins'] += 1
+            else:
+                stats['losses'] += 1
+
+    def print_summary(self, elapsed):
+        print(f"\nPlayed {self.games} games in {elapsed:.2f} seconds ({self.draws} draws)")
+        for name, stats in sorted(self.stats.items()):
+            games = max(stats['games'], 1)
+            print(f"{name}:")
+            print(f"  Wins/Losses/Draws: {stats['wins']}/{stats['losses']}/{stats['draws']} "
+                  f"(win rate {stats['wins'] / games:.1%})")
+            print(f"  Average nodes per game: {stats['nodes'] / games:.0f}")
+            print(f"  Average time per move: {stats['time_per_move'] / games * 1000:.2f} ms")
+
+def run_tournament(game_name, agent_specs, num_games=10, workers=None, seed=0, output_path=None):
+    """Play every ordered pair of agent specs against each other num_games times.
+
+    Games are independent, so they are spread over a process pool and
+    recorded as they finish. Game i of a tournament always uses seed
+    `seed + i`, which makes any single game replayable on its own.
+    """
+    tasks = []
+    for spec_x in agent_specs:
+        for spec_o in agent_specs:
+            if spec_x is spec_o:
+                continue
+            for _ in range(num_games):
+                index = len(tasks)
+                tasks.append((game_name, spec_x, spec_o, seed + index, index))
+
+    summary = TournamentSummary()
+    sink = ResultSink(output_path) if output_path else None
+    start_time = time.time()
+    try:
+        if workers == 1:
+            for task in tasks:
+                record = play_single_game(*task)
+                summary.add(record)
+                if sink is not None:
+                    sink.write(record)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(_play_game_task, task) for task in tasks]
+                for future in as_completed(futures):
+                    record = future.result()
+                    summary.add(record)
+                    if sink is not None:
+                        sink.write(record)
+    finally:
+        if sink is not None:
+            sink.close()
+
+    summary.print_summary(time.time() - start_time)
+    return summary
+
+def run_tictactoe_tournament(num_games=10, workers=None, seed=0, output_path=None):
+    print("Tic Tac Toe Tournament")
+    print("======================")
+    agent_specs = [
+        ('default', {}),
+        ('minimax', {'use_alpha_beta': True, 'move_ordering': True}),
+        ('perfect', {})
+    ]
+    return run_tournament('tictactoe', agent_specs, num_games, workers, seed, output_path)
+
+def run_connect4_tournament(num_games=10, workers=None, seed=0, output_path=None, depth=4):
+    print("Connect 4 Tournament")
+    print("====================")
+    agent_specs = [
+        ('default', {}),
+        ('minimax', {'use_alpha_beta': True, 'max_depth': depth, 'move_ordering': True, 'tt_size_mb': 4})
+    ]
+    return run_tournament('connect4', agent_specs, num_games, workers, seed, output_path)
+
+
+if __name__ == "__main__":
+    run_tictactoe_tournament(num_games=10)
+    run_connect4_tournament(num_games=10)
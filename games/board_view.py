@@ -0,0 +1,45 @@
+class BoardView(tuple):
+    """A board, or one of its rows, that refuses writes with a message saying where they should go.
+
+    Returned by the games' ``board_view`` for callers that only inspect
+    cells and want a position that cannot change under them.
+    """
+    __slots__ = ()
+
+    def __setitem__(self, index, value):
+        raise TypeError("board_view is read-only; play moves with make(), or write cells through game.board")
+
+
+class WritableBoard(list):
+    """A game's rows as lists, like the board games used to store; writes are loaded back into the game.
+
+    Games keep their cells in bitboards or a bytearray and build ``board``
+    on every read, so without this ``game.board[r][c] = 'X'`` would be
+    lost. As with the old stored board, only the stones change: the side
+    to move, the winner and game_over are left as they are.
+    """
+    __slots__ = ('game',)
+
+    def __init__(self, game, rows):
+        super().__init__(BoardRow(self, row) for row in rows)
+        self.game = game
+
+    def __setitem__(self, index, row):
+        if isinstance(index, slice):
+            super().__setitem__(index, [BoardRow(self, cells) for cells in row])
+        else:
+            super().__setitem__(index, BoardRow(self, row))
+        self.game.board = self
+
+
+class BoardRow(list):
+    """One row of a WritableBoard."""
+    __slots__ = ('board',)
+
+    def __init__(self, board, cells):
+        super().__init__(cells)
+        self.board = board
+
+    def __setitem__(self, index, value):
+        super().__setitem__(index, value)
+        self.board.game.board = self.board
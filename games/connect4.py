@@ -1,41 +1,353 @@
-class Connect4:
-    def __init__(self):
-        self.rows = 6
-        self.cols = 7
-        self.board = [[' ' for _ in range(self.cols)] for _ in range(self.rows)]
+import sys
+import os
+import random
+from collections import namedtuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from games.board_view import BoardView, WritableBoard
+
+def zobrist_keys(rows=6, cols=7):
+    """Zobrist keys per symbol and bit index for a board size.
+
+    Seeded so hashes are stable across runs and processes; each column has
+    ``rows + 1`` bits, so the sentinel row gets keys too. The 6x7 keys are
+    the ones opening books were built with.
+    """
+    rng = random.Random(0x0C4)
+    return {symbol: [rng.getrandbits(64) for _ in range((rows + 1) * cols)] for symbol in 'XO'}
+
+def window_masks(rows=6, cols=7, length=4):
+    """Bitboard mask of every `length`-cell line segment on the board."""
+    stride = rows + 1
+    masks = []
+    for col in range(cols):
+        for height in range(rows):
+            # Up, right, up-right and down-right from (col, height)
+            for dcol, dheight in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                end_col = col + dcol * (length - 1)
+                end_height = height + dheight * (length - 1)
+                if end_col < cols and 0 <= end_height < rows:
+                    masks.append(sum(1 << ((col + dcol * i) * stride + height + dheight * i)
+                                     for i in range(length)))
+    return masks
+
+def window_scores(length=4):
+    """Score of a window by (own stones, opponent stones).
+
+    The only definition of the window weights: the incremental scores,
+    Connect4MinimaxAgent.rescan_board and the NumPy and threat evaluators
+    all read this table through board_tables().
+    """
+    scores = [[0] * (length + 1) for _ in range(length + 1)]
+    scores[length][0] = 100
+    scores[length - 1][0] = 5
+    if length > 2:
+        scores[length - 2][0] = 2
+    scores[0][length - 1] = -4
+    return scores
+
+_board_tables = {}
+
+def board_tables(rows, cols, n):
+    """(zobrist keys, window masks, windows through each bit, window scores, center mask), built once per size."""
+    key = (rows, cols, n)
+    if key not in _board_tables:
+        center = cols // 2
+        center_mask = sum(1 << (center * (rows + 1) + height) for height in range(rows))
+        masks = window_masks(rows, cols, n)
+        windows_through = [[] for _ in range((rows + 1) * cols)]
+        for window, mask in enumerate(masks):
+            for index in range(len(windows_through)):
+                if mask >> index & 1:
+                    windows_through[index].append(window)
+        _board_tables[key] = (zobrist_keys(rows, cols), masks, windows_through, window_scores(n), center_mask)
+    return _board_tables[key]
+
+ZOBRIST_KEYS, WINDOW_MASKS, WINDOWS_THROUGH, WINDOW_SCORES, CENTER_MASK = board_tables(6, 7, 4)
+
+_mirror_keys = {}
+
+def mirror_zobrist_keys(rows, cols):
+    """Zobrist keys indexed by bit but taken from the mirrored column.
+
+    XORing these instead of the regular keys hashes the left-right mirror
+    image of a position, so both hashes can be kept up to date together.
+    """
+    if (rows, cols) not in _mirror_keys:
+        keys = zobrist_keys(rows, cols)
+        stride = rows + 1
+        _mirror_keys[(rows, cols)] = {
+            symbol: [keys[symbol][(cols - 1 - index // stride) * stride + index % stride]
+                     for index in range(stride * cols)]
+            for symbol in 'XO'
+        }
+    return _mirror_keys[(rows, cols)]
+
+_column_keys = {}
+
+# Columns taller than this hash stone by stone instead of from column_zobrist_keys
+MAX_COLUMN_KEY_ROWS = 9
+
+def column_zobrist_keys(rows, cols):
+    """The XOR of the Zobrist keys of each possible column, per column, or None for boards too tall.
+
+    A column's stones are coded as its X bits plus one bit above the top
+    stone, so ``keys[col][code]`` hashes all of them at once; the column's
+    mirror image has the same code in column ``cols - 1 - col``.
+    """
+    if rows > MAX_COLUMN_KEY_ROWS:
+        return None
+    if (rows, cols) not in _column_keys:
+        keys = zobrist_keys(rows, cols)
+        stride = rows + 1
+        tables = []
+        for col in range(cols):
+            table = [0] * (1 << stride)
+            for code in range(2, 1 << stride):
+                # The column one stone shorter, XOR the key of the top stone
+                top = code.bit_length() - 2
+                symbol = 'X' if code >> top & 1 else 'O'
+                table[code] = table[code & ((1 << top) - 1) | 1 << top] ^ keys[symbol][col * stride + top]
+            tables.append(table)
+        _column_keys[(rows, cols)] = tables
+    return _column_keys[(rows, cols)]
+
+# Bit distance to the next cell vertically, horizontally and along both diagonals, shared per row count
+_line_shifts = {}
+
+# Index of each side in window_counts, scores and lines
+PLAYER_INDEX = {'X': 0, 'O': 1}
+
+# Digits of the bitboards read as decimal numbers (see ConnectN._rows) and the bits of the board's cells
+_DIGIT_SYMBOLS = str.maketrans('012', ' XO')
+_X_BITS = str.maketrans('XO ', '100')
+_O_BITS = str.maketrans('XO ', '010')
+
+# A position as plain values: immutable, hashable and small to pickle. x and o are the bitboards.
+ConnectNSnapshot = namedtuple('ConnectNSnapshot', 'rows cols n x o current_player game_over winner')
+
+class ConnectN:
+    """Connect-N on any board size, backed by a pair of bitboards.
+
+    Each column uses ``rows + 1`` bits (the extra bit is a sentinel that
+    keeps shifted alignments from wrapping into the next column), so a bit
+    index is ``col * (rows + 1) + height`` with height 0 at the bottom.
+    Python integers are unbounded, so the board may exceed 64 bits.
+    ``bitboards`` holds one integer per symbol and ``mask`` holds every
+    occupied cell and ``hash`` is the Zobrist hash of the stones, updated
+    incrementally on every drop and undo. ``board`` is still a list of
+    rows, built from the bitboards, whose cell writes are loaded back into
+    the game; ``board_view`` is the same rows as read-only tuples. Zobrist
+    keys and evaluation windows come from board_tables() and are shared by
+    every game of the same size.
+
+    Like MNKGame, a game that is evaluated also keeps per-window stone
+    counts for both sides, each side's window score (center bonus included)
+    and how many complete lines each side has. They are built by the first
+    evaluate() and from then on a drop only touches the windows through its
+    cell. Games that are only played, like the ones tournaments and the
+    server hold, find wins from the runs through the new stone instead and
+    never allocate them; loading a position (set_state, restore) drops them.
+
+    Games use __slots__ and share their size tables, so a live game costs
+    a few hundred bytes. clone() copies one without replaying its moves and
+    snapshot() returns an immutable, hashable ConnectNSnapshot that
+    restore() loads back.
+    """
+    __slots__ = ('rows', 'cols', 'n', 'zobrist_keys', 'window_masks', 'windows_through', 'window_scores',
+                 'center_mask', 'shifts', 'mirror_keys', 'column_keys', 'bitboards', 'mask', 'hash', 'mirror_hash',
+                 'window_counts', 'scores', 'lines', 'heights', 'current_player', 'winner', 'game_over',
+                 'move_count', 'max_moves')
+
+    def __init__(self, rows=6, cols=7, n=4):
+        if n > max(rows, cols):
+            raise ValueError(f"{n} in a row does not fit on a {rows}x{cols} board")
+        self.rows = rows
+        self.cols = cols
+        self.n = n
+        (self.zobrist_keys, self.window_masks, self.windows_through, self.window_scores,
+         self.center_mask) = board_tables(rows, cols, n)
+        # Vertical, horizontal and both diagonals as shifts between cells
+        self.shifts = _line_shifts.setdefault(rows, (1, rows + 1, rows, rows + 2))
+        self.mirror_keys = mirror_zobrist_keys(rows, cols)
+        self.column_keys = column_zobrist_keys(rows, cols)
+        self.bitboards = {'X': 0, 'O': 0}
+        self.mask = 0
+        self.hash = 0
+        # Hash of the left-right mirror image, for symmetric lookups
+        self.mirror_hash = 0
+        # Per side (see PLAYER_INDEX): stones per window, the evaluate() score and the completed lines,
+        # all None until evaluate() needs them
+        self.window_counts = None
+        self.scores = None
+        self.lines = None
+        # Bit index of the next free cell in each column
+        self.heights = [col * (self.rows + 1) for col in range(self.cols)]
         self.current_player = 'X'
         self.winner = None
         self.game_over = False
         self.move_count = 0
-    
+        self.max_moves = self.rows * self.cols
+
+    def _rebuild_counts(self):
+        """Count every window's stones from the bitboards, for the first evaluate() of a position."""
+        x = self.bitboards['X']
+        o = self.bitboards['O']
+        scores = self.window_scores
+        n = self.n
+        x_counts = bytearray(len(self.window_masks))
+        o_counts = bytearray(len(self.window_masks))
+        x_score = 3 * (x & self.center_mask).bit_count()
+        o_score = 3 * (o & self.center_mask).bit_count()
+        x_lines = o_lines = 0
+        for window, window_mask in enumerate(self.window_masks):
+            own = (x & window_mask).bit_count()
+            other = (o & window_mask).bit_count()
+            x_counts[window] = own
+            o_counts[window] = other
+            x_score += scores[own][other]
+            o_score += scores[other][own]
+            x_lines += own == n
+            o_lines += other == n
+        self.window_counts = [x_counts, o_counts]
+        self.scores = [x_score, o_score]
+        self.lines = [x_lines, o_lines]
+
+    def _place(self, index, symbol):
+        """Add a stone at bit `index` to the window counts; returns True if it completes n in a row."""
+        player = PLAYER_INDEX[symbol]
+        counts = self.window_counts[player]
+        opponent_counts = self.window_counts[1 - player]
+        scores = self.window_scores
+        gained = 3 if self.center_mask >> index & 1 else 0
+        lost = 0
+        completed = 0
+        for window in self.windows_through[index]:
+            own = counts[window]
+            other = opponent_counts[window]
+            counts[window] = own + 1
+            gained += scores[own + 1][other] - scores[own][other]
+            lost += scores[other][own] - scores[other][own + 1]
+            if own + 1 == self.n:
+                completed += 1
+        self.scores[player] += gained
+        self.scores[1 - player] -= lost
+        self.lines[player] += completed
+        return completed > 0
+
+    def _remove(self, index, symbol):
+        player = PLAYER_INDEX[symbol]
+        counts = self.window_counts[player]
+        opponent_counts = self.window_counts[1 - player]
+        scores = self.window_scores
+        lost = 3 if self.center_mask >> index & 1 else 0
+        gained = 0
+        for window in self.windows_through[index]:
+            own = counts[window]
+            other = opponent_counts[window]
+            counts[window] = own - 1
+            lost += scores[own][other] - scores[own - 1][other]
+            gained += scores[other][own - 1] - scores[other][own]
+            if own == self.n:
+                self.lines[player] -= 1
+        self.scores[player] -= lost
+        self.scores[1 - player] += gained
+
+    def _rows(self):
+        """The rows, top first, as lists of symbols built from the bitboards."""
+        stride = self.rows + 1
+        end = stride * self.cols
+        # X's and twice O's binary digits, added as decimal numbers, never carry: each digit is 0, 1 or 2
+        digits = int(format(self.bitboards['X'], 'b')) + 2 * int(format(self.bitboards['O'], 'b'))
+        cells = str(digits).zfill(end).translate(_DIGIT_SYMBOLS)[::-1]
+        return [list(cells[height:end:stride]) for height in range(self.rows - 1, -1, -1)]
+
+    @property
+    def board(self):
+        """The rows as lists; assigning a cell or a row loads the changed board into the game."""
+        return WritableBoard(self, self._rows())
+
+    @property
+    def board_view(self):
+        """The rows as a read-only BoardView, for callers that only inspect cells."""
+        return BoardView([BoardView(row) for row in self._rows()])
+
+    @board.setter
+    def board(self, board):
+        self._load_board(board)
+
+    def _load_board(self, board):
+        # Regroup the cells by column, bottom first with an empty sentinel, so the n-th character is bit n
+        cells = ''.join(map(''.join, board))
+        columns = ''.join(cells[col::self.cols][::-1] + ' ' for col in range(self.cols))[::-1]
+        self._load_bitboards(int(columns.translate(_X_BITS), 2), int(columns.translate(_O_BITS), 2))
+
+    def _load_bitboards(self, x, o):
+        """Set the stones and rebuild the mask, hashes and heights from them; window counts wait for evaluate()."""
+        self.bitboards = {'X': x, 'O': o}
+        self.mask = mask = x | o
+        self.move_count = mask.bit_count()
+        stride = self.rows + 1
+        column = (1 << self.rows) - 1
+        self.heights = [col * stride + (mask >> (col * stride) & column).bit_length() for col in range(self.cols)]
+        position_hash = mirror_hash = 0
+        if self.column_keys is not None:
+            # Each column's X bits plus its mask stay below its sentinel bit, so the columns add without carries
+            codes = x + mask
+            full = (1 << stride) - 1
+            for col, (table, mirror_table) in enumerate(zip(self.column_keys, reversed(self.column_keys))):
+                code = (codes >> (col * stride) & full) + 1
+                position_hash ^= table[code]
+                mirror_hash ^= mirror_table[code]
+        else:
+            for symbol, bitboard in (('X', x), ('O', o)):
+                keys = self.zobrist_keys[symbol]
+                mirror_keys = self.mirror_keys[symbol]
+                while bitboard:
+                    index = (bitboard & -bitboard).bit_length() - 1
+                    position_hash ^= keys[index]
+                    mirror_hash ^= mirror_keys[index]
+                    bitboard &= bitboard - 1
+        self.hash = position_hash
+        self.mirror_hash = mirror_hash
+        self.window_counts = self.scores = self.lines = None
+
     def print_board(self):
         print(' ' + ' '.join(str(i) for i in range(self.cols)))
-        for row in self.board:
+        for row in self._rows():
             print('|' + '|'.join(row) + '|')
         print('-' * (self.cols * 2 + 1))
-    
+
     def is_column_full(self, col):
-        return self.board[0][col] != ' '
-    
+        return self.heights[col] == col * (self.rows + 1) + self.rows
+
     def drop_piece(self, col):
         if self.game_over:
             return False
-            
+
         if not (0 <= col < self.cols):
             return False
-            
+
         if self.is_column_full(col):
             return False
-            
-        # Find the lowest empty cell in the column
-        for row in range(self.rows - 1, -1, -1):
-            if self.board[row][col] == ' ':
-                self.board[row][col] = self.current_player
-                self.move_count += 1
-                break
-        
-        # Check for win
-        if self.check_winner():
+
+        # The lowest empty cell in the column is tracked by heights
+        index = self.heights[col]
+        bit = 1 << index
+        self.heights[col] += 1
+        self.bitboards[self.current_player] |= bit
+        self.mask |= bit
+        self.hash ^= self.zobrist_keys[self.current_player][index]
+        self.mirror_hash ^= self.mirror_keys[self.current_player][index]
+        self.move_count += 1
+
+        # Check for win (only the mover's windows through the new stone can have been completed),
+        # from the window counts when evaluate() keeps them and from the runs through the stone otherwise
+        if self.window_counts is not None:
+            won = self._place(index, self.current_player)
+        else:
+            won = self._completes_line(index, self.bitboards[self.current_player])
+        if won:
             self.winner = self.current_player
             self.game_over = True
         # Check for draw
@@ -43,79 +355,199 @@ class Connect4:
             self.game_over = True
         else:
             self.current_player = 'O' if self.current_player == 'X' else 'X'
-            
+
         return True
-    
-    def check_winner(self):
-        # Check horizontal
-        for row in range(self.rows):
-            for col in range(self.cols - 3):
-                if (self.board[row][col] != ' ' and
-                    self.board[row][col] == self.board[row][col+1] == 
-                    self.board[row][col+2] == self.board[row][col+3]):
-                    return True
-        
-        # Check vertical
-        for row in range(self.rows - 3):
-            for col in range(self.cols):
-                if (self.board[row][col] != ' ' and
-                    self.board[row][col] == self.board[row+1][col] == 
-                    self.board[row+2][col] == self.board[row+3][col]):
-                    return True
-        
-        # Check diagonal (positive slope)
-        for row in range(self.rows - 3):
-            for col in range(self.cols - 3):
-                if (self.board[row][col] != ' ' and
-                    self.board[row][col] == self.board[row+1][col+1] == 
-                    self.board[row+2][col+2] == self.board[row+3][col+3]):
-                    return True
-        
-        # Check diagonal (negative slope)
-        for row in range(3, self.rows):
-            for col in range(self.cols - 3):
-                if (self.board[row][col] != ' ' and
-                    self.board[row][col] == self.board[row-1][col+1] == 
-                    self.board[row-2][col+2] == self.board[row-3][col+3]):
-                    return True
-                    
+
+    def undo_move(self, col):
+        """Take back the top piece of a column, restoring the pre-move state.
+
+        Moves must be undone in the reverse order they were played; no
+        history is kept, so the search can make/unmake without copying.
+        """
+        if not (0 <= col < self.cols):
+            return False
+
+        if self.heights[col] == col * (self.rows + 1):
+            return False
+
+        self.heights[col] -= 1
+        index = self.heights[col]
+        bit = 1 << index
+        symbol = 'X' if self.bitboards['X'] & bit else 'O'
+        self.bitboards[symbol] ^= bit
+        self.mask ^= bit
+        self.hash ^= self.zobrist_keys[symbol][index]
+        self.mirror_hash ^= self.mirror_keys[symbol][index]
+        if self.window_counts is not None:
+            self._remove(index, symbol)
+        self.move_count -= 1
+
+        # Nobody can move once the game is over, so the undone move was
+        # played from a live position by the owner of the piece
+        self.current_player = symbol
+        self.winner = None
+        self.game_over = False
+        return True
+
+    # Game protocol used by agents/search.py: moves are column numbers
+    make = drop_piece
+    unmake = undo_move
+
+    def canonical(self):
+        """(key, symmetry) shared by a position and its mirror image.
+
+        The key is the smaller of the hash and the mirrored hash; symmetry
+        is 1 when the mirror image was used, else 0.
+        """
+        if self.mirror_hash < self.hash:
+            return self.mirror_hash, 1
+        return self.hash, 0
+
+    def to_canonical_move(self, move, symmetry):
+        """Map a move of this position to the position canonical() describes."""
+        return self.cols - 1 - move if symmetry else move
+
+    def from_canonical_move(self, move, symmetry):
+        return self.cols - 1 - move if symmetry else move
+
+    def unique_moves(self, moves):
+        """Drop moves that mirror another one when the position is its own mirror image.
+
+        On an empty or mirror-symmetric board column c and cols-1-c lead to
+        mirrored positions with the same value, so only one needs searching.
+        """
+        if self.hash != self.mirror_hash:
+            return moves
+        last = self.cols - 1
+        return [move for move in moves if move <= last - move]
+
+    def evaluate(self, symbol):
+        """Window heuristic for `symbol`, kept up to date by every drop and undo once this first builds it.
+
+        For four in a row it is the score of Connect4MinimaxAgent.rescan_board.
+        """
+        if self.window_counts is None:
+            self._rebuild_counts()
+        return self.scores[PLAYER_INDEX[symbol]]
+
+    def would_win(self, col, symbol):
+        """Whether `symbol` dropping into `col` makes n in a row, without playing it."""
+        if self.game_over or not (0 <= col < self.cols) or self.is_column_full(col):
+            return False
+        return self._completes_line(self.heights[col], self.bitboards[symbol])
+
+    def _completes_line(self, index, bitboard):
+        """Whether a stone at bit `index` gives `bitboard` n in a row.
+
+        Only the four lines through the cell are walked, counting the
+        stones outward in both directions; the cell itself may be set or not.
+        """
+        for shift in self.shifts:
+            count = 1
+            # The sentinel row is always empty, so runs stop at board edges
+            probe = index + shift
+            while bitboard >> probe & 1:
+                count += 1
+                probe += shift
+            probe = index - shift
+            while probe >= 0 and bitboard >> probe & 1:
+                count += 1
+                probe -= shift
+            if count >= self.n:
+                return True
         return False
-    
+
+    def check_winner(self):
+        if self.window_counts is None:
+            x = self.bitboards['X']
+            o = self.bitboards['O']
+            return any(x & window == window or o & window == window for window in self.window_masks)
+        return self.lines[0] > 0 or self.lines[1] > 0
+
     def get_valid_moves(self):
         if self.game_over:
             return []
-            
+
         return [col for col in range(self.cols) if not self.is_column_full(col)]
-    
+
     def get_state(self):
-        return [row[:] for row in self.board], self.current_player, self.game_over, self.winner
-    
+        return self._rows(), self.current_player, self.game_over, self.winner
+
     def set_state(self, state):
         board, current_player, game_over, winner = state
-        self.board = [row[:] for row in board]
+        self._load_board(board)
         self.current_player = current_player
         self.game_over = game_over
         self.winner = winner
-        self.move_count = sum(row.count('X') + row.count('O') for row in self.board)
 
-def play_game(player1, player2):
-    game = Connect4()
+    def snapshot(self):
+        return ConnectNSnapshot(self.rows, self.cols, self.n, self.bitboards['X'], self.bitboards['O'],
+                                self.current_player, self.game_over, self.winner)
+
+    def restore(self, snapshot):
+        """Load a snapshot of a game of the same size."""
+        if (snapshot.rows, snapshot.cols, snapshot.n) != (self.rows, self.cols, self.n):
+            raise ValueError(f"Snapshot of a {snapshot.rows}x{snapshot.cols} connect {snapshot.n} game "
+                             f"does not fit a {self.rows}x{self.cols} connect {self.n} game")
+        self._load_bitboards(snapshot.x, snapshot.o)
+        self.current_player = snapshot.current_player
+        self.game_over = snapshot.game_over
+        self.winner = snapshot.winner
+
+    def clone(self):
+        """An independent copy of the game that shares the size tables; no moves are replayed."""
+        game = object.__new__(type(self))
+        for name in ConnectN.__slots__:
+            setattr(game, name, getattr(self, name))
+        game.bitboards = dict(self.bitboards)
+        if self.window_counts is not None:
+            game.window_counts = [self.window_counts[0][:], self.window_counts[1][:]]
+            game.scores = self.scores[:]
+            game.lines = self.lines[:]
+        game.heights = self.heights[:]
+        return game
+
+    def __deepcopy__(self, memo):
+        return self.clone()
+
+class Connect4(ConnectN):
+    """The standard 6x7 Connect 4 board."""
+    __slots__ = ()
+
+    def __init__(self):
+        super().__init__(6, 7, 4)
+
+def play_game(player1, player2, game=None, verbose=True):
+    """Play a game between two players; verbose prints the board every ply and the result."""
+    if game is None:
+        game = Connect4()
     players = {'X': player1, 'O': player2}
     
     while not game.game_over:
-        game.print_board()
+        if verbose:
+            game.print_board()
         current_player = players[game.current_player]
         col = current_player.get_move(game)
         
         if not game.drop_piece(col):
             print("Invalid move, try again.")
             continue
+        
+        # A pondering agent searches the replies while the other player thinks
+        if hasattr(current_player, 'ponder'):
+            current_player.ponder(game)
     
+    for player in players.values():
+        if hasattr(player, 'ponder'):
+            player.stop()
+    if not verbose:
+        return game.winner
     game.print_board()
     if game.winner:
         print(f"Player {game.winner} wins!")
     else:
         print("It's a draw!")
+    return game.winner
 
 if __name__ == "__main__":
     class HumanPlayer:
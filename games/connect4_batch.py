@@ -0,0 +1,161 @@
+import sys
+import os
+import time
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; only the batch simulator needs it
+    np = None
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from games.connect4 import Connect4
+
+class Connect4Batch:
+    """N independent Connect 4 games advanced in lockstep with NumPy.
+
+    Uses the same bitboard layout as Connect4 (``rows + 1`` bits per
+    column), stored as uint64 arrays: ``bitboards[0]`` for X,
+    ``bitboards[1]`` for O, plus ``mask``. ``current`` is 0 or 1 for the
+    side to move, ``winner`` is -1 until someone wins, and ``done`` marks
+    finished games, which every operation leaves untouched.
+    """
+
+    def __init__(self, num_games, rows=6, cols=7):
+        if np is None:
+            raise ImportError("Connect4Batch requires numpy")
+        if cols * (rows + 1) > 64:
+            raise ValueError("Board does not fit in a 64-bit bitboard")
+
+        self.num_games = num_games
+        self.rows = rows
+        self.cols = cols
+        stride = rows + 1
+        self.bottom = np.array([1 << (col * stride) for col in range(cols)], dtype=np.uint64)
+        self.column_mask = np.array([((1 << rows) - 1) << (col * stride) for col in range(cols)],
+                                    dtype=np.uint64)
+        self.shifts = [np.uint64(shift) for shift in (1, stride, stride - 1, stride + 1)]
+        self.reset()
+
+    def reset(self):
+        n = self.num_games
+        self.bitboards = np.zeros((2, n), dtype=np.uint64)
+        self.mask = np.zeros(n, dtype=np.uint64)
+        self.current = np.zeros(n, dtype=np.int8)
+        self.winner = np.full(n, -1, dtype=np.int8)
+        self.done = np.zeros(n, dtype=bool)
+        self.move_count = np.zeros(n, dtype=np.int16)
+
+    def _has_four(self, bitboards):
+        found = np.zeros(bitboards.shape, dtype=bool)
+        for shift in self.shifts:
+            pairs = bitboards & (bitboards >> shift)
+            found |= (pairs & (pairs >> (shift + shift))) != 0
+        return found
+
+    def move_bits(self):
+        """(N, cols) bit each column's next piece would take; 0 if the column is full."""
+        return (self.mask[:, None] + self.bottom) & self.column_mask
+
+    def valid_moves_mask(self):
+        """(N, cols) bool of legal columns; all False for finished games."""
+        return (self.move_bits() != 0) & ~self.done[:, None]
+
+    def check_winner(self):
+        """(N,) bool: whether either side has four in a row."""
+        return self._has_four(self.bitboards[0]) | self._has_four(self.bitboards[1])
+
+    def drop(self, cols):
+        """Play cols[i] in every unfinished game i. Returns (N,) bool of moves made.
+
+        Illegal columns (full or off the board) are skipped, like Connect4.drop_piece returning False.
+        """
+        games = np.arange(self.num_games)
+        cols = np.asarray(cols, dtype=np.intp)
+        # Out-of-range columns are masked like full ones instead of indexing past the board
+        on_board = (cols >= 0) & (cols < self.cols)
+        bits = np.where(on_board, self.move_bits()[games, np.where(on_board, cols, 0)], np.uint64(0))
+        played = (bits != 0) & ~self.done
+        bits = np.where(played, bits, np.uint64(0))
+
+        mover = self.current.astype(np.intp)
+        self.bitboards[mover, games] |= bits
+        self.mask |= bits
+        self.move_count += played
+
+        won = played & self._has_four(self.bitboards[mover, games])
+        self.winner[won] = self.current[won]
+        full = played & (self.move_count == self.rows * self.cols)
+        self.done |= won | full
+
+        switch = played & ~self.done
+        self.current[switch] ^= 1
+        return played
+
+    def winning_moves(self, side):
+        """(N, cols) bool: columns where `side` (an (N,) array of 0/1) would complete four."""
+        bits = self.move_bits()
+        own = self.bitboards[np.asarray(side, dtype=np.intp), np.arange(self.num_games)]
+        return self._has_four(own[:, None] | bits) & (bits != 0) & ~self.done[:, None]
+
+    def game(self, index):
+        """Copy game `index` into a regular Connect4 object."""
+        board = [[' ' for _ in range(self.cols)] for _ in range(self.rows)]
+        stride = self.rows + 1
+        for side, symbol in ((0, 'X'), (1, 'O')):
+            bitboard = int(self.bitboards[side, index])
+            for col in range(self.cols):
+                for height in range(self.rows):
+                    if bitboard >> (col * stride + height) & 1:
+                        board[self.rows - 1 - height][col] = symbol
+        game = Connect4()
+        winner = {-1: None, 0: 'X', 1: 'O'}[int(self.winner[index])]
+        current = 'X' if self.current[index] == 0 else 'O'
+        game.set_state((board, current, bool(self.done[index]), winner))
+        return game
+
+
+def _first_true(flags):
+    """Index of the first True per row, or -1 where there is none."""
+    return np.where(flags.any(axis=1), flags.argmax(axis=1), -1)
+
+def random_policy(batch, rng):
+    """A uniformly random legal column per game."""
+    noise = rng.random((batch.num_games, batch.cols))
+    return np.where(batch.valid_moves_mask(), noise, -1.0).argmax(axis=1)
+
+def default_policy(batch, rng):
+    """Batched DefaultAgent: win if possible, else block, else random.
+
+    Like DefaultAgent, the leftmost winning (then blocking) column is taken.
+    """
+    moves = random_policy(batch, rng)
+    block = _first_true(batch.winning_moves(batch.current ^ 1))
+    moves = np.where(block >= 0, block, moves)
+    win = _first_true(batch.winning_moves(batch.current))
+    return np.where(win >= 0, win, moves)
+
+def simulate(num_games, policy_x=default_policy, policy_o=default_policy, seed=0):
+    """Play num_games games to the end; returns the finished Connect4Batch."""
+    rng = np.random.default_rng(seed)
+    batch = Connect4Batch(num_games)
+    while not batch.done.all():
+        moves_x = policy_x(batch, rng)
+        moves_o = moves_x if policy_o is policy_x else policy_o(batch, rng)
+        batch.drop(np.where(batch.current == 0, moves_x, moves_o))
+    return batch
+
+def benchmark(num_games=10000, seed=0):
+    start = time.perf_counter()
+    batch = simulate(num_games, seed=seed)
+    elapsed = time.perf_counter() - start
+    moves = int(batch.move_count.sum())
+    x_wins = int((batch.winner == 0).sum())
+    o_wins = int((batch.winner == 1).sum())
+    print(f"Simulated {num_games} default-vs-default games ({moves} moves) in {elapsed:.2f}s: "
+          f"{moves / elapsed:,.0f} moves/s")
+    print(f"X wins {x_wins}, O wins {o_wins}, draws {num_games - x_wins - o_wins}")
+    return moves / elapsed
+
+
+if __name__ == "__main__":
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
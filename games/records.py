@@ -0,0 +1,277 @@
+import sys
+import os
+import json
+import mmap
+import random
+import struct
+import tempfile
+import time
+from collections import namedtuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from games.connect4 import Connect4, ConnectN, ConnectNSnapshot
+from games.tictactoe import TicTacToe, MNKGame, MNKSnapshot
+
+# A played game: the game family ('connect4' or 'tictactoe'), board size and win length,
+# the moves in the game's own form (columns or (row, col) tuples) and the winner or None
+GameRecord = namedtuple('GameRecord', 'game rows cols n moves winner')
+
+FAMILIES = ('connect4', 'tictactoe')
+WINNERS = (None, 'X', 'O')
+
+# One character per move in move strings: a column, or a cell row * cols + col
+MOVE_ALPHABET = '0123456789abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+# Record files start with this, then hold records back to back. Each record is
+# a header (family, rows, cols, n, winner, number of moves) and one byte per move.
+MAGIC = b'GREC\x01'
+RECORD_HEADER = struct.Struct('<BBBBBH')
+
+def new_game(record):
+    """An empty game of the record's family and size."""
+    if record.game == 'connect4':
+        return Connect4() if (record.rows, record.cols, record.n) == (6, 7, 4) else ConnectN(record.rows, record.cols,
+                                                                                             record.n)
+    if record.game == 'tictactoe':
+        return TicTacToe() if (record.rows, record.cols, record.n) == (3, 3, 3) else MNKGame(record.rows, record.cols,
+                                                                                             record.n)
+    raise ValueError(f"Unknown game: {record.game}")
+
+def record_from_game(game, moves):
+    """The record of `game` after `moves` were played on it from the empty board."""
+    if isinstance(game, ConnectN):
+        return GameRecord('connect4', game.rows, game.cols, game.n, tuple(moves), game.winner)
+    return GameRecord('tictactoe', game.rows, game.cols, game.k, tuple(tuple(move) for move in moves), game.winner)
+
+def record_from_result(result):
+    """The record of a tournament result from experiments/run_experiments.py, read back from JSON lines or CSV."""
+    game = {'connect4': Connect4, 'tictactoe': TicTacToe}[result['game']]()
+    moves = result['moves']
+    if isinstance(moves, str):
+        # CSV: space separated, Tic Tac Toe cells as row,col
+        moves = [[int(part) for part in move.split(',')] if ',' in move else int(move) for move in moves.split()]
+    winner = result['winner'] or None
+    if isinstance(game, ConnectN):
+        return GameRecord('connect4', game.rows, game.cols, game.n, tuple(moves), winner)
+    return GameRecord('tictactoe', game.rows, game.cols, game.k, tuple(tuple(move) for move in moves), winner)
+
+def move_index(game, move):
+    """A move as a small integer: the column, or the cell row * cols + col."""
+    return move if isinstance(game, ConnectN) else move[0] * game.cols + move[1]
+
+def index_move(game, index):
+    return index if isinstance(game, ConnectN) else divmod(index, game.cols)
+
+def encode_moves(record):
+    """The record's moves as a string, one character each ('3342...' for Connect 4 columns)."""
+    game = new_game(record)
+    try:
+        return ''.join(MOVE_ALPHABET[move_index(game, move)] for move in record.moves)
+    except IndexError:
+        raise ValueError(f"Moves of a {record.rows}x{record.cols} {record.game} board do not fit one character")
+
+def decode_moves(record, text):
+    """Moves from encode_moves for a game of the record's family and size."""
+    game = new_game(record)
+    return tuple(index_move(game, MOVE_ALPHABET.index(char)) for char in text)
+
+def encode_record(record):
+    """Bytes of one record in the record file layout."""
+    game = new_game(record)
+    try:
+        return (RECORD_HEADER.pack(FAMILIES.index(record.game), record.rows, record.cols, record.n,
+                                   WINNERS.index(record.winner), len(record.moves))
+                + bytes(move_index(game, move) for move in record.moves))
+    except (ValueError, struct.error):
+        raise ValueError(f"A {record.rows}x{record.cols} {record.game} game does not fit the record layout")
+
+def decode_records(buffer, offset=0):
+    """Yield every record in `buffer` (bytes, memoryview or mmap) from `offset` on."""
+    games = {}
+    end = len(buffer)
+    while offset < end:
+        family, rows, cols, n, winner, count = RECORD_HEADER.unpack_from(buffer, offset)
+        offset += RECORD_HEADER.size
+        key = (family, rows, cols, n)
+        if key not in games:
+            games[key] = new_game(GameRecord(FAMILIES[family], rows, cols, n, (), None))
+        game = games[key]
+        moves = buffer[offset:offset + count]
+        offset += count
+        if isinstance(game, ConnectN):
+            moves = tuple(moves)
+        else:
+            moves = tuple(divmod(index, cols) for index in moves)
+        yield GameRecord(FAMILIES[family], rows, cols, n, moves, WINNERS[winner])
+
+
+class RecordWriter:
+    """Appends records to a record file; the file gets its header when it is new or empty."""
+
+    def __init__(self, path):
+        self.file = open(path, 'ab')
+        if self.file.tell() == 0:
+            self.file.write(MAGIC)
+
+    def write(self, record):
+        self.file.write(encode_record(record))
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def read_records(path):
+    """Stream the records of a record file through a memory map; nothing is decoded ahead."""
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a game record file")
+        if os.fstat(f.fileno()).st_size == len(MAGIC):
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            yield from decode_records(buffer, len(MAGIC))
+
+def write_records(path, records):
+    with RecordWriter(path) as writer:
+        for record in records:
+            writer.write(record)
+
+
+def position_width(game):
+    """Bytes pack_position uses for every position of this game's size: 8 for Connect 4, 3 for Tic Tac Toe."""
+    if isinstance(game, ConnectN):
+        bits = (game.rows + 1) * game.cols
+    else:
+        bits = (3 ** (game.rows * game.cols) - 1).bit_length()
+    return (bits + 7) // 8 + 1
+
+def pack_position(game):
+    """The position as fixed-width bytes: the stones, then a byte of side to move, game over and winner.
+
+    Connect-N stones are X's bitboard plus the occupancy mask, which is
+    unique because each column's stones sit on the lowest heights and fits
+    the bitboard since its sentinel row takes the carry. M,n,k stones are
+    a base-3 number with a digit per cell.
+    """
+    if isinstance(game, ConnectN):
+        stones = game.bitboards['X'] + game.mask
+    else:
+        stones = 0
+        for value in reversed(game.cells):
+            stones = stones * 3 + (0 if value == ord(' ') else 1 if value == ord('X') else 2)
+    flags = (game.current_player == 'O') | game.game_over << 1 | WINNERS.index(game.winner) << 2
+    return stones.to_bytes(position_width(game) - 1, 'little') + bytes([flags])
+
+def unpack_position(game, data):
+    """Load a position from pack_position into `game`, which must have the same size; returns `game`."""
+    if len(data) != position_width(game):
+        raise ValueError(f"A packed position of this game is {position_width(game)} bytes, not {len(data)}")
+    stones = int.from_bytes(data[:-1], 'little')
+    flags = data[-1]
+    current_player = 'O' if flags & 1 else 'X'
+    game_over = bool(flags & 2)
+    winner = WINNERS[flags >> 2]
+    if isinstance(game, ConnectN):
+        stride = game.rows + 1
+        x = mask = 0
+        for col in range(game.cols):
+            # The column holds x + (2 ** height - 1); adding 1 leaves a single bit at the height above x
+            column = (stones >> (col * stride) & ((1 << stride) - 1)) + 1
+            height = column.bit_length() - 1
+            x |= (column ^ (1 << height)) << (col * stride)
+            mask |= ((1 << height) - 1) << (col * stride)
+        game.restore(ConnectNSnapshot(game.rows, game.cols, game.n, x, mask ^ x, current_player, game_over, winner))
+    else:
+        cells = bytearray()
+        for _ in range(game.rows * game.cols):
+            stones, digit = divmod(stones, 3)
+            cells.append(b' XO'[digit])
+        game.restore(MNKSnapshot(game.rows, game.cols, game.k, bytes(cells), current_player, game_over, winner))
+    return game
+
+
+class Replay:
+    """Walks a recorded game to any ply with make/unmake, so nearby plies cost a few moves each.
+
+    seek() returns the live game, whose get_state(), snapshot() or
+    pack_position() can be taken before seeking elsewhere.
+    """
+
+    def __init__(self, record):
+        self.record = record
+        self.game = new_game(record)
+        self.ply = 0
+
+    def seek(self, ply):
+        moves = self.record.moves
+        if not 0 <= ply <= len(moves):
+            raise ValueError(f"Ply {ply} is outside a game of {len(moves)} moves")
+        while self.ply < ply:
+            self.game.make(moves[self.ply])
+            self.ply += 1
+        while self.ply > ply:
+            self.ply -= 1
+            self.game.unmake(moves[self.ply])
+        return self.game
+
+    def positions(self):
+        """Yield (ply, game) for every ply from the empty board to the end."""
+        for ply in range(len(self.record.moves) + 1):
+            yield ply, self.seek(ply)
+
+def replay(record, ply=None):
+    """A new game with the first `ply` moves of the record played, or all of them."""
+    return Replay(record).seek(len(record.moves) if ply is None else ply)
+
+
+def compare_formats(num_games=20000, seed=0):
+    """Size and load time of random Connect 4 games as JSON lines and as a record file."""
+    rng = random.Random(seed)
+    records = []
+    for _ in range(num_games):
+        game = Connect4()
+        moves = []
+        while not game.game_over:
+            move = rng.choice(game.get_valid_moves())
+            game.drop_piece(move)
+            moves.append(move)
+        records.append(record_from_game(game, moves))
+
+    with tempfile.TemporaryDirectory() as directory:
+        json_path = os.path.join(directory, 'games.jsonl')
+        record_path = os.path.join(directory, 'games.grec')
+        with open(json_path, 'w') as f:
+            for record in records:
+                f.write(json.dumps({'game': record.game, 'moves': record.moves, 'winner': record.winner}) + '\n')
+        write_records(record_path, records)
+
+        start = time.perf_counter()
+        with open(json_path) as f:
+            loaded = [json.loads(line) for line in f]
+        json_time = time.perf_counter() - start
+        start = time.perf_counter()
+        loaded_records = list(read_records(record_path))
+        record_time = time.perf_counter() - start
+        if loaded_records != records or len(loaded) != len(records):
+            raise AssertionError("Records did not round-trip")
+
+        results = {}
+        for name, path, elapsed in (('JSON lines', json_path, json_time), ('record file', record_path, record_time)):
+            size = os.path.getsize(path)
+            results[name] = (size, elapsed)
+            print(f"{name}: {size / num_games:.1f} bytes/game, {elapsed / num_games * 1e6:.1f} us/game to load")
+
+    start = time.perf_counter()
+    for record in records[:1000]:
+        replay(record, len(record.moves) // 2)
+    print(f"Replay to mid-game: {(time.perf_counter() - start) / 1000 * 1e6:.1f} us/game")
+    return results
+
+
+if __name__ == "__main__":
+    compare_formats()
@@ -1,37 +1,284 @@
-class TicTacToe:
-    def __init__(self):
-        self.board = [[' ' for _ in range(3)] for _ in range(3)]
+import sys
+import os
+import random
+from collections import namedtuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from games.board_view import BoardView, WritableBoard
+
+def zobrist_keys(rows=3, cols=3):
+    """Zobrist keys per symbol and cell (row * cols + col), seeded so hashes are stable across runs."""
+    rng = random.Random(0x777)
+    return {symbol: [rng.getrandbits(64) for _ in range(rows * cols)] for symbol in 'XO'}
+
+def board_lines(rows, cols, k):
+    """Every k-cell line segment of the board as a tuple of cell indices (row * cols + col)."""
+    lines = []
+    for row in range(rows):
+        for col in range(cols):
+            # Right, down, down-right and down-left from (row, col)
+            for drow, dcol in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                end_row = row + drow * (k - 1)
+                end_col = col + dcol * (k - 1)
+                if end_row < rows and 0 <= end_col < cols:
+                    lines.append(tuple((row + drow * i) * cols + col + dcol * i for i in range(k)))
+    return lines
+
+def window_scores(k):
+    """Score of a line for X by (X stones, O stones): 4 ** stones if only one side has any, else 0."""
+    scores = [[0] * (k + 1) for _ in range(k + 1)]
+    for count in range(1, k + 1):
+        scores[count][0] = 4 ** count
+        scores[0][count] = -4 ** count
+    return scores
+
+_board_tables = {}
+
+def board_tables(rows, cols, k):
+    """(zobrist keys, lines, lines through each cell, line scores) for a board size, built once."""
+    key = (rows, cols, k)
+    if key not in _board_tables:
+        lines = board_lines(rows, cols, k)
+        lines_through = [[] for _ in range(rows * cols)]
+        for index, line in enumerate(lines):
+            for cell in line:
+                lines_through[cell].append(index)
+        _board_tables[key] = (zobrist_keys(rows, cols), lines, lines_through, window_scores(k))
+    return _board_tables[key]
+
+EMPTY = ord(' ')
+X_CODE = ord('X')
+O_CODE = ord('O')
+
+# Index of each side in line_counts (X's lines first, then O's)
+PLAYER_INDEX = {'X': 0, 'O': 1}
+
+# A position as plain values: immutable, hashable and small to pickle. cells is the board as bytes.
+MNKSnapshot = namedtuple('MNKSnapshot', 'rows cols k cells current_player game_over winner')
+
+_board_symmetries = {}
+
+def board_symmetries(rows, cols):
+    """(cell image, inverse) permutations of every symmetry of the board other than the identity.
+
+    Any board has its two mirrors and the half turn; a square one also has
+    both diagonal reflections and the quarter turns, 8 symmetries in all.
+    """
+    if (rows, cols) not in _board_symmetries:
+        last_row, last_col = rows - 1, cols - 1
+        transforms = [
+            lambda r, c: (r, last_col - c),
+            lambda r, c: (last_row - r, c),
+            lambda r, c: (last_row - r, last_col - c)
+        ]
+        if rows == cols:
+            transforms += [
+                lambda r, c: (c, r),
+                lambda r, c: (last_col - c, last_row - r),
+                lambda r, c: (c, last_row - r),
+                lambda r, c: (last_col - c, r)
+            ]
+        symmetries = []
+        for transform in transforms:
+            image = [0] * (rows * cols)
+            inverse = [0] * (rows * cols)
+            for row in range(rows):
+                for col in range(cols):
+                    target_row, target_col = transform(row, col)
+                    image[row * cols + col] = target_row * cols + target_col
+                    inverse[target_row * cols + target_col] = row * cols + col
+            symmetries.append((image, inverse))
+        _board_symmetries[(rows, cols)] = symmetries
+    return _board_symmetries[(rows, cols)]
+
+class MNKGame:
+    """An m,n,k-game: k in a row wins on a rows x cols board.
+    
+    Tic-tac-toe is 3,3,3; Gomoku-like games are 15,15,5. Every k-cell
+    line is precomputed per board size, and the game keeps per-line stone
+    counts for both sides as moves are made and undone. A move only
+    touches the lines through its cell, so win checks and the line
+    evaluation are updated incrementally instead of rescanning the board.
+    The hashes of the board's mirror and rotated images are kept the same
+    way, so symmetric positions can share one canonical key.
+
+    The line counts and the image hashes are only built once evaluate()
+    or canonical() first needs them; until then wins are found from the
+    cells of the lines through the new stone, so games that are only
+    played never allocate them, and loading a position drops them.
+
+    The board is stored as a bytearray of cells (row * cols + col) holding
+    the symbols' character codes; ``board`` builds the list of rows, whose
+    cell writes are loaded back into the game, and ``board_view`` the same
+    rows as read-only tuples. Like ConnectN, games use __slots__, clone()
+    cheaply and give immutable MNKSnapshot snapshots.
+    """
+    __slots__ = ('rows', 'cols', 'k', 'zobrist_keys', 'lines', 'lines_through', 'line_scores', 'symmetries',
+                 'cells', 'current_player', 'winner', 'game_over', 'move_count', 'max_moves', 'hash',
+                 'line_counts', 'score', 'occupied', 'symmetry_hashes')
+    
+    def __init__(self, rows=3, cols=3, k=3):
+        if k > max(rows, cols):
+            raise ValueError(f"{k} in a row does not fit on a {rows}x{cols} board")
+        self.rows = rows
+        self.cols = cols
+        self.k = k
+        self.zobrist_keys, self.lines, self.lines_through, self.line_scores = board_tables(rows, cols, k)
+        self.symmetries = board_symmetries(rows, cols)
+        self.cells = bytearray(b' ' * (rows * cols))
         self.current_player = 'X'
         self.winner = None
         self.game_over = False
         self.move_count = 0
+        self.max_moves = rows * cols
+        self.hash = 0
+        # Bit `cell` is set for every stone
+        self.occupied = 0
+        # Stones per line, X's lines then O's, and the sum of line_scores for X, once evaluate() needs them
+        self.line_counts = None
+        self.score = 0
+        # Hash of the board mapped by each of self.symmetries, once canonical() needs them
+        self.symmetry_hashes = None
+    
+    def _rows(self):
+        cols = self.cols
+        cells = self.cells.decode()
+        return [list(cells[start:start + cols]) for start in range(0, self.rows * cols, cols)]
+    
+    @property
+    def board(self):
+        """The rows as lists; assigning a cell or a row loads the changed board into the game."""
+        return WritableBoard(self, self._rows())
+    
+    @property
+    def board_view(self):
+        """The rows as a read-only BoardView, for callers that only inspect cells."""
+        return BoardView([BoardView(row) for row in self._rows()])
+    
+    @board.setter
+    def board(self, board):
+        self._load_cells(''.join(''.join(row) for row in board).encode())
+    
+    def _load_cells(self, cells):
+        self.cells = bytearray(cells)
+        self.move_count = 0
+        self.hash = 0
+        self.occupied = 0
+        for cell, value in enumerate(self.cells):
+            if value != EMPTY:
+                self.hash ^= self.zobrist_keys[chr(value)][cell]
+                self.occupied |= 1 << cell
+                self.move_count += 1
+        self.line_counts = None
+        self.symmetry_hashes = None
+    
+    def _rebuild_symmetry_hashes(self):
+        """Hash every symmetric image of the board, for the first canonical() of a position."""
+        hashes = [0] * len(self.symmetries)
+        for cell, value in enumerate(self.cells):
+            if value != EMPTY:
+                keys = self.zobrist_keys[chr(value)]
+                for index, (image, _) in enumerate(self.symmetries):
+                    hashes[index] ^= keys[image[cell]]
+        self.symmetry_hashes = hashes
+    
+    def _rebuild_counts(self):
+        """Count every line's stones from the cells, for the first evaluate() of a position."""
+        cells = self.cells
+        num_lines = len(self.lines)
+        counts = bytearray(2 * num_lines)
+        scores = self.line_scores
+        score = 0
+        for line_index, line in enumerate(self.lines):
+            x = o = 0
+            for cell in line:
+                if cells[cell] == X_CODE:
+                    x += 1
+                elif cells[cell] == O_CODE:
+                    o += 1
+            counts[line_index] = x
+            counts[num_lines + line_index] = o
+            score += scores[x][o]
+        self.line_counts = counts
+        self.score = score
     
     def print_board(self):
-        print('  0 1 2')
-        for i in range(3):
-            print(f'{i} {self.board[i][0]}|{self.board[i][1]}|{self.board[i][2]}')
-            if i < 2:
-                print('  -+-+-')
+        width = len(str(self.rows - 1))
+        print(' ' * (width + 1) + ' '.join(str(col % 10) for col in range(self.cols)))
+        board = self._rows()
+        for i in range(self.rows):
+            print(f'{i:>{width}} ' + '|'.join(board[i]))
+            if i < self.rows - 1:
+                print(' ' * (width + 1) + '+'.join('-' * self.cols))
+    
+    def _place(self, cell, symbol):
+        """Add a stone to the line counts; returns True if it completes k in a row."""
+        counts = self.line_counts
+        offset = PLAYER_INDEX[symbol] * len(self.lines)
+        o_base = len(self.lines)
+        scores = self.line_scores
+        won = False
+        for line in self.lines_through[cell]:
+            self.score -= scores[counts[line]][counts[o_base + line]]
+            counts[offset + line] += 1
+            self.score += scores[counts[line]][counts[o_base + line]]
+            if counts[offset + line] == self.k:
+                won = True
+        return won
+    
+    def _remove(self, cell, symbol):
+        counts = self.line_counts
+        offset = PLAYER_INDEX[symbol] * len(self.lines)
+        o_base = len(self.lines)
+        scores = self.line_scores
+        for line in self.lines_through[cell]:
+            self.score -= scores[counts[line]][counts[o_base + line]]
+            counts[offset + line] -= 1
+            self.score += scores[counts[line]][counts[o_base + line]]
+    
+    def _hash_cell(self, cell, symbol):
+        keys = self.zobrist_keys[symbol]
+        self.hash ^= keys[cell]
+        hashes = self.symmetry_hashes
+        if hashes is not None:
+            for index, (image, _) in enumerate(self.symmetries):
+                hashes[index] ^= keys[image[cell]]
+    
+    def _completes_line(self, cell, code):
+        """Whether a stone with character code `code` at `cell` fills a line; the cell itself may be empty."""
+        cells, lines = self.cells, self.lines
+        for line in self.lines_through[cell]:
+            if all(other == cell or cells[other] == code for other in lines[line]):
+                return True
+        return False
     
     def make_move(self, row, col):
         if self.game_over:
             return False
         
-        if not (0 <= row < 3 and 0 <= col < 3):
+        if not (0 <= row < self.rows and 0 <= col < self.cols):
             return False
             
-        if self.board[row][col] != ' ':
+        if self.cells[row * self.cols + col] != EMPTY:
             return False
             
-        self.board[row][col] = self.current_player
+        cell = row * self.cols + col
+        self.cells[cell] = ord(self.current_player)
         self.move_count += 1
+        self._hash_cell(cell, self.current_player)
+        self.occupied |= 1 << cell
         
-        # Check for win
-        if self.check_winner():
+        # Check for win (only lines through the new stone can have been completed),
+        # from the line counts when evaluate() keeps them and from the cells otherwise
+        if self.line_counts is not None:
+            won = self._place(cell, self.current_player)
+        else:
+            won = self._completes_line(cell, self.cells[cell])
+        if won:
             self.winner = self.current_player
             self.game_over = True
         # Check for draw
-        elif self.move_count == 9:
+        elif self.move_count == self.max_moves:
             self.game_over = True
         else:
             self.current_player = 'O' if self.current_player == 'X' else 'X'
@@ -39,65 +286,217 @@ class TicTacToe:
         return True
     
     def check_winner(self):
-        # Check rows
-        for i in range(3):
-            if self.board[i][0] != ' ' and self.board[i][0] == self.board[i][1] == self.board[i][2]:
-                return True
-        
-        # Check columns
-        for i in range(3):
-            if self.board[0][i] != ' ' and self.board[0][i] == self.board[1][i] == self.board[2][i]:
+        if self.line_counts is None:
+            cells = self.cells
+            return any(cells[line[0]] != EMPTY and all(cells[cell] == cells[line[0]] for cell in line)
+                       for line in self.lines)
+        return self.k in self.line_counts
+    
+    def undo_move(self, row, col):
+        """Take back the piece at (row, col), restoring the pre-move state.
+
+        Moves must be undone in the reverse order they were played.
+        """
+        cell = row * self.cols + col
+        if self.cells[cell] == EMPTY:
+            return False
+
+        symbol = chr(self.cells[cell])
+        self.cells[cell] = EMPTY
+        self._hash_cell(cell, symbol)
+        self.occupied &= ~(1 << cell)
+        if self.line_counts is not None:
+            self._remove(cell, symbol)
+        self.move_count -= 1
+        self.current_player = symbol
+        self.winner = None
+        self.game_over = False
+        return True
+
+    # Game protocol used by agents/search.py: moves are (row, col) tuples
+    def make(self, move):
+        return self.make_move(move[0], move[1])
+
+    def unmake(self, move):
+        return self.undo_move(move[0], move[1])
+
+    def evaluate(self, symbol):
+        """Line score for `symbol`, kept up to date by every move and undo once this first builds it."""
+        if self.line_counts is None:
+            self._rebuild_counts()
+        return self.score if symbol == 'X' else -self.score
+
+    def canonical(self):
+        """(key, symmetry) shared by every symmetric image of the position.
+
+        The key is the smallest of the image hashes; symmetry is 0 for the
+        board itself, or 1 + the index in self.symmetries of the image used.
+        """
+        if self.symmetry_hashes is None:
+            self._rebuild_symmetry_hashes()
+        key, symmetry = self.hash, 0
+        for index, image_hash in enumerate(self.symmetry_hashes, 1):
+            if image_hash < key:
+                key, symmetry = image_hash, index
+        return key, symmetry
+
+    def to_canonical_move(self, move, symmetry):
+        """Map a move of this position to the position canonical() describes."""
+        if not symmetry:
+            return move
+        image = self.symmetries[symmetry - 1][0]
+        return divmod(image[move[0] * self.cols + move[1]], self.cols)
+
+    def from_canonical_move(self, move, symmetry):
+        if not symmetry:
+            return move
+        inverse = self.symmetries[symmetry - 1][1]
+        return divmod(inverse[move[0] * self.cols + move[1]], self.cols)
+
+    def unique_moves(self, moves):
+        """Keep one move of each set that the position's own symmetries map onto each other.
+
+        The empty 3x3 board leaves a corner, an edge and the center.
+        """
+        if self.symmetry_hashes is None:
+            self._rebuild_symmetry_hashes()
+        fixed = [image for (image, _), image_hash in zip(self.symmetries, self.symmetry_hashes)
+                 if image_hash == self.hash]
+        if not fixed:
+            return moves
+        cols = self.cols
+        return [(row, col) for row, col in moves
+                if all(row * cols + col <= image[row * cols + col] for image in fixed)]
+
+    def would_win(self, move, symbol):
+        """Whether `symbol` playing `move` completes a line, without changing the board.
+
+        Only the lines through the target cell are checked.
+        """
+        row, col = move
+        if (self.game_over or not (0 <= row < self.rows and 0 <= col < self.cols)
+                or self.cells[row * self.cols + col] != EMPTY):
+            return False
+
+        if self.line_counts is None:
+            return self._completes_line(row * self.cols + col, ord(symbol))
+        counts = self.line_counts
+        offset = PLAYER_INDEX[symbol] * len(self.lines)
+        # The target cell is empty, so k - 1 stones of one side fill the rest of the line
+        for line in self.lines_through[row * self.cols + col]:
+            if counts[offset + line] == self.k - 1:
                 return True
-        
-        # Check diagonals
-        if self.board[0][0] != ' ' and self.board[0][0] == self.board[1][1] == self.board[2][2]:
-            return True
-            
-        if self.board[0][2] != ' ' and self.board[0][2] == self.board[1][1] == self.board[2][0]:
-            return True
-            
         return False
-    
+
     def get_valid_moves(self):
         if self.game_over:
             return []
             
-        moves = []
-        for i in range(3):
-            for j in range(3):
-                if self.board[i][j] == ' ':
-                    moves.append((i, j))
-        return moves
+        cols = self.cols
+        return [divmod(cell, cols) for cell, value in enumerate(self.cells) if value == EMPTY]
+    
+    def candidate_moves(self, radius=1):
+        """Empty cells within `radius` of a stone, or the center cell of an empty board.
+        
+        On large boards moves far from every stone are almost never good,
+        so searching only these keeps the branching factor small.
+        """
+        if self.game_over:
+            return []
+        if not self.occupied:
+            return [(self.rows // 2, self.cols // 2)]
+            
+        cols = self.cols
+        cells = self.cells
+        near = set()
+        occupied = self.occupied
+        while occupied:
+            cell = (occupied & -occupied).bit_length() - 1
+            occupied &= occupied - 1
+            row, col = divmod(cell, cols)
+            for r in range(max(0, row - radius), min(self.rows, row + radius + 1)):
+                for c in range(max(0, col - radius), min(cols, col + radius + 1)):
+                    if cells[r * cols + c] == EMPTY:
+                        near.add((r, c))
+        return sorted(near)
     
     def get_state(self):
-        return [row[:] for row in self.board], self.current_player, self.game_over, self.winner
+        return self._rows(), self.current_player, self.game_over, self.winner
     
     def set_state(self, state):
         board, current_player, game_over, winner = state
-        self.board = [row[:] for row in board]
+        self.board = board
         self.current_player = current_player
         self.game_over = game_over
         self.winner = winner
-        self.move_count = sum(row.count('X') + row.count('O') for row in self.board)
+    
+    def snapshot(self):
+        return MNKSnapshot(self.rows, self.cols, self.k, bytes(self.cells), self.current_player, self.game_over,
+                           self.winner)
+    
+    def restore(self, snapshot):
+        """Load a snapshot of a game of the same size."""
+        if (snapshot.rows, snapshot.cols, snapshot.k) != (self.rows, self.cols, self.k):
+            raise ValueError(f"Snapshot of a {snapshot.rows},{snapshot.cols},{snapshot.k} game "
+                             f"does not fit a {self.rows},{self.cols},{self.k} game")
+        self._load_cells(snapshot.cells)
+        self.current_player = snapshot.current_player
+        self.game_over = snapshot.game_over
+        self.winner = snapshot.winner
+    
+    def clone(self):
+        """An independent copy of the game that shares the size tables; no moves are replayed."""
+        game = object.__new__(type(self))
+        for name in MNKGame.__slots__:
+            setattr(game, name, getattr(self, name))
+        game.cells = self.cells[:]
+        if self.line_counts is not None:
+            game.line_counts = self.line_counts[:]
+        if self.symmetry_hashes is not None:
+            game.symmetry_hashes = self.symmetry_hashes[:]
+        return game
+    
+    def __deepcopy__(self, memo):
+        return self.clone()
 
-def play_game(player1, player2):
-    game = TicTacToe()
+class TicTacToe(MNKGame):
+    """Standard 3x3 tic-tac-toe."""
+    __slots__ = ()
+    
+    def __init__(self):
+        super().__init__(3, 3, 3)
+
+def play_game(player1, player2, game=None, verbose=True):
+    """Play a game between two players; verbose prints the board every ply and the result."""
+    if game is None:
+        game = TicTacToe()
     players = {'X': player1, 'O': player2}
     
     while not game.game_over:
-        game.print_board()
+        if verbose:
+            game.print_board()
         current_player = players[game.current_player]
         row, col = current_player.get_move(game)
         
         if not game.make_move(row, col):
             print("Invalid move, try again.")
             continue
+        
+        # A pondering agent searches the replies while the other player thinks
+        if hasattr(current_player, 'ponder'):
+            current_player.ponder(game)
     
+    for player in players.values():
+        if hasattr(player, 'ponder'):
+            player.stop()
+    if not verbose:
+        return game.winner
     game.print_board()
     if game.winner:
         print(f"Player {game.winner} wins!")
     else:
         print("It's a draw!")
+    return game.winner
 
 if __name__ == "__main__":
     class HumanPlayer:
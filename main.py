@@ -3,20 +3,24 @@ import sys
 import os
 import argparse
 
-from games.tictactoe import TicTacToe, play_game as play_tictactoe
-from games.connect4 import Connect4, play_game as play_connect4
-from agents.tictactoe_agents import TicTacToeDefaultAgent, TicTacToeMinimaxAgent
-from agents.connect4_agents import Connect4DefaultAgent, Connect4MinimaxAgent, run_connect4_experiment
+from games.tictactoe import TicTacToe, MNKGame, play_game as play_tictactoe
+from games.connect4 import Connect4, ConnectN, play_game as play_connect4
+from agents.tictactoe_agents import TicTacToeDefaultAgent, TicTacToeMinimaxAgent, TicTacToePerfectAgent, MNKMinimaxAgent
+from agents.connect4_agents import Connect4DefaultAgent, Connect4MinimaxAgent, Connect4MCTSAgent, run_connect4_experiment
+from agents.parallel_search import compare_parallel_speedup
+from agents.ponder import PonderingAgent
+from agents.metrics import SINKS, PrometheusSink, make_sink
 from experiments.run_experiments import run_tictactoe_tournament, run_connect4_tournament
+from server.game_server import run_server
 
 class HumanTicTacToePlayer:
     def get_move(self, game):
         #game.print_board()
         while True:
             try:
-                row = int(input(f"Player {game.current_player}, enter row (0-2): "))
-                col = int(input(f"Player {game.current_player}, enter col (0-2): "))
-                if 0 <= row < 3 and 0 <= col < 3 and game.board[row][col] == ' ':
+                row = int(input(f"Player {game.current_player}, enter row (0-{game.rows - 1}): "))
+                col = int(input(f"Player {game.current_player}, enter col (0-{game.cols - 1}): "))
+                if 0 <= row < game.rows and 0 <= col < game.cols and game.board[row][col] == ' ':
                     return row, col
                 else:
                     print("Invalid move. Try again.")
@@ -28,62 +32,196 @@ class HumanConnect4Player:
         #game.print_board()
         while True:
             try:
-                col = int(input(f"Player {game.current_player}, choose column (0-6): "))
-                if 0 <= col < 7 and not game.is_column_full(col):
+                col = int(input(f"Player {game.current_player}, choose column (0-{game.cols - 1}): "))
+                if 0 <= col < game.cols and not game.is_column_full(col):
                     return col
                 else:
                     print("Invalid move. Try again.")
             except ValueError:
                 print("Please enter a valid integer.")
 
+def make_player(player_types, player_type, symbol, ponder=None):
+    """Build a player; with ponder set, minimax agents also search while the opponent thinks."""
+    player = player_types[player_type](symbol)
+    if ponder and player_type == 'minimax':
+        player = PonderingAgent(player, ponder)
+    return player
+
+def close_sink(sink, path=None):
+    """Write out what a sink has gathered and close its file."""
+    if isinstance(sink, PrometheusSink):
+        if path:
+            sink.dump(path)
+        else:
+            print(sink.render(), end='')
+    elif hasattr(sink, 'close'):
+        sink.close()
+
 def main():
     parser = argparse.ArgumentParser(description='Play Tic Tac Toe or Connect 4')
-    parser.add_argument('game', choices=['tictactoe', 'connect4'], help='Game to play')
-    parser.add_argument('--player1', choices=['human', 'default', 'minimax'], default='human', help='First player type')
-    parser.add_argument('--player2', choices=['human', 'default', 'minimax'], default='default', help='Second player type')
-    parser.add_argument('--depth', type=int, default=5, help='Depth limit for minimax (Connect 4 only)')
+    parser.add_argument('game', choices=['tictactoe', 'connect4', 'serve'],
+                        help='Game to play, or serve to host games over the network (see server/game_server.py)')
+    parser.add_argument('--player1', choices=['human', 'default', 'minimax', 'perfect', 'mcts'], default='human',
+                        help='First player type (perfect is Tic Tac Toe only, mcts is Connect 4 only)')
+    parser.add_argument('--player2', choices=['human', 'default', 'minimax', 'perfect', 'mcts'], default='default',
+                        help='Second player type (perfect is Tic Tac Toe only, mcts is Connect 4 only)')
+    parser.add_argument('--depth', type=int, default=None,
+                        help='Depth limit for minimax (Connect 4 and larger Tic Tac Toe boards, default 5, '
+                             'or 3 on larger Tic Tac Toe boards, without --move-time-ms)')
+    parser.add_argument('--rows', type=int, default=None, help='Board rows (default 3 for Tic Tac Toe, 6 for Connect 4)')
+    parser.add_argument('--cols', type=int, default=None, help='Board columns (default 3 for Tic Tac Toe, 7 for Connect 4)')
+    parser.add_argument('--win-length', type=int, default=None, help='Stones in a row needed to win (default 3 or 4)')
+    parser.add_argument('--move-time-ms', type=int, default=None, help='Per-move time budget for minimax with iterative deepening (Connect 4 only)')
+    parser.add_argument('--playouts', type=int, default=None,
+                        help='Playouts per move for MCTS (default 2000 without --move-time-ms)')
+    parser.add_argument('--tt-size-mb', type=float, default=None, help='Transposition table size in MB for minimax (Connect 4 only)')
+    parser.add_argument('--move-ordering', action=argparse.BooleanOptionalAction, default=True,
+                        help='Use center-first, killer and history move ordering in minimax')
+    parser.add_argument('--symmetry', action=argparse.BooleanOptionalAction, default=True,
+                        help='Share transposition table entries between mirrored positions and skip mirrored root moves')
+    parser.add_argument('--evaluator', choices=['scalar', 'numpy', 'threats'], default='scalar',
+                        help='Leaf evaluation for Connect 4 minimax (numpy needs NumPy installed)')
+    parser.add_argument('--threats', action='store_true',
+                        help='Prune Connect 4 minimax with threat analysis (immediate wins, forced losses)')
+    parser.add_argument('--endgame-cells', type=int, default=0,
+                        help='Empty cells at which Connect 4 minimax switches to the exact endgame solver (default 0: off)')
+    parser.add_argument('--book', default=None, help='Opening book file for Connect 4 minimax (see agents/connect4_book.py)')
+    parser.add_argument('--ponder', choices=['predicted', 'all'], default=None,
+                        help='Let minimax search the predicted reply, or every reply, while the opponent thinks')
+    parser.add_argument('--metrics', choices=SINKS, default='print',
+                        help='Where minimax reports per-move search stats: printed summaries, the logging module, '
+                             'JSON lines or Prometheus text (written to --metrics-path, or printed at the end)')
+    parser.add_argument('--metrics-path', default=None, help='File for --metrics jsonl or prometheus')
+    parser.add_argument('--cache', default=None,
+                        help='SQLite file of searched positions shared between runs and processes (Connect 4 minimax)')
+    parser.add_argument('--workers', type=int, default=1, help='Worker processes for parallel minimax search (Connect 4 only)')
+    parser.add_argument('--parallel-mode', choices=['root_split', 'lazy_smp'], default='root_split',
+                        help='How parallel minimax splits work between workers')
+    parser.add_argument('--parallel-benchmark', action='store_true',
+                        help='Compare parallel and serial Connect 4 search at the same depth')
     parser.add_argument('--experiment', action='store_true', help='Run Connect 4 minimax experiment')
     parser.add_argument('--tournament', action='store_true', help='Run a tournament between agents')
-    parser.add_argument('--games', type=int, default=10, help='Number of games for tournament')
+    parser.add_argument('--games', type=int, default=10, help='Number of games per pairing for tournament')
+    parser.add_argument('--seed', type=int, default=0, help='Base RNG seed for tournament games')
+    parser.add_argument('--output', default=None, help='Stream tournament results to a .jsonl, .csv or .grec (game record) file')
+    parser.add_argument('--host', default='127.0.0.1', help='Address the server listens on')
+    parser.add_argument('--port', type=int, default=8765, help='TCP port the server listens on')
+    parser.add_argument('--unix-socket', default=None, help='Serve on a Unix socket instead of TCP')
+    parser.add_argument('--max-sessions', type=int, default=10000, help='Games the server hosts at once')
+    parser.add_argument('--move-timeout', type=float, default=5.0,
+                        help='Seconds a served agent may think before its move is replaced by a quick one')
     
     args = parser.parse_args()
     
+    if args.game == 'serve':
+        # --workers is the size of the agent process pool, --depth the default Connect 4 minimax depth
+        run_server(args.host, args.port, args.unix_socket, ai_workers=args.workers if args.workers > 1 else None,
+                   max_sessions=args.max_sessions, move_timeout=args.move_timeout, default_depth=args.depth or 4)
+        return
+    
+    # verbose minimax agents print their stats, so silence them unless a sink takes the stats
+    sink = make_sink(args.metrics, args.metrics_path)
+    
     if args.experiment and args.game == 'connect4':
-        run_connect4_experiment()
+        run_connect4_experiment(sink=sink)
+        close_sink(sink, args.metrics_path)
+        return
+    
+    if args.parallel_benchmark:
+        compare_parallel_speedup(workers=max(args.workers, 2), depth=args.depth or 6, mode=args.parallel_mode,
+                                 tt_size_mb=args.tt_size_mb)
         return
         
     if args.tournament:
+        # --workers here is the number of games played at once
+        workers = args.workers if args.workers > 1 else None
         if args.game == 'tictactoe':
-            run_tictactoe_tournament(num_games=args.games)
+            run_tictactoe_tournament(num_games=args.games, workers=workers, seed=args.seed, output_path=args.output)
         else:
-            run_connect4_tournament(num_games=args.games)
+            run_connect4_tournament(num_games=args.games, workers=workers, seed=args.seed, output_path=args.output,
+                                    depth=args.depth or 4)
         return
     
+    if args.game == 'connect4' and 'perfect' in (args.player1, args.player2):
+        parser.error("the perfect player is only available for tictactoe")
+    if args.game == 'tictactoe' and 'mcts' in (args.player1, args.player2):
+        parser.error("the mcts player is only available for connect4")
+    
+    # Other sizes play on the general m,n,k and Connect-N boards
+    defaults = (3, 3, 3) if args.game == 'tictactoe' else (6, 7, 4)
+    size = (args.rows or defaults[0], args.cols or defaults[1], args.win_length or defaults[2])
+    custom_board = size != defaults
+    if custom_board and 'perfect' in (args.player1, args.player2):
+        parser.error("the perfect player only plays 3x3 Tic Tac Toe")
+    if custom_board and size[2] != 4 and 'mcts' in (args.player1, args.player2):
+        parser.error("the mcts player only plays four in a row")
+    
+    # A time budget searches as deep as it can unless a depth cap is given
+    if args.depth is None and args.move_time_ms is None:
+        args.depth = 3 if custom_board and args.game == 'tictactoe' else 5
+    
     # Set up players
-    if args.game == 'tictactoe':
+    if args.game == 'tictactoe' and custom_board:
+        game = MNKGame(*size)
+        player_types = {
+            'human': lambda symbol: HumanTicTacToePlayer(),
+            'default': lambda symbol: TicTacToeDefaultAgent(symbol),
+            'minimax': lambda symbol: MNKMinimaxAgent(symbol, max_depth=args.depth, move_time_ms=args.move_time_ms,
+                                                      tt_size_mb=args.tt_size_mb or 16,
+                                                      move_ordering=args.move_ordering, symmetry=args.symmetry,
+                                                      verbose=sink is not None, sink=sink)
+        }
+        
+        player1 = make_player(player_types, args.player1, 'X', args.ponder)
+        player2 = make_player(player_types, args.player2, 'O', args.ponder)
+        
+        print(f"Starting {size[0]}x{size[1]} {size[2]}-in-a-row game...")
+        play_tictactoe(player1, player2, game)
+    elif args.game == 'tictactoe':
         player_types = {
             'human': lambda symbol: HumanTicTacToePlayer(),
             'default': lambda symbol: TicTacToeDefaultAgent(symbol),
-            'minimax': lambda symbol: TicTacToeMinimaxAgent(symbol, use_alpha_beta=True)
+            'minimax': lambda symbol: TicTacToeMinimaxAgent(symbol, use_alpha_beta=True, move_ordering=args.move_ordering,
+                                                                symmetry=args.symmetry, verbose=sink is not None, sink=sink),
+            'perfect': lambda symbol: TicTacToePerfectAgent(symbol)
         }
         
-        player1 = player_types[args.player1]('X')
-        player2 = player_types[args.player2]('O')
+        player1 = make_player(player_types, args.player1, 'X', args.ponder)
+        player2 = make_player(player_types, args.player2, 'O', args.ponder)
         
         print("Starting Tic Tac Toe game...")
         play_tictactoe(player1, player2)
     else:  # Connect 4
+        game = ConnectN(*size) if custom_board else None
+        # The scalar evaluator only scores four-cell windows
+        evaluator = 'table' if size[2] != 4 and args.evaluator == 'scalar' else args.evaluator
         player_types = {
             'human': lambda symbol: HumanConnect4Player(),
             'default': lambda symbol: Connect4DefaultAgent(symbol),
-            'minimax': lambda symbol: Connect4MinimaxAgent(symbol, use_alpha_beta=True, max_depth=args.depth)
+            'minimax': lambda symbol: Connect4MinimaxAgent(symbol, use_alpha_beta=True, max_depth=args.depth, tt_size_mb=args.tt_size_mb,
+                                                           move_time_ms=args.move_time_ms, move_ordering=args.move_ordering,
+                                                           workers=args.workers, parallel_mode=args.parallel_mode,
+                                                           evaluator=evaluator, book_path=args.book,
+                                                           threat_analysis=args.threats, cache_path=args.cache,
+                                                           symmetry=args.symmetry, endgame_cells=args.endgame_cells,
+                                                           verbose=sink is not None, sink=sink),
+            'mcts': lambda symbol: Connect4MCTSAgent(symbol, playouts=args.playouts, move_time_ms=args.move_time_ms,
+                                                     verbose=sink is not None, sink=sink)
         }
         
-        player1 = player_types[args.player1]('X')
-        player2 = player_types[args.player2]('O')
+        player1 = make_player(player_types, args.player1, 'X', args.ponder)
+        player2 = make_player(player_types, args.player2, 'O', args.ponder)
         
-        print("Starting Connect 4 game...")
-        play_connect4(player1, player2)
+        print("Starting Connect 4 game..." if not custom_board else
+              f"Starting Connect {size[2]} game on a {size[0]}x{size[1]} board...")
+        try:
+            play_connect4(player1, player2, game)
+        finally:
+            # Parallel minimax agents own a process pool, cached ones a database and pondering ones a thread
+            for player in (player1, player2):
+                if hasattr(player, 'close'):
+                    player.close()
+    close_sink(sink, args.metrics_path)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
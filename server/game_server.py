@@ -0,0 +1,337 @@
+import sys
+import os
+import argparse
+import asyncio
+import itertools
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from experiments.run_experiments import GAMES, AGENT_TYPES, make_agent
+
+# Line-delimited JSON requests, one object per line, each answered by one response line:
+#   {"op": "new", "game": "connect4", "opponent": "minimax", "symbol": "X", "depth": 4, "move_timeout": 2.0}
+#   {"op": "move", "session": 1, "move": 3}            (Tic Tac Toe moves are [row, col])
+#   {"op": "state", "session": 1}
+#   {"op": "close", "session": 1}
+#   {"op": "stats"}
+# Responses carry "ok" and either the session state or an "error". An "id" in a request is echoed back.
+
+# Agents of pool workers, built once per process and kept between moves
+_worker_agents = {}
+
+def _ai_move(game_name, spec, symbol, snapshot):
+    """Pool task: the agent's move for a game snapshot."""
+    key = (game_name, spec[0], tuple(sorted(spec[1].items())), symbol)
+    agent = _worker_agents.get(key)
+    if agent is None:
+        agent = _worker_agents[key] = make_agent(game_name, spec, symbol)
+    game = GAMES[game_name]()
+    game.restore(snapshot)
+    return agent.get_move(game)
+
+def _warm_up():
+    return os.getpid()
+
+def _is_int(value):
+    # JSON true/false arrive as bools, which are ints to Python
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+class RequestError(Exception):
+    """A request the server refuses; its message is sent back to the client."""
+    pass
+
+
+class Session:
+    """One game between a client and a server-side agent."""
+
+    def __init__(self, session_id, game_name, opponent, spec, client_symbol, move_timeout):
+        self.id = session_id
+        self.game_name = game_name
+        self.opponent = opponent
+        self.spec = spec
+        self.game = GAMES[game_name]()
+        self.client_symbol = client_symbol
+        self.ai_symbol = 'O' if client_symbol == 'X' else 'X'
+        # Played when the agent runs out of time: wins, blocks or plays at random
+        self.fallback = AGENT_TYPES[game_name]['default'](self.ai_symbol)
+        self.move_timeout = move_timeout
+        self.last_active = time.monotonic()
+
+    def parse_move(self, move):
+        if self.game_name == 'tictactoe':
+            if not isinstance(move, list) or len(move) != 2 or not all(_is_int(part) for part in move):
+                raise RequestError("a Tic Tac Toe move is [row, col]")
+            return tuple(move)
+        if not _is_int(move):
+            raise RequestError("a Connect 4 move is a column number")
+        return move
+
+    def describe(self):
+        game = self.game
+        return {
+            'session': self.id,
+            'game': self.game_name,
+            'symbol': self.client_symbol,
+            'board': game.board,
+            'current_player': game.current_player,
+            'game_over': game.game_over,
+            'winner': game.winner,
+            'valid_moves': game.get_valid_moves()
+        }
+
+
+class GameServer:
+    """Hosts many concurrent games over line-delimited JSON on TCP or a Unix socket.
+
+    The event loop only parses requests and applies moves; agent moves run
+    on a process pool. At most `max_pending` agent moves are queued or
+    running at once, and a connection's next request is not read until its
+    last response is sent, so a busy pool slows clients down instead of
+    growing queues. An agent move that takes longer than the session's
+    move timeout is replaced by the default agent's move (its search keeps
+    its pool slot until it finishes), and sessions idle for `idle_timeout`
+    seconds are dropped.
+    """
+
+    def __init__(self, ai_workers=None, max_sessions=10000, max_pending=None, move_timeout=5.0,
+                 idle_timeout=300.0, max_depth=6, default_depth=4):
+        self.ai_workers = ai_workers or os.cpu_count() or 1
+        self.executor = ProcessPoolExecutor(max_workers=self.ai_workers)
+        self.max_sessions = max_sessions
+        self.max_pending = max_pending or 2 * self.ai_workers
+        self.move_timeout = move_timeout
+        self.idle_timeout = idle_timeout
+        self.max_depth = max_depth
+        self.default_depth = default_depth
+        self.sessions = {}
+        self._ids = itertools.count(1)
+        self._ai_slots = None
+        self.connections = 0
+        self.moves = 0
+        self.ai_moves = 0
+        self.ai_timeouts = 0
+        self.rejected = 0
+
+    def agent_spec(self, game_name, opponent, depth):
+        """Agent spec (see experiments/run_experiments.py) for a new session."""
+        if opponent not in AGENT_TYPES[game_name]:
+            raise RequestError(f"unknown opponent for {game_name}: {opponent}")
+        if opponent == 'minimax' and game_name == 'connect4':
+            depth = self.default_depth if depth is None else depth
+            if not isinstance(depth, int) or not 1 <= depth <= self.max_depth:
+                raise RequestError(f"depth must be between 1 and {self.max_depth}")
+            return ('minimax', {'max_depth': depth, 'tt_size_mb': 4, 'move_ordering': True})
+        if opponent == 'minimax':
+            return ('minimax', {'move_ordering': True})
+        if opponent == 'mcts':
+            # Sessions share worker agents, so no tree is carried over between moves
+            return ('mcts', {'playouts': 2000, 'reuse_tree': False})
+        return (opponent, {})
+
+    async def serve(self, host='127.0.0.1', port=8765, unix_socket=None):
+        """Listen until cancelled."""
+        self._ai_slots = asyncio.Semaphore(self.max_pending)
+        loop = asyncio.get_running_loop()
+        # Start every worker now rather than on the first moves
+        await asyncio.gather(*(loop.run_in_executor(self.executor, _warm_up) for _ in range(self.ai_workers)))
+        if unix_socket:
+            server = await asyncio.start_unix_server(self.handle_connection, path=unix_socket, backlog=4096)
+            print(f"Serving on {unix_socket} with {self.ai_workers} agent workers")
+        else:
+            server = await asyncio.start_server(self.handle_connection, host, port, backlog=4096)
+            print(f"Serving on {host}:{port} with {self.ai_workers} agent workers")
+        reaper = asyncio.create_task(self._drop_idle_sessions())
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            reaper.cancel()
+            self.executor.shutdown(cancel_futures=True)
+
+    async def _drop_idle_sessions(self):
+        while True:
+            await asyncio.sleep(min(self.idle_timeout, 10))
+            cutoff = time.monotonic() - self.idle_timeout
+            for session_id in [sid for sid, session in self.sessions.items() if session.last_active < cutoff]:
+                del self.sessions[session_id]
+
+    async def handle_connection(self, reader, writer):
+        self.connections += 1
+        owned = set()
+        try:
+            while True:
+                try:
+                    line = await asyncio.wait_for(reader.readline(), self.idle_timeout)
+                except asyncio.TimeoutError:
+                    break
+                if not line:
+                    break
+                response = await self.handle_line(line, owned)
+                writer.write(json.dumps(response).encode() + b'\n')
+                await writer.drain()
+        except (ConnectionError, ValueError):
+            # ValueError: a line longer than the stream limit
+            pass
+        finally:
+            self.connections -= 1
+            for session_id in owned:
+                self.sessions.pop(session_id, None)
+            writer.close()
+
+    async def handle_line(self, line, owned):
+        request_id = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise RequestError("a request is a JSON object")
+            request_id = request.get('id')
+            response = await self.handle_request(request, owned)
+        except json.JSONDecodeError:
+            response = {'ok': False, 'error': "invalid JSON"}
+        except RequestError as error:
+            response = {'ok': False, 'error': str(error)}
+        except Exception as error:
+            # A bug in handling one request should not drop the connection and its sessions
+            response = {'ok': False, 'error': f"internal error: {type(error).__name__}"}
+        if request_id is not None:
+            response['id'] = request_id
+        return response
+
+    async def handle_request(self, request, owned):
+        op = request.get('op')
+        if op == 'new':
+            return await self._new_session(request, owned)
+        if op == 'stats':
+            return dict(self.stats(), ok=True)
+
+        session_id = request.get('session')
+        if not _is_int(session_id):
+            raise RequestError("session must be a session id")
+        session = self.sessions.get(session_id)
+        # Ids are sequential, so a connection may only use the sessions it created
+        if session is None or session_id not in owned:
+            raise RequestError("unknown or expired session")
+        session.last_active = time.monotonic()
+        if op == 'move':
+            return await self._play_move(session, request.get('move'))
+        if op == 'state':
+            return dict(session.describe(), ok=True)
+        if op == 'close':
+            self.sessions.pop(session.id, None)
+            owned.discard(session.id)
+            return {'ok': True, 'session': session.id}
+        raise RequestError(f"unknown op: {op}")
+
+    async def _new_session(self, request, owned):
+        if len(self.sessions) >= self.max_sessions:
+            self.rejected += 1
+            raise RequestError("server full")
+        game_name = request.get('game', 'connect4')
+        if game_name not in GAMES:
+            raise RequestError(f"unknown game: {game_name}")
+        symbol = request.get('symbol', 'X')
+        if symbol not in ('X', 'O'):
+            raise RequestError("symbol must be X or O")
+        try:
+            move_timeout = min(float(request.get('move_timeout', self.move_timeout)), self.move_timeout)
+        except (TypeError, ValueError):
+            raise RequestError("move_timeout must be a number of seconds")
+        spec = self.agent_spec(game_name, request.get('opponent', 'minimax'), request.get('depth'))
+
+        session = Session(next(self._ids), game_name, spec[0], spec, symbol, move_timeout)
+        self.sessions[session.id] = session
+        owned.add(session.id)
+        response = {}
+        if symbol == 'O':
+            try:
+                response['ai_move'], response['ai_timed_out'] = await self._agent_move(session)
+            except Exception as error:
+                # The client never got this session, so it is closed rather than left without a first move
+                self.sessions.pop(session.id, None)
+                owned.discard(session.id)
+                raise RequestError(f"agent failed: {type(error).__name__}")
+        return dict(session.describe(), ok=True, **response)
+
+    async def _play_move(self, session, move):
+        game = session.game
+        if game.game_over:
+            raise RequestError("game over")
+        if game.current_player != session.client_symbol:
+            raise RequestError("not your turn")
+        move = session.parse_move(move)
+        if move not in game.get_valid_moves():
+            raise RequestError(f"invalid move: {move}")
+        game.make(move)
+        self.moves += 1
+
+        response = {}
+        if not game.game_over:
+            try:
+                response['ai_move'], response['ai_timed_out'] = await self._agent_move(session)
+            except Exception as error:
+                # Take the client's move back so the session is left on the client's turn, as before the request
+                game.unmake(move)
+                self.moves -= 1
+                raise RequestError(f"agent failed: {type(error).__name__}; your move was taken back")
+        return dict(session.describe(), ok=True, **response)
+
+    async def _agent_move(self, session):
+        """Play the agent's move from the pool; returns (move, whether it timed out)."""
+        loop = asyncio.get_running_loop()
+        game = session.game
+        deadline = loop.time() + session.move_timeout
+        timed_out = False
+        try:
+            await asyncio.wait_for(self._ai_slots.acquire(), session.move_timeout)
+            try:
+                future = self.executor.submit(_ai_move, session.game_name, session.spec, session.ai_symbol,
+                                              game.snapshot())
+            except BaseException:
+                self._ai_slots.release()
+                raise
+            # The slot is held until the search really ends, even after a timeout
+            future.add_done_callback(lambda _: loop.call_soon_threadsafe(self._ai_slots.release))
+            move = await asyncio.wait_for(asyncio.wrap_future(future), max(0.0, deadline - loop.time()))
+        except asyncio.TimeoutError:
+            self.ai_timeouts += 1
+            timed_out = True
+            move = session.fallback.get_move(game)
+        game.make(move)
+        self.ai_moves += 1
+        return move, timed_out
+
+    def stats(self):
+        return {
+            'sessions': len(self.sessions),
+            'connections': self.connections,
+            'moves': self.moves,
+            'ai_moves': self.ai_moves,
+            'ai_timeouts': self.ai_timeouts,
+            'rejected': self.rejected,
+            'ai_workers': self.ai_workers,
+            'max_pending': self.max_pending
+        }
+
+
+def run_server(host='127.0.0.1', port=8765, unix_socket=None, **options):
+    server = GameServer(**options)
+    try:
+        asyncio.run(server.serve(host, port, unix_socket))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Serve Tic Tac Toe and Connect 4 games over line-delimited JSON')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix-socket', default=None, help='Listen on a Unix socket instead of TCP')
+    parser.add_argument('--workers', type=int, default=None, help='Agent worker processes (default: CPU count)')
+    parser.add_argument('--max-sessions', type=int, default=10000)
+    parser.add_argument('--move-timeout', type=float, default=5.0, help='Seconds an agent may think per move')
+    args = parser.parse_args()
+    run_server(args.host, args.port, args.unix_socket, ai_workers=args.workers, max_sessions=args.max_sessions,
+               move_timeout=args.move_timeout)
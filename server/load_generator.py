@@ -0,0 +1,99 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+
+class GameClient:
+    """Line-delimited JSON client for server/game_server.py."""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def connect(cls, host='127.0.0.1', port=8765, unix_socket=None):
+        if unix_socket:
+            reader, writer = await asyncio.open_unix_connection(unix_socket)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def request(self, **request):
+        self.writer.write(json.dumps(request).encode() + b'\n')
+        await self.writer.drain()
+        line = await self.reader.readline()
+        if not line:
+            raise ConnectionError("server closed the connection")
+        return json.loads(line)
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+async def _play_games(client_index, num_games, game_name, opponent, depth, seed, address, latencies, counters):
+    """One client: play num_games games of random moves, timing every move request."""
+    rng = random.Random(seed + client_index)
+    client = await GameClient.connect(*address)
+    try:
+        for _ in range(num_games):
+            options = {'op': 'new', 'game': game_name, 'opponent': opponent, 'symbol': rng.choice('XO')}
+            if depth is not None:
+                options['depth'] = depth
+            state = await client.request(**options)
+            if not state['ok']:
+                counters['errors'] += 1
+                continue
+            while not state['game_over']:
+                start = time.perf_counter()
+                state = await client.request(op='move', session=state['session'],
+                                             move=rng.choice(state['valid_moves']))
+                latencies.append(time.perf_counter() - start)
+                if not state['ok']:
+                    counters['errors'] += 1
+                    break
+                counters['ai_timeouts'] += bool(state.get('ai_timed_out'))
+            counters['games'] += 1
+            await client.request(op='close', session=state.get('session'))
+    finally:
+        await client.close()
+
+async def run_load(clients=100, games_per_client=5, game='tictactoe', opponent='minimax', depth=None,
+                   host='127.0.0.1', port=8765, unix_socket=None, seed=0):
+    """Play games from many concurrent clients against a running server and report moves/sec and latency."""
+    latencies = []
+    counters = {'games': 0, 'errors': 0, 'ai_timeouts': 0}
+    address = (host, port, unix_socket)
+    start = time.perf_counter()
+    await asyncio.gather(*(_play_games(index, games_per_client, game, opponent, depth, seed, address,
+                                       latencies, counters) for index in range(clients)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    def percentile(fraction):
+        return latencies[min(len(latencies) - 1, int(fraction * len(latencies)))] * 1000 if latencies else 0.0
+
+    results = dict(counters, moves=len(latencies), seconds=elapsed,
+                   moves_per_second=len(latencies) / elapsed if elapsed else 0.0,
+                   p50_ms=percentile(0.5), p99_ms=percentile(0.99))
+    print(f"{clients} clients, {results['games']} {game} games vs {opponent}: {results['moves']} moves "
+          f"in {elapsed:.2f}s ({results['moves_per_second']:.0f} moves/s), latency p50 {results['p50_ms']:.1f} ms, "
+          f"p99 {results['p99_ms']:.1f} ms, {results['ai_timeouts']} agent timeouts, {results['errors']} errors")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Load test a running game server (see main.py serve)')
+    parser.add_argument('--clients', type=int, default=100, help='Concurrent connections, one game at a time each')
+    parser.add_argument('--games', type=int, default=5, help='Games per client')
+    parser.add_argument('--game', choices=['tictactoe', 'connect4'], default='tictactoe')
+    parser.add_argument('--opponent', default='minimax', help='Server-side agent to play against')
+    parser.add_argument('--depth', type=int, default=None, help='Connect 4 minimax depth')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix-socket', default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    asyncio.run(run_load(args.clients, args.games, args.game, args.opponent, args.depth,
+                         args.host, args.port, args.unix_socket, args.seed))